@@ -1,16 +1,88 @@
-from decoders.huffman import HuffmanDecoder
-from encoders.huffman import HuffmanEncoder
-from encoders.rle import RleEncoder
-from decoders.rle import RleDecoder
+import importlib
+from encoders.pipeline import PIPELINE_SEPARATOR
 
 class Algorithm:
-    def __init__(self, encoder, decoder, extension):
-        self.encoder = encoder
-        self.decoder = decoder
+    """
+    An encoder and decoder pair. They're given as import paths and only
+    imported and created when first used, so selecting an algorithm doesn't
+    load the modules of every other one.
+    """
+
+    def __init__(self, encoder, decoder, extension, **options):
+        """
+        Creates a new Algorithm.
+
+        Parameters:
+        - encoder (str | object): Import path of the encoder class ("module:Class"),
+          or an encoder instance.
+        - decoder (str | object): Import path of the decoder class, or a decoder instance.
+        - extension (str): Extension of encoded files.
+        - options: Keyword arguments for the encoder and decoder classes.
+        """
+        self._encoder = encoder
+        self._decoder = decoder
         self.extension = extension
+        self.options = options
+
+    @property
+    def encoder(self):
+        if isinstance(self._encoder, str):
+            self._encoder = create(self._encoder, self.options)
+        return self._encoder
+
+    @property
+    def decoder(self):
+        if isinstance(self._decoder, str):
+            self._decoder = create(self._decoder, self.options)
+        return self._decoder
+
+
+def create(path, options):
+    (module, name) = path.split(":")
+    return getattr(importlib.import_module(module), name)(**options)
+
 
 algorithms = {
-    "huffman": Algorithm(HuffmanEncoder(), HuffmanDecoder(), ".huff"),
-    "rle": Algorithm(RleEncoder(), RleDecoder(), ".rle")
+    "huffman": Algorithm("encoders.huffman:HuffmanEncoder", "decoders.huffman:HuffmanDecoder", ".huff"),
+    "huffman-canonical": Algorithm("encoders.huffman:HuffmanEncoder", "decoders.huffman:HuffmanDecoder", ".chuff",
+                                   canonical=True),
+    "rle": Algorithm("encoders.rle:RleEncoder", "decoders.rle:RleDecoder", ".rle"),
+    "adaptive-huffman": Algorithm("encoders.adaptive_huffman:AdaptiveHuffmanEncoder",
+                                  "decoders.adaptive_huffman:AdaptiveHuffmanDecoder", ".ahuff"),
+    "huffman-trained": Algorithm("encoders.trained_huffman:TrainedHuffmanEncoder",
+                                 "decoders.trained_huffman:TrainedHuffmanDecoder", ".thuff"),
+    "lzss": Algorithm("encoders.lzss:LzssEncoder", "decoders.lzss:LzssDecoder", ".lzss"),
+    "bwt": Algorithm("encoders.bwt:BwtEncoder", "decoders.bwt:BwtDecoder", ".bwt"),
+    "tans": Algorithm("encoders.tans:TansEncoder", "decoders.tans:TansDecoder", ".tans"),
+    "auto": Algorithm("encoders.auto:AutoEncoder", "decoders.auto:AutoDecoder", ".auto"),
+    "huffman-order1": Algorithm("encoders.context_huffman:ContextHuffmanEncoder",
+                                "decoders.context_huffman:ContextHuffmanDecoder", ".o1huff"),
 }
 
+
+def get_algorithm(name):
+    """
+    Returns a registered algorithm, or a pipeline of registered algorithms if the
+    name joins several of them with '+' (e.g. "rle+huffman"). Pipeline stages
+    share the registered encoders and decoders, and only the stages in use are loaded.
+
+    Parameters:
+    - name (str): The algorithm's name.
+
+    Returns:
+    - algorithm (Algorithm): The algorithm.
+    """
+
+    if name in algorithms:
+        return algorithms[name]
+
+    stages = name.split(PIPELINE_SEPARATOR)
+    for stage in stages:
+        if stage not in algorithms:
+            raise Exception(f"Unknown algorithm '{stage}'")
+    from encoders.pipeline import PipelineEncoder
+    from decoders.pipeline import PipelineDecoder
+    encoder = PipelineEncoder(stages, [algorithms[stage].encoder for stage in stages])
+    decoder = PipelineDecoder(algorithms)
+    extension = "".join(algorithms[stage].extension for stage in stages)
+    return Algorithm(encoder, decoder, extension)
@@ -0,0 +1,59 @@
+"""
+Compares the single-pass adaptive Huffman coder with the static two-pass one:
+ratio and throughput for whole inputs, plus how soon the adaptive coder
+produces output when fed a stream in small chunks.
+
+Run from the project's root directory:
+
+    $ python -m benchmarks.adaptive_huffman --size 1048576
+"""
+
+import argparse
+import time
+
+from benchmarks.corpus import corpora
+from benchmarks.suite import run_benchmark, print_results
+from encoders.adaptive_huffman import AdaptiveHuffmanStreamEncoder
+
+
+def stream_latency(input, chunk_size):
+    """
+    Feeds the input to a stream encoder in chunks, returning the time until the
+    first output byte (None if there was none at all) and the average time
+    spent per chunk. Output held back until the end counts from the final flush.
+    """
+    stream = AdaptiveHuffmanStreamEncoder()
+    first_output = None
+    start = time.perf_counter()
+    for i in range(0, len(input), chunk_size):
+        if len(stream.update(input[i:i + chunk_size])) > 0 and first_output == None:
+            first_output = time.perf_counter() - start
+    if len(stream.finish()) > 0 and first_output == None:
+        first_output = time.perf_counter() - start
+    chunks = max((len(input) + chunk_size - 1) // chunk_size, 1)
+    return (first_output, (time.perf_counter() - start) / chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare adaptive and static Huffman coding")
+    parser.add_argument("--size", type=int, default=256 << 10, help="Size of each corpus in bytes.")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Chunk size for the stream latency test.")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    results = []
+    for corpus_name in corpora:
+        for algorithm_name in ("huffman", "adaptive-huffman"):
+            results.append(run_benchmark(algorithm_name, corpus_name, args.size, repeat=args.repeat))
+    print_results(results)
+
+    print(f"\nadaptive-huffman streaming in {args.chunk_size} byte chunks:")
+    print(f"{'corpus':<8} {'first output (ms)':>18} {'per chunk (ms)':>15}")
+    for (corpus_name, generate) in corpora.items():
+        (first_output, per_chunk) = stream_latency(generate(args.size), args.chunk_size)
+        first_output = "n/a" if first_output == None else f"{first_output * 1000:.3f}"
+        print(f"{corpus_name:<8} {first_output:>18} {per_chunk * 1000:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Compares plain Huffman coding with Huffman coding after the Burrows-Wheeler
+and move-to-front transforms, with and without RLE in between.
+
+Run from the project's root directory:
+
+    $ python -m benchmarks.bwt --size 1048576
+"""
+
+import argparse
+
+from benchmarks.corpus import corpora
+from benchmarks.suite import run_benchmark, print_results
+
+ALGORITHMS = ("huffman", "bwt+huffman", "bwt+rle+huffman")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Huffman coding with and without a BWT front end")
+    parser.add_argument("--size", type=int, default=256 << 10, help="Size of each corpus in bytes.")
+    parser.add_argument("-c", "--corpus", action="append", choices=corpora.keys(),
+                        help="Corpus to benchmark. Can be repeated. Defaults to all of them.")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    results = []
+    for corpus_name in args.corpus or corpora.keys():
+        for algorithm_name in ALGORITHMS:
+            results.append(run_benchmark(algorithm_name, corpus_name, args.size, repeat=args.repeat))
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Compares order-1 context Huffman coding with order-0 Huffman coding. A code per
+previous byte spends less bits on structured data such as the 'records' and
+'text' corpora, at the cost of a bigger header and a slower encoder.
+
+Run from the project's root directory:
+
+    $ python -m benchmarks.context_huffman --size 1048576
+"""
+
+import argparse
+
+from benchmarks.corpus import corpora
+from benchmarks.suite import run_benchmark, print_results
+
+ALGORITHMS = ("huffman", "huffman-canonical", "huffman-order1")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare order-1 and order-0 Huffman coding")
+    parser.add_argument("--size", type=int, default=1 << 20, help="Size of each corpus in bytes.")
+    parser.add_argument("-c", "--corpus", action="append", choices=corpora.keys(),
+                        help="Corpus to benchmark. Can be repeated. Defaults to all of them.")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    results = []
+    for corpus_name in args.corpus or corpora.keys():
+        for algorithm_name in ALGORITHMS:
+            results.append(run_benchmark(algorithm_name, corpus_name, args.size, repeat=args.repeat))
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
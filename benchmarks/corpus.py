@@ -0,0 +1,124 @@
+"""
+Reproducible synthetic corpora for the benchmarks. Every generator takes the
+amount of bytes to produce and a seed, and always returns the same data for
+the same arguments.
+"""
+
+import random
+
+WORDS = (b"the of and to in is that for it as was with be by on not he this are or "
+         b"his from at which but have an they you were her she there one all we can "
+         b"compression algorithm huffman encoding tree data block stream file byte "
+         b"run length code table symbol frequency bits output input value").split()
+
+
+def random_bytes(size, seed=0):
+    """
+    Uniformly distributed bytes, which no algorithm should be able to compress.
+    """
+    return random.Random(seed).randbytes(size)
+
+
+def skewed(size, seed=0):
+    """
+    Bytes with a geometric distribution: a few values are very common and most are rare.
+    """
+    rng = random.Random(seed)
+    weights = [0.8 ** i for i in range(256)]
+    return bytes(rng.choices(range(256), weights=weights, k=size))
+
+
+def sparse(size, seed=0):
+    """
+    Bytes which are zero about 90% of the time, like counters and flags in
+    telemetry payloads. Most of them are worth less than a bit.
+    """
+    rng = random.Random(seed)
+    weights = [0.1 ** i for i in range(256)]
+    return bytes(rng.choices(range(256), weights=weights, k=size))
+
+
+def long_runs(size, seed=0):
+    """
+    Runs of a repeated byte with lengths between 1 and 1000 bytes.
+    """
+    rng = random.Random(seed)
+    out = bytearray()
+    while len(out) < size:
+        out += bytes([rng.randrange(16)]) * rng.randint(1, 1000)
+    return bytes(out[:size])
+
+
+def text(size, seed=0):
+    """
+    English-like text: words picked with a Zipf-like distribution, split into
+    sentences and lines.
+    """
+    rng = random.Random(seed)
+    weights = [1 / (i + 1) for i in range(len(WORDS))]
+    out = bytearray()
+    line_length = 0
+    while len(out) < size:
+        sentence = rng.choices(WORDS, weights=weights, k=rng.randint(4, 16))
+        sentence = b" ".join(sentence).capitalize() + b". "
+        out += sentence
+        line_length += len(sentence)
+        if line_length > 70:
+            out += b"\n"
+            line_length = 0
+    return bytes(out[:size])
+
+
+def binary_image(size, seed=0):
+    """
+    An 8-bit grayscale bitmap, 512 pixels wide, made of a plain background with
+    filled rectangles of a few shades on top.
+    """
+    rng = random.Random(seed)
+    width = 512
+    height = max(1, (size + width - 1) // width)
+    pixels = bytearray(width * height)
+    for _ in range(max(1, height // 8)):
+        x = rng.randrange(width)
+        y = rng.randrange(height)
+        w = rng.randint(8, width // 2)
+        h = rng.randint(8, 64)
+        shade = rng.choice((0x40, 0x80, 0xc0, 0xff))
+        for row in range(y, min(height, y + h)):
+            start = row * width + x
+            end = row * width + min(width, x + w)
+            pixels[start:end] = bytes([shade]) * (end - start)
+    return bytes(pixels[:size])
+
+
+def records(size, seed=0):
+    """
+    CSV log records, like the output of a web server: a timestamp, a level, a
+    service, a path, a status code and a duration per line.
+    """
+    rng = random.Random(seed)
+    levels = (b"INFO", b"INFO", b"INFO", b"WARN", b"ERROR", b"DEBUG")
+    services = (b"api", b"auth", b"billing", b"search", b"storage")
+    paths = (b"/v1/users", b"/v1/orders", b"/v1/items", b"/v2/search", b"/health")
+    statuses = (b"200", b"200", b"200", b"201", b"204", b"304", b"404", b"500")
+    out = bytearray(b"timestamp,level,service,path,status,duration_ms\n")
+    seconds = 0
+    while len(out) < size:
+        seconds += rng.randint(0, 3)
+        out += b"2024-03-%02d %02d:%02d:%02d," % (1 + seconds // 86400 % 28, seconds // 3600 % 24,
+                                                   seconds // 60 % 60, seconds % 60)
+        out += rng.choice(levels) + b"," + rng.choice(services) + b","
+        out += rng.choice(paths) + b"/%d," % rng.randrange(10000)
+        out += rng.choice(statuses) + b",%d\n" % int(rng.expovariate(1 / 40))
+    return bytes(out[:size])
+
+
+corpora = {
+    "random": random_bytes,
+    "skewed": skewed,
+    "sparse": sparse,
+    "runs": long_runs,
+    "text": text,
+    "image": binary_image,
+    "records": records,
+}
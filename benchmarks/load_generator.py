@@ -0,0 +1,147 @@
+"""
+Sends concurrent requests to the compression server (see server.py) and reports
+throughput and latency percentiles for each amount of concurrent clients.
+
+Start the server, then run from the project's root directory:
+
+    $ python server.py --port 8765 &
+    $ python -m benchmarks.load_generator --port 8765 -a huffman --concurrency 1 4 16 --requests 64
+"""
+
+import argparse
+import asyncio
+import time
+from io import BytesIO
+
+from algorithms import get_algorithm
+from benchmarks.corpus import corpora
+from misc.block_stream import MAGIC, encode_stream, decode_stream
+
+CHUNK_SIZE = 64 << 10
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which a fraction of the values fall (nearest rank).
+
+    Parameters:
+    - values (List[float]): The values, in sorted order.
+    - fraction (float): The fraction, between 0 and 1.
+
+    Returns:
+    - percentile (float)
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def open_connection(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def send(writer, request_line, data):
+    writer.write(request_line)
+    for i in range(0, len(data), CHUNK_SIZE):
+        writer.write(data[i:i + CHUNK_SIZE])
+        await writer.drain()
+    writer.write_eof()
+
+
+async def request(args, request_line, data):
+    """
+    Sends one request, reading the response while the data is being sent.
+
+    Returns:
+    - response (Tuple[bytes, float]): The response's data and the seconds from
+      connecting to the end of the response.
+    """
+
+    start = time.perf_counter()
+    (reader, writer) = await open_connection(args)
+    try:
+        (_, response) = await asyncio.gather(send(writer, request_line, data), reader.read())
+    finally:
+        writer.close()
+    seconds = time.perf_counter() - start
+
+    (status, _, output) = response.partition(b"\n")
+    if status != b"OK":
+        raise Exception(f"Request failed: {status.decode('ascii', 'replace')}")
+    return (output, seconds)
+
+
+async def run_clients(args, concurrency, request_line, data):
+    """
+    Sends args.requests requests from 'concurrency' clients, each one sending its
+    next request as soon as the previous one is done.
+
+    Returns:
+    - results (List[Tuple[bytes, float]]): The response of each request.
+    """
+
+    remaining = [args.requests]
+    results = []
+
+    async def client():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            results.append(await request(args, request_line, data))
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compression server under concurrent load")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="Connect to a Unix socket instead of TCP.")
+    parser.add_argument("-a", "--algorithm", default="huffman")
+    parser.add_argument("-c", "--corpus", default="text", choices=corpora.keys())
+    parser.add_argument("--size", type=int, default=1 << 20, help="Uncompressed size of each request.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="Amounts of concurrent clients to measure.")
+    parser.add_argument("--requests", type=int, default=32, help="Requests sent for each amount of clients.")
+    parser.add_argument("-d", "--decode", action="store_true", help="Send decode requests instead of encode ones.")
+    args = parser.parse_args()
+
+    algorithm = get_algorithm(args.algorithm)
+    input = corpora[args.corpus](args.size)
+    encoded = BytesIO()
+    encode_stream(BytesIO(input), encoded, algorithm.encoder)
+    if args.decode:
+        (request_line, data, expected) = (f"decode {args.algorithm}\n".encode("ascii"), encoded.getvalue(), input)
+    else:
+        (request_line, data, expected) = (f"encode {args.algorithm}\n".encode("ascii"), input, None)
+    megabytes = args.size / 1e6
+
+    print(f"{'decode' if args.decode else 'encode'} {args.algorithm} on {args.corpus}: "
+          f"{megabytes:.1f} MB per request, {args.requests} requests")
+    print(f"{'clients':>7} {'req/s':>8} {'MB/s':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+
+    for concurrency in args.concurrency:
+        start = time.perf_counter()
+        results = asyncio.run(run_clients(args, concurrency, request_line, data))
+        seconds = time.perf_counter() - start
+
+        outputs = set(output for (output, _) in results)
+        if expected == None and len(outputs) == 1:
+            # Checked after timing, so decoding doesn't hold back the clients
+            output = BytesIO(outputs.pop())
+            if output.read(len(MAGIC)) != MAGIC:
+                raise Exception("Response is not a block stream")
+            decoded = BytesIO()
+            decode_stream(output, decoded, algorithm.decoder)
+            outputs = {decoded.getvalue()}
+        if outputs != {expected or input}:
+            raise Exception("Responses do not match the input")
+
+        latencies = sorted(latency * 1000 for (_, latency) in results)
+        print(f"{concurrency:>7} {len(results) / seconds:>8.1f} {len(results) * megabytes / seconds:>8.2f}"
+              f" {percentile(latencies, 0.5):>9.1f} {percentile(latencies, 0.9):>9.1f}"
+              f" {percentile(latencies, 0.99):>9.1f} {latencies[-1]:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measures how block stream encoding and decoding scale with the amount of jobs.
+
+Run from the project's root directory:
+
+    $ python -m benchmarks.parallel_scaling -a huffman --size 8388608 --max-jobs 32
+"""
+
+import argparse
+import os
+import time
+from io import BytesIO
+
+from algorithms import algorithms
+from benchmarks.corpus import corpora
+from misc.block_stream import MAGIC, encode_stream, decode_stream
+
+
+def job_counts(max_jobs):
+    counts = []
+    jobs = 1
+    while jobs < max_jobs:
+        counts.append(jobs)
+        jobs *= 2
+    counts.append(max_jobs)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel block encoding and decoding")
+    parser.add_argument("-a", "--algorithm", default="huffman", choices=algorithms.keys())
+    parser.add_argument("-c", "--corpus", default="text", choices=corpora.keys())
+    parser.add_argument("--size", type=int, default=4 << 20, help="Input size in bytes.")
+    parser.add_argument("--block-size", type=int, default=256 << 10)
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    algorithm = algorithms[args.algorithm]
+    input = corpora[args.corpus](args.size)
+    megabytes = args.size / 1e6
+
+    print(f"{args.algorithm} on {args.corpus}: {megabytes:.1f} MB, {args.block_size} byte blocks, {os.cpu_count()} CPUs")
+    print(f"{'jobs':>5} {'encode MB/s':>12} {'speedup':>8} {'decode MB/s':>12} {'speedup':>8}")
+
+    base_encode = base_decode = None
+    for jobs in job_counts(args.max_jobs):
+        encoded = BytesIO()
+        start = time.perf_counter()
+        encode_stream(BytesIO(input), encoded, algorithm.encoder, args.block_size, jobs)
+        encode_speed = megabytes / (time.perf_counter() - start)
+
+        encoded.seek(len(MAGIC))
+        decoded = BytesIO()
+        start = time.perf_counter()
+        decode_stream(encoded, decoded, algorithm.decoder, jobs)
+        decode_speed = megabytes / (time.perf_counter() - start)
+
+        if decoded.getvalue() != input:
+            raise Exception("Decoded output does not match the input")
+
+        if base_encode == None:
+            base_encode, base_decode = encode_speed, decode_speed
+        print(f"{jobs:>5} {encode_speed:>12.2f} {encode_speed / base_encode:>7.2f}x"
+              f" {decode_speed:>12.2f} {decode_speed / base_decode:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Runs every registered algorithm on the synthetic corpora and reports encode and
+decode speed, compression ratio and peak memory use. Results can be saved as
+JSON and compared against a previous run to catch regressions.
+
+Run from the project's root directory:
+
+    $ python -m benchmarks.suite -o baseline.json
+    $ python -m benchmarks.suite --baseline baseline.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from algorithms import algorithms, get_algorithm
+from benchmarks.corpus import corpora
+from misc.code_tables import train_lengths, save_table
+
+DEFAULT_SIZE = 1 << 20
+DEFAULT_THRESHOLD = 0.10
+
+
+def measure(function, input, repeat):
+    """
+    Runs a function several times, returning its output, the best wall time and
+    the peak memory allocated during an additional traced run.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = function(input)
+        elapsed = time.perf_counter() - start
+        if best == None or elapsed < best:
+            best = elapsed
+
+    # tracemalloc slows down allocations, so memory is measured on its own run
+    tracemalloc.start()
+    function(input)
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return (output, best, peak)
+
+
+def run_benchmark(algorithm_name, corpus_name, size, seed=0, repeat=3):
+    """
+    Benchmarks one algorithm on one corpus.
+
+    Parameters:
+    - algorithm_name (str): A key of algorithms.algorithms, or a pipeline of them (see get_algorithm())
+    - corpus_name (str): A key of benchmarks.corpus.corpora
+    - size (int): Size of the generated input, in bytes.
+    - seed (int, default 0): Seed for the corpus generator.
+    - repeat (int, default 3): Amount of timed runs. The best one is reported.
+
+    Returns:
+    - result (Dict): The measurements for this algorithm and corpus.
+    """
+
+    algorithm = get_algorithm(algorithm_name)
+    input = corpora[corpus_name](size, seed)
+
+    with tempfile.TemporaryDirectory() as table_dir:
+        if algorithm_name == "huffman-trained":
+            # Train on another sample of the same corpus, like files with a similar distribution
+            lengths = train_lengths([corpora[corpus_name](size, seed + 1)])
+            algorithm.encoder.table_id = save_table(lengths, table_dir, make_default=False)
+            algorithm.encoder.table_dir = table_dir
+            algorithm.decoder.table_dir = table_dir
+
+        (encoded, encode_time, encode_peak) = measure(algorithm.encoder.encode, input, repeat)
+        (decoded, decode_time, decode_peak) = measure(algorithm.decoder.decode, encoded, repeat)
+    if decoded != input:
+        raise Exception(f"{algorithm_name} failed to round-trip the {corpus_name} corpus")
+
+    megabytes = len(input) / 1e6
+    return {
+        "algorithm": algorithm_name,
+        "corpus": corpus_name,
+        "input_size": len(input),
+        "output_size": len(encoded),
+        "ratio": len(input) / max(1, len(encoded)),
+        "encode_mbps": megabytes / encode_time,
+        "decode_mbps": megabytes / decode_time,
+        "encode_peak_bytes": encode_peak,
+        "decode_peak_bytes": decode_peak,
+    }
+
+
+def find_regressions(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares results against a baseline run.
+
+    Parameters:
+    - results (List[Dict]): Results of the current run (see run_benchmark())
+    - baseline (List[Dict]): Results of the baseline run.
+    - threshold (float, default 0.1): Relative change that counts as a regression.
+
+    Returns:
+    - regressions (List[str]): A description of every regression found.
+    """
+
+    previous = {(r["algorithm"], r["corpus"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result["algorithm"], result["corpus"]))
+        if old == None:
+            continue
+        name = f"{result['algorithm']}/{result['corpus']}"
+        # Metrics where higher is better
+        for metric in ("encode_mbps", "decode_mbps", "ratio"):
+            if result[metric] < old[metric] * (1 - threshold):
+                regressions.append(f"{name}: {metric} dropped from {old[metric]:.2f} to {result[metric]:.2f}")
+        # Metrics where lower is better
+        for metric in ("encode_peak_bytes", "decode_peak_bytes"):
+            if result[metric] > old[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} grew from {old[metric]} to {result[metric]}")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'algorithm':<20} {'corpus':<8} {'ratio':>7} {'enc MB/s':>9} {'dec MB/s':>9}"
+          f" {'enc peak':>10} {'dec peak':>10}")
+    for r in results:
+        print(f"{r['algorithm']:<20} {r['corpus']:<8} {r['ratio']:>7.3f} {r['encode_mbps']:>9.2f}"
+              f" {r['decode_mbps']:>9.2f} {r['encode_peak_bytes'] / 1e6:>8.2f}MB"
+              f" {r['decode_peak_bytes'] / 1e6:>8.2f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the registered algorithms")
+    parser.add_argument("-a", "--algorithm", action="append",
+                        help="Algorithm or pipeline (e.g. 'rle+huffman') to benchmark. Can be repeated. "
+                        "Defaults to every registered algorithm.")
+    parser.add_argument("-c", "--corpus", action="append", choices=corpora.keys(),
+                        help="Corpus to benchmark. Can be repeated. Defaults to all of them.")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="Size of each corpus in bytes.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per measurement.")
+    parser.add_argument("-o", "--output", help="File to write the results to, as JSON.")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative change that counts as a regression.")
+    args = parser.parse_args()
+
+    results = []
+    for algorithm_name in args.algorithm or algorithms.keys():
+        for corpus_name in args.corpus or corpora.keys():
+            results.append(run_benchmark(algorithm_name, corpus_name, args.size, args.seed, args.repeat))
+    print_results(results)
+
+    if args.output:
+        report = {
+            "metadata": {
+                "date": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "size": args.size,
+                "seed": args.seed,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f_out:
+            json.dump(report, f_out, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f_in:
+            baseline = json.load(f_in)["results"]
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"    - {regression}")
+            sys.exit(1)
+        print("\nNo regressions found.")
+
+
+if __name__ == "__main__":
+    main()
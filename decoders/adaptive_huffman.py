@@ -0,0 +1,97 @@
+from misc.bit_reader import BitReader
+from misc.adaptive_huffman_tree import AdaptiveHuffmanTree, EOF_SYMBOL, SYMBOL_BITS
+from misc import stats
+
+
+class AdaptiveHuffmanDecoder:
+    """
+    Provides utilities for handling input compressed with adaptive Huffman encoding
+    """
+
+    def decode(self, input: bytes):
+        """
+        Decodes an adaptive Huffman encoded input.
+
+        Parameters:
+        - input (bytes): Encoded input in bytestring format.
+
+        Returns:
+        - output (bytes): Decoded output in bytestring format.
+        """
+
+        with stats.stage("adaptive_huffman.decode"):
+            stream = AdaptiveHuffmanStreamDecoder()
+            out = stream.update(input)
+            if not stream.finished:
+                raise Exception("Unexpected end of input: missing end of stream symbol")
+
+        stats.count("adaptive_huffman.decode.bytes_in", len(input))
+        stats.count("adaptive_huffman.decode.bytes_out", len(out))
+        return out
+
+
+class AdaptiveHuffmanStreamDecoder:
+    """
+    Decodes a stream one chunk at a time. Chunks can end anywhere, even in the
+    middle of a code: the decoder remembers where it was in the tree.
+    """
+
+    def __init__(self):
+        self.tree = AdaptiveHuffmanTree()
+        self.node = self.tree.root
+        # Bits of a new symbol's value still to be read, after reaching the NYT node
+        self.raw_bits = SYMBOL_BITS
+        self.raw_value = 0
+        self.finished = False
+
+    def update(self, chunk):
+        """
+        Decodes a chunk of the stream.
+
+        Parameters:
+        - chunk (bytes): The next bytes of the encoded stream.
+
+        Returns:
+        - output (bytes): The bytes decoded from this chunk.
+        """
+
+        out = bytearray()
+        if self.finished:
+            return bytes(out)
+
+        tree = self.tree
+        left = tree.left
+        right = tree.right
+        node = self.node
+        raw_bits = self.raw_bits
+        raw_value = self.raw_value
+
+        reader = BitReader(chunk)
+        while reader.bits_remaining() > 0:
+            bit = reader.read_bit()
+            if node == tree.nyt:
+                raw_value = (raw_value << 1) | bit
+                raw_bits -= 1
+                if raw_bits > 0:
+                    continue
+                symbol = raw_value
+                raw_bits = SYMBOL_BITS
+                raw_value = 0
+            else:
+                node = right[node] if bit else left[node]
+                if node == tree.nyt or left[node] != -1:
+                    continue
+                symbol = tree.symbol[node]
+
+            if symbol == EOF_SYMBOL:
+                # The rest of the chunk is padding
+                self.finished = True
+                break
+            out.append(symbol)
+            tree.update(symbol)
+            node = tree.root
+
+        self.node = node
+        self.raw_bits = raw_bits
+        self.raw_value = raw_value
+        return bytes(out)
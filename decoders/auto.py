@@ -0,0 +1,46 @@
+from decoders.rle import RleDecoder
+from decoders.tans import TansDecoder
+from encoders.auto import AUTO_METHODS
+from misc import stats
+
+
+class AutoDecoder:
+    """
+    Provides utilities for handling input encoded by AutoEncoder (see it for
+    the format)
+    """
+
+    def __init__(self):
+        """
+        Creates a new AutoDecoder.
+        """
+        self.rle = RleDecoder()
+        self.tans = TansDecoder()
+
+    def decode(self, input: bytes):
+        """
+        Decodes an input with the method recorded in it.
+
+        Parameters:
+        - input (bytes): Encoded input in bytestring format.
+
+        Returns:
+        - output (bytes): Decoded output in bytestring format.
+        """
+
+        if len(input) == 0 or input[0] >= len(AUTO_METHODS):
+            raise Exception("Corrupted input: unknown method")
+        method = AUTO_METHODS[input[0]]
+        payload = memoryview(input)[1:]
+
+        if method == "rle":
+            out = self.rle.decode(payload)
+        elif method == "tans":
+            out = self.tans.decode(payload)
+        elif method == "rle+tans":
+            out = self.rle.decode(self.tans.decode(payload))
+        else:
+            out = bytes(payload)
+
+        stats.count(f"auto.decode.blocks.{method}")
+        return out
@@ -0,0 +1,97 @@
+import struct
+from array import array
+from misc.move_to_front import mtf_decode
+from misc import stats
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class BwtDecoder:
+    """
+    Provides utilities for undoing the Burrows-Wheeler and move-to-front
+    transforms (see BwtEncoder for the format)
+    """
+
+    def decode(self, input: bytes):
+        """
+        Restores the original data of a transformed input.
+
+        Parameters:
+        - input (bytes): Transformed input in bytestring format.
+
+        Returns:
+        - output (bytes): The original data.
+        """
+
+        if len(input) == 0:
+            return b""
+        if len(input) < 4:
+            raise Exception("Corrupted input: missing primary index")
+
+        (primary,) = struct.unpack_from(">I", input)
+        with stats.stage("bwt.decode.mtf"):
+            last = mtf_decode(input[4:])
+        if not 0 < primary <= len(last):
+            raise Exception("Corrupted input: invalid primary index")
+
+        with stats.stage("bwt.decode.inverse"):
+            out = self.inverse(last, primary)
+
+        stats.count("bwt.decode.bytes_in", len(input))
+        stats.count("bwt.decode.bytes_out", len(out))
+        return out
+
+    def inverse(self, last, primary):
+        """
+        Undoes the Burrows-Wheeler transform with the LF mapping: the k-th
+        occurrence of a byte in the last column is the same input position as its
+        k-th occurrence in the first column, which is sorted. Following the mapping
+        from the sentinel's row walks the input backwards.
+
+        Parameters:
+        - last (bytes): The last column without the sentinel.
+        - primary (int): The sentinel's row.
+
+        Returns:
+        - output (bytes): The original data.
+        """
+
+        n = len(last)
+        lf = self.lf_mapping(last)
+
+        # 'lf' holds rows, which are turned into indexes of 'last' by skipping the
+        # sentinel's row. The row of the input's first byte maps to the sentinel,
+        # but it's only reached at the end.
+        out = bytearray(n)
+        index = 0
+        for k in range(n - 1, -1, -1):
+            out[k] = last[index]
+            row = lf[index]
+            index = row - 1 if row > primary else row
+        return bytes(out)
+
+    def lf_mapping(self, last):
+        """
+        Returns the row of the first column where each byte of the last column is.
+        Row 0 holds the sentinel.
+        """
+
+        if np is not None:
+            order = np.argsort(np.frombuffer(last, dtype=np.uint8), kind="stable")
+            lf = np.empty(len(last), dtype=np.int64)
+            lf[order] = np.arange(1, len(last) + 1)
+            return lf.tolist()
+
+        next_row = [0] * 256
+        row = 1
+        for char in range(256):
+            next_row[char] = row
+            row += last.count(char)
+        lf = array("i", [0]) * len(last)
+        for (i, char) in enumerate(last):
+            lf[i] = next_row[char]
+            next_row[char] += 1
+        return lf
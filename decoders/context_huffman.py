@@ -0,0 +1,101 @@
+import zlib
+from misc.bit_reader import BitReader
+from misc.canonical_huffman import canonical_code
+from misc.context_huffman import CONTEXTS, EMPTY_TABLE, MAX_CODE_LENGTH, read_lengths, decode_table
+from misc.varint import read_varint
+from misc import stats
+
+# Bytes loaded into the bit buffer at a time
+REFILL_BYTES = 8
+
+
+class ContextHuffmanDecoder:
+    """
+    Provides utilities for handling input encoded by ContextHuffmanEncoder (see
+    misc.context_huffman for the file format)
+    """
+
+    def decode(self, input: bytes):
+        """
+        Decodes an order-1 context Huffman encoded input.
+
+        Parameters:
+        - input (bytes): Encoded input in bytestring format.
+
+        Returns:
+        - output (bytes): Decoded output in bytestring format.
+        """
+
+        (size, pos) = read_varint(input, 0)
+        if len(input) < pos + 4:
+            raise Exception("Corrupted input: truncated header")
+        checksum = int.from_bytes(input[pos:pos + 4], "big")
+        if size == 0:
+            return b""
+
+        with stats.stage("context_huffman.decode.tables"):
+            reader = BitReader(memoryview(input)[pos + 4:])
+            own_tables = reader.read_bits(CONTEXTS)
+            contexts = [None] * CONTEXTS
+            for context in range(CONTEXTS):
+                if own_tables >> (CONTEXTS - 1 - context) & 1:
+                    contexts[context] = decode_table(canonical_code(read_lengths(reader)))
+            shared = read_lengths(reader)
+            shared = decode_table(canonical_code(shared)) if len(shared) > 0 else EMPTY_TABLE
+            contexts = [shared if table == None else table for table in contexts]
+            # The data starts at the next byte, and every symbol takes at least one bit
+            data_size = reader.bits_remaining() // 8
+            if data_size * 8 < size:
+                raise Exception("Corrupted input: truncated data")
+
+        with stats.stage("context_huffman.decode.decode_data"):
+            out = self.decode_data(memoryview(input)[len(input) - data_size:], contexts, size)
+        if zlib.crc32(out) != checksum:
+            raise Exception("Corrupted input: checksum mismatch")
+
+        stats.count("context_huffman.decode.bytes_in", len(input))
+        stats.count("context_huffman.decode.bytes_out", len(out))
+        return out
+
+    def decode_data(self, data, contexts, size):
+        """
+        Decodes 'size' bytes, one table lookup per byte. Codes missing from a table
+        decode as zero bit long zeros, which the checksum catches.
+
+        Parameters:
+        - data (bytes): The encoded data, after the code tables.
+        - contexts (List[Tuple[int, array]]): The decode table of each
+          context (see misc.context_huffman.decode_table())
+        - size (int): Amount of bytes to decode.
+
+        Returns:
+        - output (bytes): The decoded bytes.
+        """
+
+        # Zeros past the end let the last codes, shorter than a refill, still be
+        # read. The buffer holds (pos - end) * 8 bits of padding past the end.
+        data = bytes(data) + bytes(2 * REFILL_BYTES)
+        end = len(data) - 2 * REFILL_BYTES
+        out = bytearray(size)
+
+        # The last 'count' bits of 'bits' are the next unread bits
+        bits = 0
+        count = 0
+        pos = 0
+        char = 0
+        for i in range(size):
+            if count < MAX_CODE_LENGTH:
+                if pos > end and count <= (pos - end) * 8:
+                    raise Exception("Corrupted input: reached end of data")
+                bits = ((bits & ((1 << count) - 1)) << (REFILL_BYTES * 8)) | int.from_bytes(data[pos:pos + REFILL_BYTES], "big")
+                pos += REFILL_BYTES
+                count += REFILL_BYTES * 8
+            (width, entries) = contexts[char]
+            entry = entries[(bits >> (count - width)) & ((1 << width) - 1)]
+            count -= entry & 0xf
+            char = entry >> 4
+            out[i] = char
+
+        if pos * 8 - count > end * 8:
+            raise Exception("Corrupted input: reached end of data")
+        return bytes(out)
@@ -1,5 +1,12 @@
+import zlib
+from encoders.huffman import HUFFMAN_MAGIC, HUFFMAN_VERSION
 from misc.bit_reader import BitReader
 from misc.huffman_tree import HuffmanTree
+from misc.huffman_table import HuffmanDecodeTable, DEFAULT_LOOKUP_BITS
+from misc.canonical_huffman import canonical_code, decode_code_lengths
+from misc.code_tables import decode_table
+from misc.varint import read_varint
+from misc import stats
 
 
 class HuffmanDecoder():
@@ -7,33 +14,115 @@ class HuffmanDecoder():
     Provides utilities for handling input compressed with huffman encoding
     """
 
-    def decode(self, input: bytes):
+    def __init__(self, lookup_bits=DEFAULT_LOOKUP_BITS, canonical=False):
         """
-        Performs huffman decoding on a byte input. 
-        The input must be provided in full format, including the search tree and the two 'size' bytes at 
-        the beginning (see HuffmanTree for more information on the format). To decode the raw data using
+        Creates a new HuffmanDecoder.
+
+        Parameters:
+        - lookup_bits (int, default 10): Amount of bits resolved per table lookup
+          (see HuffmanDecodeTable).
+        - canonical (bool, default False): Whether the input stores canonical code
+          lengths instead of the search tree (see HuffmanEncoder).
+        """
+        self.lookup_bits = lookup_bits
+        self.canonical = canonical
+
+    def decode(self, input: bytes, reference=False):
+        """
+        Performs huffman decoding on a byte input of any version.
+        The input must be provided in full format, including the header and the search tree
+        (see HuffmanEncoder for more information on the format). To decode the raw data using
         a search tree, see parse_data())
 
         Parameters:
         - input (bytes): Encoded input in bytestring format.
+        - reference (bool, default False): Whether to walk the tree one bit at a time
+          (see parse_data()) instead of using lookup tables (see parse_data_table()).
 
         Returns:
         - output (bytes): Decoded output in bytestring format.
         """
 
-        reader = BitReader(input)
-        data_padding = 0
-        for _ in range(3):
-            data_padding = data_padding << 1 + reader.read_bit()
+        header = self.read_header(input)
+        if header == None:
+            reader = BitReader(input)
+            data_padding = reader.read_bits(3)
+            size = None
+        else:
+            (size, checksum, offset) = header
+            if size == 0:
+                return b""
+            reader = BitReader(memoryview(input)[offset:])
+            # Every symbol takes at least one bit
+            if reader.bits_remaining() < size:
+                raise Exception("Corrupted input: truncated data")
 
-        # Get the tree out from the bit stream
-        tree = HuffmanTree.decode(reader)
+        # Get the tree (or the code lengths) out from the bit stream
+        with stats.stage("huffman.decode.tree"):
+            if self.canonical:
+                lengths = decode_code_lengths(reader)
+                if len(lengths) == 0:
+                    return b""
+                lengths = tuple(lengths.get(char, 0) for char in range(256))
+                tree = None
+            else:
+                tree = HuffmanTree.decode(reader)
 
         # Parse the remaining data - out file contents
-        out = self.parse_data(reader, tree, data_padding)
+        if reference:
+            if tree == None:
+                tree = HuffmanTree.from_code(canonical_code(dict(enumerate(lengths))))
+            with stats.stage("huffman.decode.decode_data"):
+                if size == None:
+                    out = self.parse_data(reader, tree, data_padding)
+                else:
+                    out = self.parse_symbols(reader, tree, size)
+        else:
+            with stats.stage("huffman.decode.table"):
+                if tree == None:
+                    # Files with the same code lengths share the (cached) table
+                    table = decode_table(lengths, self.lookup_bits)
+                else:
+                    table = HuffmanDecodeTable(tree.construct_code(), self.lookup_bits)
+            with stats.stage("huffman.decode.decode_data"):
+                if size == None:
+                    out = self.parse_data_table(reader, table, data_padding)
+                elif reader.bits_remaining() < size * table.min_code_size:
+                    raise Exception("Corrupted input: truncated data")
+                else:
+                    out = self.parse_symbols_table(reader, table, size)
+
+        if size != None and zlib.crc32(out) != checksum:
+            raise Exception("Corrupted input: checksum mismatch")
+
+        stats.count("huffman.decode.bytes_in", len(input))
+        stats.count("huffman.decode.bytes_out", len(out))
+        stats.count("huffman.decode.symbols", len(out))
 
         return out
 
+    def read_header(self, input: bytes):
+        """
+        Reads the header of a version 2 input. Lets callers size buffers before
+        decoding.
+
+        Parameters:
+        - input (bytes): Encoded input in bytestring format.
+
+        Returns:
+        - header (Tuple[int, int, int] | None): The decoded size, the CRC-32 of the
+          decoded output and the offset of the search tree, or None for version 1 input.
+        """
+
+        if bytes(input[:len(HUFFMAN_MAGIC)]) != HUFFMAN_MAGIC:
+            return None
+        if len(input) <= len(HUFFMAN_MAGIC) or input[len(HUFFMAN_MAGIC)] != HUFFMAN_VERSION:
+            raise Exception("Corrupted input: unknown Huffman version")
+        (size, pos) = read_varint(input, len(HUFFMAN_MAGIC) + 1)
+        if len(input) < pos + 4:
+            raise Exception("Corrupted input: truncated header")
+        return (size, int.from_bytes(input[pos:pos + 4], "big"), pos + 4)
+
     def parse_data(self, reader, tree, padding):
         """
         Performs huffman decoding on a bytestring given a search tree.
@@ -48,22 +137,190 @@ class HuffmanDecoder():
             
         """
 
-        out = b""
+        out = bytearray()
+        left, right, symbol = tree.left, tree.right, tree.symbol
         curr_node = tree.root
 
         while reader.bits_remaining() > padding:
+            bit = reader.read_bits(1)
+            # A tree with a single leaf uses a one bit code (see HuffmanTree.construct_code())
+            if symbol[curr_node] < 0:
+                curr_node = right[curr_node] if bit else left[curr_node]
+
             # if somehow we get to a bit sequence not represented in the tree
-            if curr_node == None:
+            if curr_node < 0:
                 raise Exception("Unknown bit sequence")
 
-            if curr_node.isLeaf():
-                out += curr_node.charbyte
+            if symbol[curr_node] >= 0:
+                out.append(symbol[curr_node])
                 curr_node = tree.root
-                continue
 
-            bit = reader.read_bit()
-            curr_node = curr_node.childs[bit] # 0 is left child, 1 is right
+        return bytes(out)
 
-        return out
-        
+    def parse_symbols(self, reader, tree, size):
+        """
+        Decodes exactly 'size' symbols walking a search tree, like parse_data(), into
+        a preallocated buffer.
+
+        Parameters:
+            - reader (BitReader): reader positioned at the start of the encoded file's data.
+            - tree (HuffmanTree): the search tree to use for decoding.
+            - size (int): the amount of symbols to decode.
+
+        Returns:
+            - output (bytes): Decoded output as a bytestring.
+        """
+
+        out = bytearray(size)
+        left, right, symbol = tree.left, tree.right, tree.symbol
+        root = tree.root
+        read_bits = reader.read_bits
+
+        for i in range(size):
+            node = root
+            # A tree with a single leaf uses a one bit code (see HuffmanTree.construct_code())
+            if symbol[node] >= 0:
+                read_bits(1)
+            while symbol[node] < 0:
+                node = right[node] if read_bits(1) else left[node]
+                if node < 0:
+                    raise Exception("Unknown bit sequence")
+            out[i] = symbol[node]
+
+        return bytes(out)
+
+    def parse_data_table(self, reader, table, padding):
+        """
+        Performs huffman decoding on a bytestring using lookup tables. Produces the
+        same output as parse_data(), but resolves up to 'table.lookup_bits' bits per
+        step and writes into a preallocated buffer.
+
+        Parameters:
+            - reader (BitReader): reader positioned at the start of the encoded file's data.
+            - table (HuffmanDecodeTable): the decode tables to use.
+            - padding (int): zero-padding at the end of the file's data
+
+        Returns:
+            - output (bytes): Decoded output as a bytestring.
+        """
+
+        remaining = reader.bits_remaining() - padding
+
+        # Every symbol uses at least min_code_size bits, so this is an upper bound
+        out = bytearray(remaining // table.min_code_size)
+        out_pos = 0
+
+        bits = table.lookup_bits
+        needed = table.max_code_size
+        sub_shift = needed - bits
+        multi_syms = table.multi_syms
+        multi_size = table.multi_size
+        first_sym = table.first_sym
+        first_size = table.first_size
+        subtables = table.subtables
+        decode_long = table.decode_long
+        peek_bits = reader.peek_bits
+        skip_bits = reader.skip_bits
+
+        # Bits peeked past the end of the data are padding (or zeros past the end
+        # of the buffer), so symbols are only accepted if they fit in 'remaining'
+        while remaining > 0:
+            peeked = peek_bits(needed)
+            index = peeked >> sub_shift
+            size = multi_size[index]
+            if size:
+                if size <= remaining:
+                    syms = multi_syms[index]
+                    out[out_pos:out_pos + len(syms)] = syms
+                    out_pos += len(syms)
+                else:
+                    # Near the end, only the first symbol can be known to be real data
+                    size = first_size[index]
+                    if size > remaining:
+                        raise Exception("Unknown bit sequence")
+                    out[out_pos] = first_sym[index]
+                    out_pos += 1
+            else:
+                subtable = subtables[index]
+                if subtable == None:
+                    raise Exception("Unknown bit sequence")
+                (sub_bits, symbols, sizes, _) = subtable
+                sub_index = (peeked >> (sub_shift - sub_bits)) & ((1 << sub_bits) - 1)
+                if sizes[sub_index]:
+                    size = bits + sizes[sub_index]
+                    out[out_pos] = symbols[sub_index]
+                else:
+                    # Longer than a secondary table, see HuffmanDecodeTable.decode_long()
+                    (out[out_pos], size) = decode_long(peeked, index)
+                if size > remaining:
+                    raise Exception("Unknown bit sequence")
+                out_pos += 1
+
+            skip_bits(size)
+            remaining -= size
+
+        del out[out_pos:]
+        return bytes(out)
+
+    def parse_symbols_table(self, reader, table, size):
+        """
+        Decodes exactly 'size' symbols using lookup tables, like parse_data_table(),
+        into a preallocated buffer. There are no end of data checks besides the
+        symbol count: reading past the end of the input raises an exception.
+
+        Parameters:
+            - reader (BitReader): reader positioned at the start of the encoded file's data.
+            - table (HuffmanDecodeTable): the decode tables to use.
+            - size (int): the amount of symbols to decode.
+
+        Returns:
+            - output (bytes): Decoded output as a bytestring.
+        """
+
+        out = bytearray(size)
+        out_pos = 0
+
+        bits = table.lookup_bits
+        needed = table.max_code_size
+        sub_shift = needed - bits
+        multi_syms = table.multi_syms
+        multi_size = table.multi_size
+        first_sym = table.first_sym
+        first_size = table.first_size
+        subtables = table.subtables
+        decode_long = table.decode_long
+        peek_bits = reader.peek_bits
+        skip_bits = reader.skip_bits
+
+        while out_pos < size:
+            peeked = peek_bits(needed)
+            index = peeked >> sub_shift
+            code_size = multi_size[index]
+            if code_size:
+                syms = multi_syms[index]
+                end = out_pos + len(syms)
+                if end <= size:
+                    out[out_pos:end] = syms
+                    out_pos = end
+                else:
+                    # Only the last symbols are left
+                    code_size = first_size[index]
+                    out[out_pos] = first_sym[index]
+                    out_pos += 1
+            else:
+                subtable = subtables[index]
+                if subtable == None:
+                    raise Exception("Unknown bit sequence")
+                (sub_bits, symbols, sizes, _) = subtable
+                sub_index = (peeked >> (sub_shift - sub_bits)) & ((1 << sub_bits) - 1)
+                if sizes[sub_index]:
+                    code_size = bits + sizes[sub_index]
+                    out[out_pos] = symbols[sub_index]
+                else:
+                    # Longer than a secondary table, see HuffmanDecodeTable.decode_long()
+                    (out[out_pos], code_size) = decode_long(peeked, index)
+                out_pos += 1
+
+            skip_bits(code_size)
 
+        return bytes(out)
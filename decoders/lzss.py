@@ -0,0 +1,94 @@
+import struct
+from decoders.huffman import HuffmanDecoder
+from misc.bit_reader import BitReader
+from misc.lzss import MIN_MATCH, SECTIONS, join_value
+from misc import stats
+
+
+class LzssDecoder:
+    """
+    Provides utilities for handling input compressed with LZSS (see misc.lzss
+    for the file format)
+    """
+
+    def decode(self, input: bytes):
+        """
+        Performs LZSS decoding on a byte input.
+
+        Parameters:
+        - input (bytes): Encoded input in bytestring format.
+
+        Returns:
+        - output (bytes): Decoded output in bytestring format.
+        """
+
+        with stats.stage("lzss.decode.entropy"):
+            (literals, run_codes, length_codes, distance_codes, extra) = self.read_sections(input)
+            literals = self.decode_section(literals, HuffmanDecoder(canonical=True))
+            run_codes = self.decode_section(run_codes, HuffmanDecoder())
+            length_codes = self.decode_section(length_codes, HuffmanDecoder())
+            distance_codes = self.decode_section(distance_codes, HuffmanDecoder())
+
+        if len(length_codes) != len(distance_codes) or len(run_codes) != len(length_codes) + 1:
+            raise Exception("Corrupted input: sequence counts don't match")
+
+        with stats.stage("lzss.decode.copy"):
+            reader = BitReader(extra)
+            out = bytearray()
+            literal_pos = 0
+            matches = len(length_codes)
+            for (i, run_code) in enumerate(run_codes):
+                run = join_value(run_code, reader)
+                out += literals[literal_pos:literal_pos + run]
+                literal_pos += run
+                if i == matches:
+                    break
+
+                length = join_value(length_codes[i], reader) + MIN_MATCH
+                distance = join_value(distance_codes[i], reader) + 1
+                start = len(out) - distance
+                if start < 0:
+                    raise Exception("Corrupted input: match distance goes past the start of the output")
+                if distance >= length:
+                    out += out[start:start + length]
+                else:
+                    # The match overlaps the bytes it produces, so it repeats the
+                    # last 'distance' bytes
+                    out += (out[start:] * (length // distance + 1))[:length]
+
+        if literal_pos != len(literals):
+            raise Exception("Corrupted input: literal count doesn't match")
+
+        stats.count("lzss.decode.bytes_in", len(input))
+        stats.count("lzss.decode.bytes_out", len(out))
+        return bytes(out)
+
+    def read_sections(self, input):
+        """
+        Splits the input into its sections.
+
+        Parameters:
+        - input (bytes): Encoded input in bytestring format.
+
+        Returns:
+        - sections (List[memoryview]): The contents of each section.
+        """
+
+        view = memoryview(input).cast("B")
+        sections = []
+        pos = 0
+        for _ in range(SECTIONS):
+            if pos + 4 > len(view):
+                raise Exception("Corrupted input: missing sections")
+            (size,) = struct.unpack_from(">I", view, pos)
+            pos += 4
+            if pos + size > len(view):
+                raise Exception("Corrupted input: section goes past the end of the input")
+            sections.append(view[pos:pos + size])
+            pos += size
+        return sections
+
+    def decode_section(self, data, decoder):
+        if len(data) == 0:
+            return b""
+        return decoder.decode(data)
@@ -0,0 +1,50 @@
+from encoders.pipeline import PIPELINE_SEPARATOR
+from misc import stats
+
+
+class PipelineDecoder:
+    """
+    Provides utilities for handling input encoded by a pipeline of stages (see
+    PipelineEncoder for the format). The stages are read from the input, so any
+    pipeline can be decoded.
+    """
+
+    def __init__(self, algorithms):
+        """
+        Creates a new PipelineDecoder.
+
+        Parameters:
+        - algorithms (Dict): Every algorithm which may appear as a stage, in the
+          form {name: Algorithm} (see algorithms.py)
+        """
+        self.algorithms = algorithms
+
+    def decode(self, input: bytes):
+        """
+        Decodes an input by undoing its stages in reverse order.
+
+        Parameters:
+        - input (bytes): Encoded input in bytestring format.
+
+        Returns:
+        - output (bytes): Decoded output in bytestring format.
+        """
+
+        view = memoryview(input).cast("B")
+        if len(view) == 0 or len(view) < 1 + view[0]:
+            raise Exception("Corrupted input: missing pipeline header")
+        try:
+            names = bytes(view[1:1 + view[0]]).decode("ascii").split(PIPELINE_SEPARATOR)
+        except UnicodeDecodeError:
+            raise Exception("Corrupted input: invalid pipeline header")
+        for name in names:
+            if name not in self.algorithms:
+                raise Exception(f"Unknown pipeline stage '{name}'")
+
+        data = view[1 + view[0]:]
+        for name in reversed(names):
+            data = self.algorithms[name].decoder.decode(data)
+
+        stats.count("pipeline.decode.bytes_in", len(input))
+        stats.count("pipeline.decode.bytes_out", len(data))
+        return bytes(data)
@@ -1,10 +1,136 @@
+from encoders.rle import RLE_MAGIC, RLE_VERSION, MIN_RUN, RUN_FLAG, LENGTH_MASK
+from misc.block_stream import MAX_BLOCK_SIZE
+from misc.varint import read_varint
+from misc import stats
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BYTES = [bytes((char,)) for char in range(256)]
+
+
 class RleDecoder():
+    """
+    Provides utilities for handling input compressed with run-length encoding
+    (see RleEncoder for the format)
+    """
+
+    def __init__(self, max_size=MAX_BLOCK_SIZE):
+        """
+        Creates a new RleDecoder.
+
+        Parameters:
+        - max_size (int, default MAX_BLOCK_SIZE): The largest output accepted.
+          A few bytes of version 2 input can describe a run of any length, so
+          longer outputs are rejected before they are allocated.
+        """
+        self.max_size = max_size
+
     def decode(self, input: bytes):
-        out = b""
+        """
+        Decodes a run-length encoded input of any version. Version 1 uses NumPy
+        when it's available.
+
+        Parameters:
+        - input (bytes): Encoded input in bytestring format.
+
+        Returns:
+        - output (bytes): Decoded output in bytestring format.
+        """
+
+        # A version 1 file never starts with a zero run length
+        versioned = len(input) > 0 and input[0] == RLE_MAGIC
+        with stats.stage("rle.decode"):
+            if versioned:
+                if len(input) < 2 or input[1] != RLE_VERSION:
+                    raise Exception("Corrupted input: unknown RLE version")
+                out = self.decode_v2(memoryview(input)[2:])
+            elif np is not None:
+                out = self.decode_vectorized(input)
+            else:
+                out = self.decode_python(input)
+
+        stats.count("rle.decode.bytes_in", len(input))
+        stats.count("rle.decode.bytes_out", len(out))
+        if not versioned:
+            stats.count("rle.decode.runs", len(input) // 2)
+        return out
+
+    def decode_v2(self, input: bytes):
+        """
+        Decodes the tokens of a version 2 input, after its header. Literals are
+        copied as whole slices.
+
+        Parameters:
+        - input (bytes): The encoded tokens.
+
+        Returns:
+        - output (bytes): Decoded output in bytestring format.
+        """
+
+        out = bytearray()
+        pos = 0
+        size = len(input)
+        runs = 0
+        while pos < size:
+            control = input[pos]
+            length = control & LENGTH_MASK
+            pos += 1
+            if length == LENGTH_MASK:
+                (extra, pos) = read_varint(input, pos)
+                length += extra
+
+            if control & RUN_FLAG:
+                if pos >= size:
+                    raise Exception("Corrupted input: truncated run")
+                if len(out) + length + MIN_RUN > self.max_size:
+                    raise Exception("Corrupted input: run past the maximum output size")
+                out += BYTES[input[pos]] * (length + MIN_RUN)
+                pos += 1
+                runs += 1
+            else:
+                length += 1
+                if pos + length > size:
+                    raise Exception("Corrupted input: truncated literals")
+                out += input[pos:pos + length]
+                pos += length
+
+        stats.count("rle.decode.runs", runs)
+        return bytes(out)
+
+    def decode_vectorized(self, input: bytes):
+        """
+        Decodes a version 1 input with a single np.repeat into a buffer of the
+        final size. Produces the same output as decode_python().
+
+        Parameters:
+        - input (bytes): Encoded input in bytestring format.
+
+        Returns:
+        - output (bytes): Decoded output in bytestring format.
+        """
+
+        pairs = np.frombuffer(input, dtype=np.uint8, count=len(input) // 2 * 2)
+        return np.repeat(pairs[1::2], pairs[0::2]).tobytes()
+
+    def decode_python(self, input: bytes):
+        """
+        Decodes a version 1 input one pair at a time.
+
+        Parameters:
+        - input (bytes): Encoded input in bytestring format.
+
+        Returns:
+        - output (bytes): Decoded output in bytestring format.
+        """
+
+        out = bytearray()
         for (count, char) in self.read_pairs(input):
             out += char.to_bytes(1, byteorder="big") * count
 
-        return out
+        return bytes(out)
         
 
     def read_pairs(self, input: bytes):
@@ -0,0 +1,94 @@
+import struct
+from misc.bit_reader import BitReader
+from misc.tans import MAX_TABLE_LOG, decode_table
+from misc import stats
+
+HEADER_SIZE = 5
+# Bytes loaded into the bit buffer at a time
+REFILL_BYTES = 8
+
+
+class TansDecoder:
+    """
+    Provides utilities for handling input compressed with tANS (see misc.tans
+    for the file format)
+    """
+
+    def decode(self, input: bytes):
+        """
+        Performs tANS decoding on a byte input.
+
+        Parameters:
+        - input (bytes): Encoded input in bytestring format.
+
+        Returns:
+        - output (bytes): Decoded output in bytestring format.
+        """
+
+        if len(input) == 0:
+            return b""
+        if len(input) < HEADER_SIZE:
+            raise Exception("Corrupted input: missing header")
+
+        (size, table_log) = struct.unpack_from(">IB", input)
+        if not 1 <= table_log <= MAX_TABLE_LOG:
+            raise Exception("Corrupted input: invalid table log")
+
+        with stats.stage("tans.decode.tables"):
+            reader = BitReader(memoryview(input)[HEADER_SIZE:])
+            present = reader.read_bits(256)
+            chars = [char for char in range(256) if present >> (255 - char) & 1]
+            normalized = {char: reader.read_bits(table_log) + 1 for char in chars}
+            if sum(normalized.values()) != 1 << table_log:
+                raise Exception("Corrupted input: frequencies don't add up to the table size")
+            table = decode_table(normalized, table_log)
+            header_size = HEADER_SIZE + (256 + len(chars) * table_log + 7) // 8
+
+        with stats.stage("tans.decode.decode_data"):
+            out = self.decode_data(memoryview(input)[header_size:], table, table_log, size)
+
+        stats.count("tans.decode.bytes_in", len(input))
+        stats.count("tans.decode.bytes_out", len(out))
+        stats.count("tans.decode.symbols", len(out))
+        return out
+
+    def decode_data(self, data, table, table_log, size):
+        """
+        Decodes 'size' bytes with a tANS decode table, one table lookup per byte.
+
+        Parameters:
+        - data (bytes): The initial state followed by the bits of each step.
+        - table (List[Tuple[int, int, int]]): The decode table (see misc.tans.decode_table())
+        - table_log (int): Log2 of the amount of states.
+        - size (int): Amount of bytes to decode.
+
+        Returns:
+        - output (bytes): The decoded bytes.
+        """
+
+        # Zeros past the end let the loop refill without checking for it
+        data = bytes(data) + bytes(REFILL_BYTES)
+        end = len(data) - REFILL_BYTES
+        out = bytearray(size)
+
+        # The last 'count' bits of 'bits' are the next unread bits
+        bits = int.from_bytes(data[:REFILL_BYTES], "big")
+        count = REFILL_BYTES * 8
+        pos = REFILL_BYTES
+        mask = (1 << table_log) - 1
+
+        count -= table_log
+        state = (bits >> count) & mask
+        for i in range(size):
+            (char, read, base) = table[state]
+            out[i] = char
+            if count < read:
+                if pos > end:
+                    raise Exception("Corrupted input: reached end of data")
+                bits = ((bits & ((1 << count) - 1)) << (REFILL_BYTES * 8)) | int.from_bytes(data[pos:pos + REFILL_BYTES], "big")
+                pos += REFILL_BYTES
+                count += REFILL_BYTES * 8
+            count -= read
+            state = base + ((bits >> count) & ((1 << read) - 1))
+
+        return bytes(out)
@@ -0,0 +1,59 @@
+from decoders.huffman import HuffmanDecoder
+from misc.bit_reader import BitReader
+from misc.canonical_huffman import canonical_code
+from misc.code_tables import DEFAULT_TABLE_DIR, load_lengths, decode_table
+from misc.huffman_table import DEFAULT_LOOKUP_BITS
+from misc.huffman_tree import HuffmanTree
+from misc import stats
+
+
+class TrainedHuffmanDecoder(HuffmanDecoder):
+    """
+    Provides utilities for handling input compressed with a pre-trained code table
+    (see TrainedHuffmanEncoder for the format)
+    """
+
+    def __init__(self, lookup_bits=DEFAULT_LOOKUP_BITS, table_dir=DEFAULT_TABLE_DIR):
+        """
+        Creates a new TrainedHuffmanDecoder.
+
+        Parameters:
+        - lookup_bits (int, default 10): Amount of bits resolved per table lookup
+          (see HuffmanDecodeTable).
+        - table_dir (str): Directory where tables are stored.
+        """
+        super().__init__(lookup_bits)
+        self.table_dir = table_dir
+
+    def decode(self, input: bytes, reference=False):
+        """
+        Decodes an input encoded with a pre-trained code table. The table is
+        loaded from the table directory, or from the cache if it was used before.
+
+        Parameters:
+        - input (bytes): Encoded input in bytestring format.
+        - reference (bool, default False): Whether to walk the tree one bit at a time
+          instead of using lookup tables.
+
+        Returns:
+        - output (bytes): Decoded output in bytestring format.
+        """
+
+        reader = BitReader(input)
+        data_padding = reader.read_bits(3)
+
+        with stats.stage("trained_huffman.decode.table"):
+            lengths = load_lengths(self.table_dir, reader.read_bits(32))
+            if not reference:
+                table = decode_table(lengths, self.lookup_bits)
+
+        with stats.stage("trained_huffman.decode.decode_data"):
+            if reference:
+                tree = HuffmanTree.from_code(canonical_code(dict(enumerate(lengths))))
+                out = self.parse_data(reader, tree, data_padding)
+            else:
+                out = self.parse_data_table(reader, table, data_padding)
+
+        stats.count("trained_huffman.decode.bytes_in", len(input))
+        stats.count("trained_huffman.decode.bytes_out", len(out))
+        return out
@@ -0,0 +1,78 @@
+from misc.bit_writer import BitWriter
+from misc.adaptive_huffman_tree import AdaptiveHuffmanTree, EOF_SYMBOL
+from misc import stats
+
+
+class AdaptiveHuffmanEncoder:
+    """
+    Provides utilities to perform single-pass adaptive Huffman encoding on an input.
+    See misc.adaptive_huffman_tree for the file format.
+    """
+
+    def encode(self, input: bytes):
+        """
+        Adaptive Huffman encodes a given input.
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - output (bytes): The encoded output.
+        """
+
+        with stats.stage("adaptive_huffman.encode"):
+            stream = AdaptiveHuffmanStreamEncoder()
+            out = stream.update(input) + stream.finish()
+
+        stats.count("adaptive_huffman.encode.bytes_in", len(input))
+        stats.count("adaptive_huffman.encode.bytes_out", len(out))
+        return out
+
+
+class AdaptiveHuffmanStreamEncoder:
+    """
+    Encodes a stream one chunk at a time. Since the code adapts to the data seen so
+    far, the output for each chunk is available right away: at most 7 bits are
+    held back until the next chunk or finish().
+    """
+
+    def __init__(self):
+        self.tree = AdaptiveHuffmanTree()
+        self.writer = BitWriter()
+        self.finished = False
+
+    def update(self, chunk):
+        """
+        Encodes a chunk of the stream.
+
+        Parameters:
+        - chunk (bytes): The next bytes of the stream.
+
+        Returns:
+        - output (bytes): The encoded bytes completed by this chunk.
+        """
+
+        if self.finished:
+            raise Exception("Can't encode more data after finish()")
+
+        tree = self.tree
+        write_bits = self.writer.write_bits
+        for symbol in chunk:
+            (value, size) = tree.code(symbol)
+            write_bits(value, size)
+            tree.update(symbol)
+        return self.writer.take_bytes()
+
+    def finish(self):
+        """
+        Ends the stream by writing the end of stream symbol and the padding.
+
+        Returns:
+        - output (bytes): The last encoded bytes.
+        """
+
+        (value, size) = self.tree.code(EOF_SYMBOL)
+        self.writer.write_bits(value, size)
+        self.writer.flush_buffer()
+        self.finished = True
+        return self.writer.take_bytes()
@@ -0,0 +1,128 @@
+from encoders.rle import RleEncoder
+from encoders.tans import TansEncoder
+from misc.histogram import Histogram
+from misc import stats
+
+# Methods a block can be encoded with. The index is stored in the output.
+AUTO_METHODS = ("store", "rle", "tans", "rle+tans")
+SAMPLE_CHUNKS = 8
+SAMPLE_CHUNK_SIZE = 4096
+# Blocks are stored as they are unless the estimated output is smaller than this
+# fraction of the input
+STORE_THRESHOLD = 0.97
+
+
+class AutoEncoder:
+    """
+    Picks the algorithm expected to give the smallest output for each block,
+    or stores it as it is when nothing is expected to compress it. The choice
+    is based on a sample of the block, so it costs a small fraction of actually
+    encoding it.
+
+    Auto file format:
+        - Method: 1 byte, an index of AUTO_METHODS
+        - Output of the method: N bytes
+    """
+
+    def __init__(self):
+        """
+        Creates a new AutoEncoder.
+        """
+        self.rle = RleEncoder()
+        self.tans = TansEncoder()
+
+    def encode(self, input: bytes):
+        """
+        Encodes a given input with the method chosen for it.
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - output (bytes): The encoded output.
+        """
+
+        with stats.stage("auto.encode.choose"):
+            method = self.choose_method(input)
+
+        if method == "rle":
+            payload = self.rle.encode(input)
+        elif method == "tans":
+            payload = self.tans.encode(input)
+        elif method == "rle+tans":
+            payload = self.tans.encode(self.rle.encode(input))
+        else:
+            payload = input
+        if method != "store" and len(payload) >= len(input):
+            # The estimate was wrong
+            method = "store"
+            payload = input
+
+        stats.count(f"auto.encode.blocks.{method}")
+        return bytes([AUTO_METHODS.index(method)]) + payload
+
+    def sample(self, input):
+        """
+        Returns evenly spaced chunks of the input, or the whole input if it's small.
+
+        Parameters:
+        - input (bytes): The data to sample.
+
+        Returns:
+        - chunks (List[bytes]): The sampled chunks.
+        """
+
+        if len(input) <= SAMPLE_CHUNKS * SAMPLE_CHUNK_SIZE:
+            return [input]
+        last = len(input) - SAMPLE_CHUNK_SIZE
+        offsets = (i * last // (SAMPLE_CHUNKS - 1) for i in range(SAMPLE_CHUNKS))
+        return [input[offset:offset + SAMPLE_CHUNK_SIZE] for offset in offsets]
+
+    def estimate_sizes(self, input):
+        """
+        Estimates the output size of each method relative to the input size, from
+        the order-0 entropy of a sample of the input and of its run-length encoding.
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - estimates (Dict): A dictionary in the form {method: output_size / input_size}
+        """
+
+        histogram = Histogram()
+        rle_histogram = Histogram()
+        for chunk in self.sample(input):
+            histogram.update(chunk)
+            # Run-length encoding a sample takes about as long as counting its runs
+            rle_histogram.update(self.rle.encode_v2(chunk))
+
+        sampled = histogram.total()
+        # The tANS header takes about 37 bytes plus 11 bits per byte value
+        tans_header = (37 + len(histogram.frequencies()) * 11 / 8) / len(input)
+        rle_size = rle_histogram.total() / sampled
+        return {
+            "store": 1.0,
+            "rle": rle_size,
+            "tans": histogram.entropy() / 8 + tans_header,
+            "rle+tans": rle_size * rle_histogram.entropy() / 8 + tans_header,
+        }
+
+    def choose_method(self, input):
+        """
+        Returns the method expected to give the smallest output for an input.
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - method (str): One of AUTO_METHODS.
+        """
+
+        if len(input) == 0:
+            return "store"
+        estimates = self.estimate_sizes(input)
+        method = min(estimates, key=estimates.get)
+        if estimates[method] > STORE_THRESHOLD:
+            return "store"
+        return method
@@ -0,0 +1,68 @@
+import struct
+from misc.suffix_array import suffix_array
+from misc.move_to_front import mtf_encode
+from misc import stats
+
+
+class BwtEncoder:
+    """
+    Applies the Burrows-Wheeler transform followed by the move-to-front
+    transform. This doesn't compress by itself, but groups bytes with similar
+    contexts together, which makes the output much easier to compress for the
+    other algorithms (e.g. 'bwt+rle+huffman')
+
+    BWT file format:
+        - Primary index: 4 bytes, big endian
+        - Move-to-front transform of the BWT: N bytes, one per input byte
+
+    The BWT is the last column of the sorted rotations of the input followed by
+    a sentinel which sorts before every byte. The sentinel itself is left out,
+    the primary index is its row.
+    """
+
+    def encode(self, input: bytes):
+        """
+        Transforms a given input.
+
+        Parameters:
+        - input (bytes): The data to transform.
+
+        Returns:
+        - output (bytes): The transformed output.
+        """
+
+        if len(input) == 0:
+            return b""
+
+        (last, primary) = self.transform(input)
+        with stats.stage("bwt.encode.mtf"):
+            out = struct.pack(">I", primary) + mtf_encode(last)
+
+        stats.count("bwt.encode.bytes_in", len(input))
+        stats.count("bwt.encode.bytes_out", len(out))
+        return out
+
+    def transform(self, input):
+        """
+        Computes the Burrows-Wheeler transform of an input from its suffix array.
+
+        Parameters:
+        - input (bytes): The data to transform.
+
+        Returns:
+        - bwt (Tuple[bytes, int]): The last column without the sentinel, and the
+          row of the sentinel.
+        """
+
+        data = bytes(input)
+        with stats.stage("bwt.encode.suffix_array"):
+            sa = suffix_array(data)
+
+        with stats.stage("bwt.encode.last_column"):
+            # The first row is the sentinel followed by the input, which ends with
+            # the last byte. Then come the suffixes in order, each one preceded by
+            # the byte before it. The whole input is preceded by the sentinel.
+            column = bytes([data[i - 1] for i in sa])
+            sentinel = sa.index(0)
+            last = data[-1:] + column[:sentinel] + column[sentinel + 1:]
+        return (last, sentinel + 1)
@@ -0,0 +1,68 @@
+import zlib
+from misc.bit_writer import BitWriter
+from misc.canonical_huffman import canonical_code
+from misc.context_huffman import CONTEXTS, pair_indices, context_frequencies, choose_tables, write_lengths
+from misc.varint import write_varint
+from misc import stats
+
+
+class ContextHuffmanEncoder:
+    """
+    Provides utilities to perform order-1 context Huffman encoding on an input:
+    each byte is coded with a table picked by the byte before it. See
+    misc.context_huffman for the file format.
+    """
+
+    def encode(self, input: bytes):
+        """
+        Encodes a given input.
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - output (bytes): The encoded output.
+        """
+
+        header = bytearray()
+        write_varint(header, len(input))
+        header += zlib.crc32(input).to_bytes(4, "big")
+        if len(input) == 0:
+            return bytes(header)
+
+        with stats.stage("context_huffman.encode.histogram"):
+            indices = pair_indices(input)
+            frequencies = context_frequencies(indices)
+        with stats.stage("context_huffman.encode.tables"):
+            (tables, shared) = choose_tables(frequencies)
+
+        with stats.stage("context_huffman.encode.encode_data"):
+            writer = BitWriter()
+            writer.write_bytes(bytes(header))
+            own_tables = 0
+            for context in range(CONTEXTS):
+                own_tables = (own_tables << 1) | (context in tables)
+            writer.write_bits(own_tables, CONTEXTS)
+            for context in sorted(tables):
+                write_lengths(writer, tables[context])
+            write_lengths(writer, shared)
+            writer.flush_buffer()
+
+            # Flat tables indexed like pair_indices()
+            charcodes = [0] * (CONTEXTS << 8)
+            sizes = [0] * (CONTEXTS << 8)
+            shared_code = canonical_code(shared)
+            for context in range(CONTEXTS):
+                code = canonical_code(tables[context]) if context in tables else shared_code
+                for (char, (charcode, size)) in code.items():
+                    charcodes[(char << 8) | context] = charcode
+                    sizes[(char << 8) | context] = size
+
+            writer.write_codes(map(charcodes.__getitem__, indices), map(sizes.__getitem__, indices))
+            writer.flush_buffer()
+            output = writer.get_bytes()
+
+        stats.count("context_huffman.encode.bytes_in", len(input))
+        stats.count("context_huffman.encode.bytes_out", len(output))
+        stats.count("context_huffman.encode.tables", len(tables) + 1)
+        return output
@@ -1,20 +1,60 @@
+import heapq
+import zlib
 from io import TextIOWrapper, BufferedWriter
 from typing import Dict
 from misc.bit_writer import BitWriter
-from misc.huffman_tree import HuffmanTree, Node
+from misc.huffman_tree import HuffmanTree
+from misc.canonical_huffman import limited_code_lengths, canonical_code, encode_code_lengths
+from misc.histogram import Histogram
+from misc.varint import write_varint
+from misc import stats
+
+# Version 2 files start with HUFFMAN_MAGIC and the version byte. Version 1 files
+# can't start with it: after the 3 padding bits it reads as code lengths 8, 1, 1, 1
+# (more than a complete code) in canonical mode, and as a single leaf followed by
+# set data bits (which are always zero with a single leaf) otherwise.
+HUFFMAN_MAGIC = b"\x10\x22\x22"
+HUFFMAN_VERSION = 2
 
 
 class HuffmanEncoder:
     """
     Provides utilities to perform huffman encoding on an input
 
-    Huffman encoding file format:
+    Huffman encoding file format, version 2:
+        - Magic: 3 bytes, HUFFMAN_MAGIC
+        - Version: 1 byte, 2
+        - Input size: varint (see misc.varint)
+        - CRC-32 of the input: 4 bytes, big endian
+        - Search Tree: N bits
+        - File data: N bits, zero padded up to the next byte
+
+    Huffman encoding file format, version 1:
         - EOF byte padding amount: 3 bits
         - Search Tree: N bits
         - File data: N bits
+
+    In canonical mode the search tree is replaced by the code length of every
+    byte value (see misc.canonical_huffman), and codes are limited to 15 bits.
     """
 
-    def encode(self, input: bytes):
+    def __init__(self, canonical=False, version=HUFFMAN_VERSION):
+        """
+        Creates a new HuffmanEncoder.
+
+        Parameters:
+        - canonical (bool, default False): Whether to emit length-limited canonical
+          codes with a code length header instead of the serialized search tree.
+        - version (int, default 2): The file format version to write (1 or 2).
+          Version 2 stores the input's size and checksum, so decoding can stop after
+          exactly that many symbols and detect corrupted input.
+        """
+        if version not in (1, 2):
+            raise Exception(f"Unknown Huffman version {version}")
+        self.canonical = canonical
+        self.version = version
+
+    def encode(self, input: bytes, frequencies=None):
         """
         Huffman encodes a given input. The result will include the encoded file's contents
         as well as the zero-padding size and the search tree. For more information of the
@@ -23,35 +63,80 @@ class HuffmanEncoder:
 
         Parameters:
         - input (str): A string with the data to encode.
+        - frequencies (Dict, optional): The frequencies of 'input', if they were already
+          counted (see Histogram). Otherwise they are computed with get_char_frequency()
 
         Returns:
         - output (bytes): The encoded output.
         """
 
-        frequencies = self.get_char_frequency(input)
-        tree = self.construct_search_tree(frequencies)
-        code = tree.construct_code()
+        if self.version == 2 and len(input) == 0:
+            return self.encode_header(input)
+
+        if frequencies == None:
+            with stats.stage("huffman.encode.histogram"):
+                frequencies = self.get_char_frequency(input)
+        if self.canonical:
+            with stats.stage("huffman.encode.tree"):
+                lengths = limited_code_lengths(frequencies)
+            with stats.stage("huffman.encode.code"):
+                code = canonical_code(lengths)
+            with stats.stage("huffman.encode.tree_serialization"):
+                encoded_tree, tree_padding = encode_code_lengths(lengths)
+        else:
+            with stats.stage("huffman.encode.tree"):
+                tree = self.construct_search_tree(frequencies)
+            with stats.stage("huffman.encode.code"):
+                code = tree.construct_code()
+            with stats.stage("huffman.encode.tree_serialization"):
+                encoded_tree, tree_padding = tree.encode()
+
+        with stats.stage("huffman.encode.encode_data"):
+            data_writer = BitWriter()
+            self.encode_data(input, code, data_writer)
+            data_padding = data_writer.flush_buffer()
+
+        with stats.stage("huffman.encode.output"):
+            out_writer = BitWriter()
+
+            # Here, the resulting file format can be seen. See HuffmanEncoder for more info.
+            if self.version == 2:
+                out_writer.write_bytes(self.encode_header(input))
+            else:
+                # Must precalculate the padding needed when the whole data is written,
+                # including the 3 bits of the padding field itself
+                total_padding = (tree_padding + data_padding - 3) % 8
+                out_writer.write_bits(total_padding, 3)
+            out_writer.write_bytes(encoded_tree, zero_padding=tree_padding)
+            out_writer.write_bytes(data_writer.get_bytes(), zero_padding=data_padding)
 
-        encoded_tree, tree_padding = tree.encode()
+            out_writer.flush_buffer()
+            output = out_writer.get_bytes()
 
-        data_writer = BitWriter()
-        self.encode_data(input, code, data_writer)
-        data_padding = data_writer.flush_buffer()
+        stats.count("huffman.encode.bytes_in", len(input))
+        stats.count("huffman.encode.bytes_out", len(output))
+        stats.count("huffman.encode.symbols", len(input))
+        stats.count("bit_writer.flushes", data_writer.flushes + out_writer.flushes)
 
-        # Must precalculate the padding needed when the whole data is written
-        total_padding = (tree_padding + data_padding) % 8
+        return output
 
-        out_writer = BitWriter()
-        
-        # Here, the resulting file format can be seen. See HuffmanEncoder for more info.
-        out_writer.write_bits(total_padding, 3)
-        out_writer.write_bytes(encoded_tree, zero_padding=tree_padding)
-        out_writer.write_bytes(data_writer.get_bytes(), zero_padding=data_padding)
 
-        out_writer.flush_buffer()
+    def encode_header(self, input):
+        """
+        Returns the version 2 header for an input.
+
+        Parameters:
+        - input (bytes): The data to encode.
 
-        return out_writer.get_bytes()
+        Returns:
+        - header (bytes): The magic, version, input size and checksum.
+        """
 
+        header = bytearray(HUFFMAN_MAGIC)
+        header.append(HUFFMAN_VERSION)
+        write_varint(header, len(input))
+        header += zlib.crc32(input).to_bytes(4, "big")
+        return bytes(header)
 
     def get_char_frequency(self, input: bytes) -> Dict[str, int]:
         """
@@ -64,14 +149,7 @@ class HuffmanEncoder:
         - frequencies (Dict): A dictionary in the form {char: freq}
         """
 
-        dict = {}
-        for c in input:
-            if dict.get(c):
-                dict[c] += 1
-            else:
-                dict[c] = 1
-
-        return dict
+        return Histogram(input).frequencies()
 
     def construct_search_tree(self, frequencies: Dict):
         """
@@ -84,21 +162,25 @@ class HuffmanEncoder:
         - tree (HuffmanTree): The Huffman search tree
         """
 
-        # Initialize leaf nodes
-        nodes = [Node(k, v, (None, None)) for (k, v) in frequencies.items()]
-        nodes.sort(key=lambda n: n.weight)
-        
+        # Initialize leaf nodes. Heap entries are (weight, order, node): ties on weight
+        # are broken by char for leaves and by creation order for parent nodes, so the
+        # same frequencies always produce the same tree.
+        tree = HuffmanTree()
+        heap = [(v, k, tree.add_leaf(k, v)) for (k, v) in sorted(frequencies.items())]
+        heapq.heapify(heap)
+        order = 256
+
         # Takes the two nodes with the least weight and joins them into a new parent node.
-        # Does this until there is one node left in the array
-        while len(nodes) > 1:
-            left = nodes.pop(0)
-            right = nodes.pop(0)
-            head = Node(None, left.weight + right.weight, (left, right))
-            nodes.append(head)
-            nodes.sort(key=lambda n: n.weight)
+        # Does this until there is one node left in the heap
+        while len(heap) > 1:
+            (left_weight, _, left) = heapq.heappop(heap)
+            (right_weight, _, right) = heapq.heappop(heap)
+            weight = left_weight + right_weight
+            heapq.heappush(heap, (weight, order, tree.add_node(left, right, weight)))
+            order += 1
 
         # The remaining node is the tree's root
-        tree = HuffmanTree(nodes[0])
+        tree.root = heap[0][2]
         return tree
 
     def encode_data(self, input, code, writer):
@@ -111,8 +193,12 @@ class HuffmanEncoder:
         - writer (BitWriter): Writer to write the encoded output to.
         """
 
-        for char in input:
-            charcode, size = code[char]
-            writer.write_bits(charcode, size)
+        charcodes = [0] * 256
+        sizes = [0] * 256
+        for (char, (charcode, size)) in code.items():
+            charcodes[char] = charcode
+            sizes[char] = size
+
+        writer.write_codes(map(charcodes.__getitem__, input), map(sizes.__getitem__, input))
 
 
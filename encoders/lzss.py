@@ -0,0 +1,190 @@
+import struct
+from encoders.huffman import HuffmanEncoder
+from misc.bit_writer import BitWriter
+from misc.lzss import MIN_MATCH, MAX_MATCH, TOO_FAR, LEVELS, DEFAULT_LEVEL, split_value
+from misc import stats
+
+
+class LzssEncoder:
+    """
+    Provides utilities to perform LZSS encoding on an input. Repeated substrings
+    are replaced by references to their previous occurrence, and the result is
+    Huffman encoded. See misc.lzss for the file format.
+
+    Matches are found with a hash table of the last position of every 3 byte
+    string, and hash chains linking each position to the previous one with the
+    same bytes. Only the last 2 ** window_bits bytes can be referenced, and at
+    most 'chain_depth' candidates are tried per position.
+    """
+
+    def __init__(self, level=DEFAULT_LEVEL, window_bits=None, chain_depth=None):
+        """
+        Creates a new LzssEncoder.
+
+        Parameters:
+        - level (int, default 4): Speed/ratio level from 1 (fastest) to 9 (smallest
+          output). Sets the window size and the chain depth (see misc.lzss.LEVELS)
+        - window_bits (int, optional): Overrides the level's window size.
+        - chain_depth (int, optional): Overrides the level's chain depth.
+        """
+        if level not in LEVELS:
+            raise Exception(f"Invalid level {level}, must be between {min(LEVELS)} and {max(LEVELS)}")
+        (self.window_bits, self.chain_depth) = LEVELS[level]
+        if window_bits != None:
+            self.window_bits = window_bits
+        if chain_depth != None:
+            self.chain_depth = chain_depth
+
+    def encode(self, input: bytes):
+        """
+        LZSS encodes a given input.
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - output (bytes): The encoded output.
+        """
+
+        with stats.stage("lzss.encode.match"):
+            sequences = self.find_sequences(input)
+
+        with stats.stage("lzss.encode.split"):
+            literals = bytearray()
+            run_codes = bytearray()
+            length_codes = bytearray()
+            distance_codes = bytearray()
+            extras = []
+            extra_sizes = []
+            # The last sequence has no match
+            for (start, end, length, distance) in sequences:
+                literals += input[start:end]
+                for (codes, value) in ((run_codes, end - start), (length_codes, length - MIN_MATCH),
+                                       (distance_codes, distance - 1)):
+                    if value < 0:
+                        break
+                    (code, extra, extra_size) = split_value(value)
+                    codes.append(code)
+                    if extra_size:
+                        extras.append(extra)
+                        extra_sizes.append(extra_size)
+
+            extra_writer = BitWriter()
+            extra_writer.write_codes(extras, extra_sizes)
+            extra_writer.flush_buffer()
+
+        # Literals use every byte value, so the canonical code's fixed size header is
+        # smaller than a tree. The code streams only have a few distinct values.
+        # Sections are stored in the version 1 Huffman format, since their sizes are
+        # already in the output and a header per section would be pure overhead.
+        sections = [
+            self.encode_section(literals, HuffmanEncoder(canonical=True, version=1)),
+            self.encode_section(run_codes, HuffmanEncoder(version=1)),
+            self.encode_section(length_codes, HuffmanEncoder(version=1)),
+            self.encode_section(distance_codes, HuffmanEncoder(version=1)),
+            extra_writer.get_bytes(),
+        ]
+        output = b"".join(struct.pack(">I", len(section)) + section for section in sections)
+
+        stats.count("lzss.encode.bytes_in", len(input))
+        stats.count("lzss.encode.bytes_out", len(output))
+        stats.count("lzss.encode.literals", len(literals))
+        stats.count("lzss.encode.matches", len(length_codes))
+        return output
+
+    def encode_section(self, data, encoder):
+        if len(data) == 0:
+            return b""
+        with stats.stage("lzss.encode.entropy"):
+            return encoder.encode(data)
+
+    def find_sequences(self, input):
+        """
+        Parses the input into literal runs followed by matches, taking the longest
+        match found at each position.
+
+        Parameters:
+        - input (bytes): The data to parse.
+
+        Returns:
+        - sequences (List[Tuple[int, int, int, int]]): (start, end, length, distance)
+          for each sequence, where input[start:end] are its literals. The last
+          sequence has a length and distance of 0.
+        """
+
+        data = bytes(input)
+        size = len(data)
+        # A window bigger than the input doesn't find more matches
+        window = 1 << min(self.window_bits, size.bit_length())
+        mask = window - 1
+        chain_depth = self.chain_depth
+
+        # Last position of each 3 byte string, and the previous position with the
+        # same string for each position in the window
+        head = {}
+        prev = [-1] * window
+
+        sequences = []
+        literal_start = 0
+        pos = 0
+        last = size - MIN_MATCH
+
+        def insert(pos):
+            key = (data[pos] << 16) | (data[pos + 1] << 8) | data[pos + 2]
+            candidate = head.get(key, -1)
+            head[key] = pos
+            prev[pos & mask] = candidate
+            return candidate
+
+        while pos <= last:
+            candidate = insert(pos)
+            best_length = 0
+            best_distance = 0
+            limit = min(MAX_MATCH, size - pos)
+            depth = chain_depth
+            # Chain entries are overwritten once they leave the window, so the walk
+            # stops there
+            while candidate >= 0 and pos - candidate < window and depth > 0:
+                # Only longer matches matter, check the byte which would make it longer first
+                if best_length < limit and data[candidate + best_length] == data[pos + best_length]:
+                    length = match_length(data, candidate, pos, limit)
+                    if length > best_length:
+                        best_length = length
+                        best_distance = pos - candidate
+                        if length == limit:
+                            break
+                candidate = prev[candidate & mask]
+                depth -= 1
+
+            # A short match far away costs more bits than its literals
+            if best_length == MIN_MATCH and best_distance > TOO_FAR:
+                best_length = 0
+
+            if best_length >= MIN_MATCH:
+                sequences.append((literal_start, pos, best_length, best_distance))
+                end = pos + best_length
+                for inside in range(pos + 1, min(end, last + 1)):
+                    insert(inside)
+                pos = end
+                literal_start = pos
+            else:
+                pos += 1
+
+        sequences.append((literal_start, size, 0, 0))
+        return sequences
+
+
+def match_length(data, a, b, limit):
+    """
+    Returns the length of the common prefix of data[a:] and data[b:], up to
+    'limit'. The first MIN_MATCH bytes are known to be equal. Compares slices,
+    halving their size on every mismatch.
+    """
+    length = MIN_MATCH
+    chunk = 32
+    while chunk:
+        if length + chunk <= limit and data[a + length:a + length + chunk] == data[b + length:b + length + chunk]:
+            length += chunk
+        else:
+            chunk >>= 1
+    return length
@@ -0,0 +1,52 @@
+from misc import stats
+
+PIPELINE_SEPARATOR = "+"
+
+
+class PipelineEncoder:
+    """
+    Runs several encoders one after the other, each one encoding the output of
+    the previous one. Intermediate outputs are handed to the next stage as they
+    are, without being copied or written anywhere.
+
+    Pipeline file format:
+        - Pipeline name length: 1 byte
+        - Pipeline name: N bytes (ASCII stage names joined by '+', e.g. "rle+huffman")
+        - Output of the last stage: N bytes
+
+    The name lets PipelineDecoder undo the stages in reverse order without being
+    told which ones were used.
+    """
+
+    def __init__(self, names, encoders):
+        """
+        Creates a new PipelineEncoder.
+
+        Parameters:
+        - names (List[str]): Registry name of each stage, in encoding order.
+        - encoders (List): The encoder of each stage.
+        """
+        self.name = PIPELINE_SEPARATOR.join(names).encode("ascii")
+        if len(self.name) > 255:
+            raise Exception("Pipeline name too long")
+        self.encoders = encoders
+
+    def encode(self, input: bytes):
+        """
+        Encodes an input with every stage of the pipeline.
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - output (bytes): The encoded output.
+        """
+
+        data = input
+        for encoder in self.encoders:
+            data = encoder.encode(data)
+        output = bytes([len(self.name)]) + self.name + data
+
+        stats.count("pipeline.encode.bytes_in", len(input))
+        stats.count("pipeline.encode.bytes_out", len(output))
+        return output
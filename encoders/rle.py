@@ -1,9 +1,234 @@
+import re
+from misc.varint import write_varint
+from misc import stats
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Version 2 files start with RLE_MAGIC and the version byte. Version 1 files have
+# no header, but they never start with a zero run length.
+RLE_MAGIC = 0x00
+RLE_VERSION = 2
+# Shortest run encoded as a run in version 2. Shorter ones are cheaper as literals.
+MIN_RUN = 3
+# Control byte of version 2 tokens
+RUN_FLAG = 0x80
+LENGTH_MASK = 0x7f
+RUN_PATTERN = re.compile(rb"(.)\1{%d,}" % (MIN_RUN - 1), re.DOTALL)
+
+
 class RleEncoder():
+    """
+    Provides utilities to perform run-length encoding on an input
+
+    RLE file format, version 2:
+        - Magic: 1 byte, 0x00
+        - Version: 1 byte, 2
+        - Tokens, until the end of the file. Each one starts with a control byte:
+            - Literals, if the high bit is clear: the low 7 bits are the amount of
+              literals minus 1, followed by the literals themselves
+            - Run, if the high bit is set: the low 7 bits are the run length minus
+              MIN_RUN, followed by the run byte
+          If the low 7 bits are all set, the control byte is followed by a varint
+          (see misc.varint) which is added to the length.
+
+    Input without runs becomes a single literals token, so the output is never more
+    than a few bytes longer than the input.
+
+    RLE file format, version 1, repeated until the end of the file:
+        - Run length: 1 byte (runs longer than 255 are split)
+        - Run byte: 1 byte
+    """
+
+    def __init__(self, version=RLE_VERSION):
+        """
+        Creates a new RleEncoder.
+
+        Parameters:
+        - version (int, default 2): The file format version to write (1 or 2).
+        """
+        if version not in (1, 2):
+            raise Exception(f"Unknown RLE version {version}")
+        self.version = version
+
     def encode(self, input: bytes):
-        out = b""
+        """
+        Run-length encodes a given input, with NumPy when it's available.
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - output (bytes): The encoded output.
+        """
+
+        with stats.stage("rle.encode"):
+            if self.version == 2 and np is not None:
+                out = self.encode_v2_vectorized(input)
+            elif self.version == 2:
+                out = self.encode_v2(input)
+            elif np is not None:
+                out = self.encode_vectorized(input)
+            else:
+                out = self.encode_python(input)
+
+        stats.count("rle.encode.bytes_in", len(input))
+        stats.count("rle.encode.bytes_out", len(out))
+        if self.version == 1:
+            stats.count("rle.encode.runs", len(out) // 2)
+        return out
+
+    def encode_v2(self, input: bytes):
+        """
+        Run-length encodes a given input in the version 2 format. Runs are found
+        with a regular expression, and the literals between them are copied as
+        whole slices.
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - output (bytes): The encoded output.
+        """
+
+        out = bytearray((RLE_MAGIC, RLE_VERSION))
+        literals_start = 0
+        runs = 0
+        for match in RUN_PATTERN.finditer(input):
+            (start, end) = match.span()
+            if start > literals_start:
+                self.write_length(out, 0, start - literals_start - 1)
+                out += input[literals_start:start]
+            self.write_length(out, RUN_FLAG, end - start - MIN_RUN)
+            out.append(input[start])
+            literals_start = end
+            runs += 1
+        if len(input) > literals_start:
+            self.write_length(out, 0, len(input) - literals_start - 1)
+            out += input[literals_start:]
+
+        stats.count("rle.encode.runs", runs)
+        return bytes(out)
+
+    def encode_v2_vectorized(self, input: bytes):
+        """
+        Run-length encodes a given input in the version 2 format using NumPy array
+        operations. Produces the same output as encode_v2().
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - output (bytes): The encoded output.
+        """
+
+        data = np.frombuffer(input, dtype=np.uint8)
+        if len(data) == 0:
+            return bytes((RLE_MAGIC, RLE_VERSION))
+
+        # Maximal runs of equal bytes, like in encode_vectorized()
+        starts = np.concatenate(([0], np.flatnonzero(data[1:] != data[:-1]) + 1))
+        lengths = np.diff(np.append(starts, len(data)))
+
+        # Long runs are run tokens, and each group of consecutive short runs is
+        # a literals token
+        long_run = lengths >= MIN_RUN
+        first = ~long_run & np.concatenate(([True], long_run[:-1]))
+        token_runs = np.flatnonzero(long_run | first)
+        token_starts = starts[token_runs]
+        token_lengths = np.add.reduceat(lengths, token_runs)
+        is_run = long_run[token_runs]
+        values = token_lengths - np.where(is_run, MIN_RUN, 1)
+
+        # Lengths which don't fit in the control byte continue in a varint
+        extra = np.maximum(values - LENGTH_MASK, 0)
+        varint_sizes = np.where(values >= LENGTH_MASK, 1, 0)
+        for shift in range(7, 64, 7):
+            varint_sizes += extra >= (1 << shift)
+        payload_sizes = np.where(is_run, 1, token_lengths)
+        offsets = np.cumsum(1 + varint_sizes + payload_sizes) - (1 + varint_sizes + payload_sizes) + 2
+
+        out = np.empty(int(offsets[-1] + 1 + varint_sizes[-1] + payload_sizes[-1]), dtype=np.uint8)
+        out[:2] = (RLE_MAGIC, RLE_VERSION)
+        out[offsets] = np.where(is_run, RUN_FLAG, 0) | np.minimum(values, LENGTH_MASK)
+        for byte in range(int(varint_sizes.max())):
+            written = varint_sizes > byte
+            more = np.where(varint_sizes[written] > byte + 1, 0x80, 0)
+            out[offsets[written] + 1 + byte] = ((extra[written] >> (7 * byte)) & 0x7f) | more
+
+        payloads = offsets + 1 + varint_sizes
+        out[payloads[is_run]] = data[token_starts[is_run]]
+        # Literal bytes keep their order, each token's shifted by the same amount
+        literals = np.flatnonzero(np.repeat(~long_run, lengths))
+        shifts = (payloads - token_starts)[~is_run]
+        out[literals + np.repeat(shifts, token_lengths[~is_run])] = data[literals]
+
+        stats.count("rle.encode.runs", int(is_run.sum()))
+        return out.tobytes()
+
+    def write_length(self, out, flag, length):
+        """
+        Writes the control byte of a version 2 token, followed by a varint if the
+        length doesn't fit in it.
+
+        Parameters:
+        - out (bytearray): The buffer to write to.
+        - flag (int): RUN_FLAG for runs, 0 for literals.
+        - length (int): The token's length, minus 1 for literals or MIN_RUN for runs.
+        """
+        if length < LENGTH_MASK:
+            out.append(flag | length)
+        else:
+            out.append(flag | LENGTH_MASK)
+            write_varint(out, length - LENGTH_MASK)
+
+    def encode_vectorized(self, input: bytes):
+        """
+        Run-length encodes a given input in the version 1 format using NumPy array
+        operations. Produces the same output as encode_python().
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - output (bytes): The encoded output.
+        """
+
+        data = np.frombuffer(input, dtype=np.uint8)
+        if len(data) == 0:
+            return b""
+
+        # A run starts wherever a byte differs from the previous one
+        starts = np.concatenate(([0], np.flatnonzero(data[1:] != data[:-1]) + 1))
+        lengths = np.diff(np.append(starts, len(data)))
+
+        # Runs longer than 255 become several full pairs followed by the remainder
+        pieces = (lengths + 0xfe) // 0xff
+        counts = np.full(int(pieces.sum()), 0xff, dtype=np.uint8)
+        counts[np.cumsum(pieces) - 1] = lengths - 0xff * (pieces - 1)
+
+        out = np.empty(len(counts) * 2, dtype=np.uint8)
+        out[0::2] = counts
+        out[1::2] = np.repeat(data[starts], pieces)
+        return out.tobytes()
+
+    def encode_python(self, input: bytes):
+        """
+        Run-length encodes a given input in the version 1 format one byte at a time.
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - output (bytes): The encoded output.
+        """
+
+        out = bytearray()
 
         if len(input) == 0:
-            return out
+            return bytes(out)
 
         curr_byte = input[0]
         count = 1
@@ -23,7 +248,7 @@ class RleEncoder():
             
         out += self.encode_char(curr_byte, count)
 
-        return out
+        return bytes(out)
 
     def encode_char(self, byte, count):
         out = b""
@@ -0,0 +1,93 @@
+import struct
+from misc.bit_writer import BitWriter
+from misc.histogram import Histogram
+from misc.tans import DEFAULT_TABLE_LOG, MAX_TABLE_LOG, normalize_frequencies, encode_tables
+from misc import stats
+
+
+class TansEncoder:
+    """
+    Provides utilities to perform tANS (table based asymmetric numeral systems)
+    encoding on an input. See misc.tans for the file format.
+    """
+
+    def __init__(self, table_log=DEFAULT_TABLE_LOG):
+        """
+        Creates a new TansEncoder.
+
+        Parameters:
+        - table_log (int, default 11): Log2 of the amount of states. Bigger tables
+          follow the frequencies more closely, but take longer to build.
+        """
+        if not 1 <= table_log <= MAX_TABLE_LOG:
+            raise Exception(f"Invalid table log {table_log}, must be between 1 and {MAX_TABLE_LOG}")
+        self.table_log = table_log
+
+    def encode(self, input: bytes):
+        """
+        tANS encodes a given input.
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - output (bytes): The encoded output.
+        """
+
+        if len(input) == 0:
+            return b""
+
+        with stats.stage("tans.encode.histogram"):
+            frequencies = Histogram(input).frequencies()
+
+        with stats.stage("tans.encode.tables"):
+            # Every present byte needs at least one state
+            table_log = max(self.table_log, (len(frequencies) - 1).bit_length())
+            normalized = normalize_frequencies(frequencies, table_log)
+            tables = encode_tables(normalized, table_log)
+
+        with stats.stage("tans.encode.header"):
+            header = BitWriter()
+            header.write_bits(sum(1 << (255 - char) for char in normalized), 256)
+            header.write_codes((normalized[char] - 1 for char in sorted(normalized)),
+                               [table_log] * len(normalized))
+            header.flush_buffer()
+
+        with stats.stage("tans.encode.encode_data"):
+            data_writer = BitWriter()
+            self.encode_data(input, tables, table_log, data_writer)
+            data_writer.flush_buffer()
+
+        output = struct.pack(">IB", len(input), table_log) + header.get_bytes() + data_writer.get_bytes()
+
+        stats.count("tans.encode.bytes_in", len(input))
+        stats.count("tans.encode.bytes_out", len(output))
+        stats.count("tans.encode.symbols", len(input))
+        return output
+
+    def encode_data(self, input, tables, table_log, writer):
+        """
+        Encodes the given data with tANS tables.
+
+        Parameters:
+        - input (bytes): The data to encode.
+        - tables (Tuple): The encode tables (see misc.tans.encode_tables())
+        - table_log (int): Log2 of the amount of states.
+        - writer (BitWriter): Writer to write the encoded output to.
+        """
+
+        (next_state, delta_state, delta_bits) = tables
+        codes = []
+        sizes = []
+        state = 1 << table_log
+
+        # The decoder reads the bytes in reverse order of encoding, so the input is
+        # encoded backwards and the bits are written backwards
+        for char in reversed(input):
+            bits = (state + delta_bits[char]) >> 16
+            codes.append(state & ((1 << bits) - 1))
+            sizes.append(bits)
+            state = next_state[(state >> bits) + delta_state[char]]
+
+        writer.write_bits(state - (1 << table_log), table_log)
+        writer.write_codes(reversed(codes), reversed(sizes))
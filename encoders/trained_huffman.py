@@ -0,0 +1,59 @@
+from misc.bit_writer import BitWriter
+from misc.code_tables import DEFAULT_TABLE_DIR, default_table_id, load_lengths, encode_table
+from misc import stats
+
+
+class TrainedHuffmanEncoder:
+    """
+    Provides utilities to perform Huffman encoding with a pre-trained code table
+    (see misc.code_tables). Files only reference the table by its ID, so there is
+    no per-file tree to build or store.
+
+    Trained Huffman encoding file format:
+        - EOF byte padding amount: 3 bits
+        - Table ID: 32 bits
+        - File data: N bits
+    """
+
+    def __init__(self, table_id=None, table_dir=DEFAULT_TABLE_DIR):
+        """
+        Creates a new TrainedHuffmanEncoder.
+
+        Parameters:
+        - table_id (int, optional): ID of the table to encode with. Defaults to the
+          last trained table.
+        - table_dir (str): Directory where tables are stored.
+        """
+        self.table_id = table_id
+        self.table_dir = table_dir
+
+    def encode(self, input: bytes):
+        """
+        Huffman encodes a given input with the selected code table.
+
+        Parameters:
+        - input (bytes): The data to encode.
+
+        Returns:
+        - output (bytes): The encoded output.
+        """
+
+        with stats.stage("trained_huffman.encode.table"):
+            table_id = self.table_id
+            if table_id == None:
+                table_id = default_table_id(self.table_dir)
+            (charcodes, sizes) = encode_table(load_lengths(self.table_dir, table_id))
+
+        with stats.stage("trained_huffman.encode.encode_data"):
+            writer = BitWriter()
+            # The padding is only known at the end, it's filled in afterwards
+            writer.write_bits(0, 3)
+            writer.write_bits(table_id, 32)
+            writer.write_codes(map(charcodes.__getitem__, input), map(sizes.__getitem__, input))
+            padding = writer.flush_buffer()
+            writer.out[0] |= padding << 5
+            output = writer.get_bytes()
+
+        stats.count("trained_huffman.encode.bytes_in", len(input))
+        stats.count("trained_huffman.encode.bytes_out", len(output))
+        return output
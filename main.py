@@ -1,7 +1,17 @@
 #!/usr/bin/python3
 
 import argparse
-from algorithms import algorithms
+import os
+import sys
+import time
+from functools import partial
+from algorithms import algorithms, get_algorithm
+from encoders.pipeline import PIPELINE_SEPARATOR
+from misc import stats
+from misc.file_io import open_input, open_output, same_file
+from misc.lzss import LEVELS
+from misc.batch import find_files, output_name, output_paths, skip_encoded
+from misc.block_stream import DEFAULT_BLOCK_SIZE, MAGIC, is_block_stream, read_blocks, encode_stream, decode_stream, decode_range, map_blocks
 
 def main():
     parser = argparse.ArgumentParser(description="A program to encode files using different algorithms")
@@ -9,14 +19,48 @@ def main():
     actions = parser.add_argument_group("actions")
     algorithm_options = algorithms.keys()
     actions.add_argument("-a", "--algorithm",
-                        help="Specifies the algorithm to use.",
-                        metavar='algorithm', 
-                        choices=algorithm_options
-                        
+                        help="Specifies the algorithm to use. Algorithms can be chained with '+', "
+                        "e.g. 'rle+huffman'.",
+                        metavar='algorithm',
+                        type=algorithm_name
                         )
     actions.add_argument("-d", "--decode", action="store_true")
-    actions.add_argument("input", nargs="?", help="Input file.")
-    actions.add_argument("output", nargs="?", help="Output file.")
+    actions.add_argument("-b", "--block-size", type=int, default=DEFAULT_BLOCK_SIZE,
+                        help="Size of the blocks the input is split into when encoding. "
+                        "Use 0 to encode the whole input as a single unframed block.")
+    actions.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Amount of processes encoding or decoding blocks in parallel. "
+                        "Use 0 to use every CPU.")
+    actions.add_argument("-s", "--seekable", action="store_true",
+                        help="Write an index of the blocks when encoding, so byte ranges can be "
+                        "decoded without decoding the whole file (see --range).")
+    actions.add_argument("-r", "--range", metavar="START:END", type=byte_range,
+                        help="Decode only the bytes from START up to END (exclusive) of a file "
+                        "encoded with --seekable. Either one can be omitted.")
+    actions.add_argument("--train", nargs="+", metavar="SAMPLE",
+                        help="Train a code table for 'huffman-trained' from sample files, save it to "
+                        "the table directory and make it the default table.")
+    actions.add_argument("--table", metavar="ID",
+                        help="ID of the code table to encode with when using 'huffman-trained'. "
+                        "Defaults to the last trained table.")
+    actions.add_argument("--table-dir",
+                        help="Directory where trained code tables are stored. "
+                        "Defaults to ~/.cache/compression-playground/tables")
+    actions.add_argument("-l", "--level", type=int, choices=LEVELS.keys(),
+                        help="Compression level of 'lzss', from 1 (fastest) to 9 (smallest output).")
+    actions.add_argument("--batch", nargs="+", metavar="PATH",
+                        help="Encode or decode many files in one run. Each PATH can be a file, a directory "
+                        "(walked recursively) or a glob pattern. Outputs are named like with a single file, "
+                        "and files are processed in parallel with --jobs.")
+    actions.add_argument("--files-from", metavar="LIST",
+                        help="Like --batch, with the paths read from a file, one per line. Use '-' for stdin.")
+    actions.add_argument("--output-dir",
+                        help="Directory to write the outputs of a batch to, instead of next to each input.")
+    actions.add_argument("input", nargs="?", help="Input file. Use '-' for stdin.")
+    actions.add_argument("output", nargs="?", help="Output file. Use '-' for stdout.")
+
+    actions.add_argument("--stats", action="store_true",
+                        help="Print the time spent on each stage and other counters to stderr.")
 
     listings = parser.add_argument_group("listings")
     listings.add_argument("--list-algorithms", action="store_true", help="List all available algorithms.")
@@ -27,53 +71,188 @@ def main():
         print("Available algorithm options are:")
         for a in algorithm_options:
             print(f"    - \"{a}\"")
+        print(f"Algorithms can be chained into a pipeline with '{PIPELINE_SEPARATOR}', e.g. \"rle+huffman\"")
+        return
+    if args.train:
+        table_id = train(args.train, args.table_dir)
+        print(f"Trained code table {table_id:08x}")
         return
     if not args.algorithm: 
         print("Must provide an algorithm. Run with --list-algorithms to see available options.")
         return
+    stages = args.algorithm.split(PIPELINE_SEPARATOR)
+    if "huffman-trained" in stages:
+        configure_tables(algorithms["huffman-trained"], args.table, args.table_dir)
+    if args.level != None:
+        if "lzss" not in stages:
+            print("--level only applies to 'lzss'")
+            return
+        configure_level(algorithms["lzss"], args.level)
+    algorithm = get_algorithm(args.algorithm)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    if args.batch or args.files_from:
+        if args.stats:
+            stats.enable()
+        files = find_files(args.batch or (), args.files_from)
+        batch(files, algorithm, args.decode, args.output_dir, args.block_size, jobs, args.seekable)
+        if args.stats:
+            print(stats.current().report(), file=sys.stderr)
+        return
     if not args.input:
         print("Must provide an input file")
         return
+    if args.stats:
+        stats.enable()
 
     if not args.decode:
         if (args.output):
             output_file = args.output
+        elif args.input == "-":
+            output_file = "-"
         else:
-            parts = args.input.split(".")
-            if len(parts) > 1:
-                parts.pop(-1)
-            output_file = ".".join(parts) + algorithms[args.algorithm].extension
+            output_file = output_name(args.input, algorithm.extension)
 
-        encoder = algorithms[args.algorithm].encoder
+        encoder = algorithm.encoder
 
-        encode(args.input, output_file, encoder)
+        encode(args.input, output_file, encoder, args.block_size, jobs, args.seekable)
 
     else:
         if not args.output:
             raise Exception("If decoding file an output filename must be provided")
 
-        decoder = algorithms[args.algorithm].decoder
-        decode(args.input, args.output, decoder)
+        decoder = algorithm.decoder
+        decode(args.input, args.output, decoder, jobs, args.range)
 
+    if args.stats:
+        print(stats.current().report(), file=sys.stderr)
     
 
-def encode(input_file, output_file, encoder):
-    with open(input_file, "rb") as f_in:
-        input = f_in.read()
+def algorithm_name(name):
+    try:
+        get_algorithm(name)
+    except Exception as e:
+        raise argparse.ArgumentTypeError(f"{e}. Run with --list-algorithms to see available options.")
+    return name
+
+def byte_range(text):
+    (start, _, end) = text.partition(":")
+    try:
+        (start, end) = (int(start or 0), int(end) if end else None)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not in the form START:END")
+    if start < 0 or (end != None and end < start):
+        raise argparse.ArgumentTypeError(f"'{text}' must have 0 <= START <= END")
+    return (start, end)
+
+def train(sample_files, table_dir=None):
+    from misc.code_tables import DEFAULT_TABLE_DIR, train_lengths, save_table
+
+    def read_samples():
+        for sample_file in sample_files:
+            with open_input(sample_file) as f_in:
+                yield from read_blocks(f_in)
+
+    return save_table(train_lengths(read_samples()), table_dir or DEFAULT_TABLE_DIR)
+
+def configure_tables(algorithm, table, table_dir):
+    if table:
+        algorithm.encoder.table_id = int(table, 16)
+    if table_dir:
+        algorithm.encoder.table_dir = table_dir
+        algorithm.decoder.table_dir = table_dir
 
-    output = encoder.encode(input)
+def configure_level(algorithm, level):
+    (algorithm.encoder.window_bits, algorithm.encoder.chain_depth) = LEVELS[level]
 
-    with open(output_file, "wb") as f_out:
-        f_out.write(output)
+def batch(files, algorithm, decode_files=False, output_dir=None, block_size=DEFAULT_BLOCK_SIZE, jobs=1, seekable=False):
+    """
+    Encodes or decodes many files, spreading them over 'jobs' processes, and
+    prints the throughput of the whole run.
+    """
 
-def decode(input_file, output_file, decoder):
-    with open(input_file, "rb") as f_in:
-        input = f_in.read()
+    if not decode_files:
+        skipped = len(files)
+        files = skip_encoded(files, algorithm.extension)
+        skipped -= len(files)
+        if skipped > 0:
+            print(f"Skipped {skipped} files already ending in '{algorithm.extension}'")
+    outputs = output_paths(files, algorithm.extension, decode_files, output_dir)
+    if decode_files:
+        process = partial(_batch_file, True, algorithm.decoder, block_size, seekable, stats.enabled())
+    else:
+        process = partial(_batch_file, False, algorithm.encoder, block_size, seekable, stats.enabled())
+
+    start = time.perf_counter()
+    bytes_in = 0
+    bytes_out = 0
+    for (size_in, size_out, file_stats) in map_blocks(process, zip(files, outputs), jobs):
+        stats.merge(file_stats)
+        bytes_in += size_in
+        bytes_out += size_out
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    stats.publish()
+
+    print(f"{'Decoded' if decode_files else 'Encoded'} {len(files)} files "
+          f"({bytes_in} bytes in, {bytes_out} bytes out) in {elapsed:.2f}s: "
+          f"{len(files) / elapsed:.1f} files/s, {bytes_in / elapsed / 1e6:.2f} MB/s")
+
+def _batch_file(decode_file, coder, block_size, seekable, capture_stats, paths):
+    (input_file, output_file) = paths
+    directory = os.path.dirname(output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with stats.capture(capture_stats) as file_stats:
+        if decode_file:
+            decode(input_file, output_file, coder, publish=False)
+        else:
+            encode(input_file, output_file, coder, block_size, seekable=seekable, publish=False)
+    return (os.path.getsize(input_file), os.path.getsize(output_file), file_stats)
+
+def encode(input_file, output_file, encoder, block_size=DEFAULT_BLOCK_SIZE, jobs=1, seekable=False, publish=True):
+    if same_file(input_file, output_file):
+        raise Exception(f"Output file '{output_file}' is the input file")
+    with stats.stage("main.encode"), open_input(input_file) as f_in, open_output(output_file) as f_out:
+        if block_size > 0:
+            encode_stream(f_in, f_out, encoder, block_size, jobs, seekable)
+        else:
+            with stats.stage("io.read"):
+                input = f_in.read()
+            output = encoder.encode(input)
+            with stats.stage("io.write"):
+                f_out.write(output)
+    if publish:
+        stats.publish()
 
-    output = decoder.decode(input)
+def decode(input_file, output_file, decoder, jobs=1, byte_range=None, publish=True):
+    if same_file(input_file, output_file):
+        raise Exception(f"Output file '{output_file}' is the input file")
+    with stats.stage("main.decode"), open_input(input_file) as f_in, open_output(output_file) as f_out:
+        if byte_range != None:
+            if input_file == "-":
+                raise Exception("Decoding a range needs a seekable input file")
+            (start, end) = byte_range
+            f_out.write(decode_range(f_in, decoder, start, end))
+            if publish:
+                stats.publish()
+            return
 
-    with open(output_file, "wb") as f_out:
-        f_out.write(output)
+        with stats.stage("io.read"):
+            prefix = f_in.read(len(MAGIC))
+        if is_block_stream(prefix):
+            decode_stream(f_in, f_out, decoder, jobs)
+        else:
+            # Unframed input (see --block-size), must be decoded as a whole
+            with stats.stage("io.read"):
+                if f_in.seekable():
+                    f_in.seek(0)
+                    input = f_in.read()
+                else:
+                    input = prefix + f_in.read()
+            output = decoder.decode(input)
+            with stats.stage("io.write"):
+                f_out.write(output)
+    if publish:
+        stats.publish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+##### ADAPTIVE HUFFMAN FILE FORMAT #####
+# Code of each input byte, followed by the code of the end of stream symbol
+# Zero padding up to the next byte
+#
+# The first occurrence of a symbol is written as the code of the NYT ("not yet
+# transmitted") node followed by the symbol's value (9 bits). Encoder and decoder
+# update their trees in the same way after every symbol, so no tree is stored.
+
+SYMBOLS = 257
+EOF_SYMBOL = 256
+SYMBOL_BITS = 9
+MAX_NODES = 2 * SYMBOLS - 1
+
+
+class AdaptiveHuffmanTree:
+    """
+    Huffman tree which is updated as symbols arrive, using the FGK algorithm.
+
+    Nodes are stored in parallel lists and identified by their number in the
+    sibling property order: weights never decrease as the number grows, and the
+    root is the node with the highest number. Only the numbers between 'nyt'
+    and the root are in use.
+    """
+
+    def __init__(self):
+        """
+        Creates a tree containing only the NYT node.
+
+        Returns:
+            - tree (AdaptiveHuffmanTree): A new tree.
+        """
+        self.root = MAX_NODES - 1
+        self.nyt = self.root
+        self.weight = [0] * MAX_NODES
+        self.parent = [-1] * MAX_NODES
+        # Children for bit 0 and bit 1. Both are -1 for leaves.
+        self.left = [-1] * MAX_NODES
+        self.right = [-1] * MAX_NODES
+        self.symbol = [-1] * MAX_NODES
+        # Node number of each symbol's leaf, or -1 if not transmitted yet
+        self.leaf = [-1] * SYMBOLS
+
+    def is_leaf(self, node):
+        return self.left[node] == -1
+
+    def code(self, symbol):
+        """
+        Returns the current code for a symbol. For symbols which were not
+        transmitted yet, this is the NYT code followed by the symbol's value.
+
+        Parameters:
+            - symbol (int): A byte value, or EOF_SYMBOL.
+
+        Returns:
+            - code (Tuple[int, int]): The code value and its bit size.
+        """
+        node = self.leaf[symbol]
+        if node == -1:
+            (value, size) = self._path(self.nyt)
+            return ((value << SYMBOL_BITS) | symbol, size + SYMBOL_BITS)
+        return self._path(node)
+
+    def _path(self, node):
+        """
+        Builds the code of a node by walking up to the root.
+        """
+        parent = self.parent
+        right = self.right
+        value = 0
+        size = 0
+        while node != self.root:
+            up = parent[node]
+            if right[up] == node:
+                value |= 1 << size
+            size += 1
+            node = up
+        return (value, size)
+
+    def update(self, symbol):
+        """
+        Adds one occurrence of a symbol to the tree, keeping the sibling property.
+
+        Parameters:
+            - symbol (int): A byte value, or EOF_SYMBOL.
+        """
+        weight = self.weight
+        parent = self.parent
+
+        node = self.leaf[symbol]
+        if node == -1:
+            # The NYT node becomes an internal node with the new NYT node on the
+            # left and the symbol's leaf on the right
+            old = self.nyt
+            self.left[old] = old - 2
+            self.right[old] = old - 1
+            parent[old - 2] = old
+            parent[old - 1] = old
+            self.symbol[old - 1] = symbol
+            self.leaf[symbol] = old - 1
+            self.nyt = old - 2
+            node = old - 1
+
+        while node != -1:
+            # Move the node to the highest number with the same weight, so it can be
+            # incremented without breaking the order
+            node_weight = weight[node]
+            leader = node
+            while leader < self.root and weight[leader + 1] == node_weight:
+                leader += 1
+            if leader != node and leader != parent[node]:
+                self._swap(node, leader)
+                node = leader
+            weight[node] += 1
+            node = parent[node]
+
+    def _swap(self, a, b):
+        """
+        Exchanges the subtrees at node numbers 'a' and 'b'. Both nodes keep their
+        parents and weights (which are equal).
+        """
+        left = self.left
+        right = self.right
+        symbol = self.symbol
+        left[a], left[b] = left[b], left[a]
+        right[a], right[b] = right[b], right[a]
+        symbol[a], symbol[b] = symbol[b], symbol[a]
+        for node in (a, b):
+            if left[node] == -1:
+                self.leaf[symbol[node]] = node
+            else:
+                self.parent[left[node]] = node
+                self.parent[right[node]] = node
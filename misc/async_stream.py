@@ -0,0 +1,146 @@
+import asyncio
+from collections import deque
+from functools import partial
+from misc.block_stream import DEFAULT_BLOCK_SIZE, FRAME_HEADER_SIZE, MAGIC, MAX_BLOCK_SIZE, is_block_stream
+
+# Asyncio versions of encode_stream() and decode_stream(), writing the same
+# block stream format. Blocks are encoded or decoded in an executor so the event
+# loop keeps serving other streams in the meantime, and a stream stops reading
+# its input while it has MAX_PENDING_BLOCKS blocks waiting to be written, so a
+# slow reader on the other end holds back the writer instead of filling memory.
+#
+# Usage:
+#     async def handle(reader, writer):
+#         await encode_stream_async(reader, writer, algorithms["huffman"].encoder, executor=pool)
+#         writer.close()
+
+# Blocks up to this size are processed on the event loop, which takes less time
+# than handing them over to the executor
+INLINE_BLOCK_SIZE = 16 << 10
+MAX_PENDING_BLOCKS = 4
+
+
+async def read_exactly_async(reader, size):
+    """
+    Reads 'size' bytes from a stream. Returns less than 'size' bytes only at the
+    end of the stream.
+
+    Parameters:
+    - reader (asyncio.StreamReader): The stream to read from.
+    - size (int): The amount of bytes to read.
+
+    Returns:
+    - data (bytes): The read bytes.
+    """
+    try:
+        return await reader.readexactly(size)
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+
+
+def _submit(loop, executor, size, function, *args):
+    if size <= INLINE_BLOCK_SIZE:
+        future = loop.create_future()
+        future.set_result(function(*args))
+        return future
+    return loop.run_in_executor(executor, partial(function, *args))
+
+
+async def _write_results(writer, pending, limit):
+    # Writes the oldest results until at most 'limit' are left, waiting for the
+    # writer's buffer to drain after each one
+    while len(pending) > limit:
+        data = await pending.popleft()
+        writer.write(data)
+        await writer.drain()
+
+
+def _encode_frame(encoder, block):
+    payload = encoder.encode(block)
+    return len(block).to_bytes(4, "big") + len(payload).to_bytes(4, "big") + payload
+
+
+def _decode_block(decoder, block_size, payload):
+    block = decoder.decode(payload)
+    if len(block) != block_size:
+        raise Exception("Decoded block size does not match the frame header")
+    return block
+
+
+async def encode_stream_async(reader, writer, encoder, block_size=DEFAULT_BLOCK_SIZE, executor=None,
+                              max_pending=MAX_PENDING_BLOCKS):
+    """
+    Encodes a stream block by block into a block stream (see block_stream.py)
+
+    Parameters:
+    - reader (asyncio.StreamReader): The stream to encode, up to its end.
+    - writer (asyncio.StreamWriter): The stream to write the block stream to.
+    - encoder: The encoder of the selected algorithm (see algorithms.py)
+    - block_size (int, default 1 MiB): The uncompressed size of each block.
+    - executor (concurrent.futures.Executor, optional): Where blocks are encoded.
+      Defaults to the event loop's default executor. With a process pool the
+      encoder must be picklable.
+    - max_pending (int, default 4): The amount of blocks read ahead of the writer.
+    """
+
+    if block_size <= 0 or block_size > MAX_BLOCK_SIZE:
+        raise Exception(f"Block size must be between 1 and {MAX_BLOCK_SIZE}")
+
+    loop = asyncio.get_running_loop()
+    writer.write(MAGIC)
+    pending = deque()
+    try:
+        while True:
+            block = await read_exactly_async(reader, block_size)
+            if len(block) == 0:
+                break
+            pending.append(_submit(loop, executor, len(block), _encode_frame, encoder, block))
+            await _write_results(writer, pending, max_pending - 1)
+        await _write_results(writer, pending, 0)
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def decode_stream_async(reader, writer, decoder, executor=None, max_pending=MAX_PENDING_BLOCKS):
+    """
+    Decodes a block stream frame by frame. Unlike decode_stream(), the magic is
+    read here. The index of seekable streams is not read.
+
+    Parameters:
+    - reader (asyncio.StreamReader): The block stream to decode.
+    - writer (asyncio.StreamWriter): The stream to write the decoded data to.
+    - decoder: The decoder of the selected algorithm (see algorithms.py)
+    - executor (concurrent.futures.Executor, optional): Where frames are decoded.
+      Defaults to the event loop's default executor. With a process pool the
+      decoder must be picklable.
+    - max_pending (int, default 4): The amount of frames read ahead of the writer.
+    """
+
+    if not is_block_stream(await read_exactly_async(reader, len(MAGIC))):
+        raise Exception("Input is not a block stream")
+
+    loop = asyncio.get_running_loop()
+    pending = deque()
+    try:
+        while True:
+            header = await read_exactly_async(reader, FRAME_HEADER_SIZE)
+            if len(header) == 0:
+                break
+            if len(header) < FRAME_HEADER_SIZE:
+                raise Exception("Failure reading frame: truncated frame header")
+
+            block_size = int.from_bytes(header[:4], "big")
+            payload_size = int.from_bytes(header[4:], "big")
+            if block_size == 0:
+                # End frame, followed by the index
+                break
+            payload = await read_exactly_async(reader, payload_size)
+            if len(payload) < payload_size:
+                raise Exception("Failure reading frame: truncated frame data")
+            pending.append(_submit(loop, executor, block_size, _decode_block, decoder, block_size, payload))
+            await _write_results(writer, pending, max_pending - 1)
+        await _write_results(writer, pending, 0)
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,117 @@
+import glob
+import os
+import sys
+from misc.file_io import same_file
+
+
+def find_files(paths=(), list_file=None):
+    """
+    Expands the inputs of a batch into a list of files. Directories are walked
+    recursively and glob patterns are expanded.
+
+    Parameters:
+    - paths (Iterable[str]): Files, directories or glob patterns.
+    - list_file (str, optional): A file with one path per line ('-' for stdin).
+      Empty lines are ignored.
+
+    Returns:
+    - files (List[str]): Every file found, without duplicates, in sorted order.
+    """
+
+    paths = list(paths)
+    if list_file == "-":
+        paths += [line.strip() for line in sys.stdin if line.strip()]
+    elif list_file:
+        with open(list_file) as f_in:
+            paths += [line.strip() for line in f_in if line.strip()]
+
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for (directory, _, names) in os.walk(path):
+                files.update(os.path.join(directory, name) for name in names)
+        elif os.path.isfile(path):
+            files.add(path)
+        else:
+            matches = glob.glob(path, recursive=True)
+            if not matches:
+                raise Exception(f"No files found for '{path}'")
+            files.update(match for match in matches if os.path.isfile(match))
+    return sorted(files)
+
+
+def output_name(input_file, extension, decode=False):
+    """
+    Returns the name of the output file for an input file. Encoded files replace
+    the input's extension with the algorithm's, decoded files drop the
+    algorithm's extension (or get '.out' appended if they don't have it).
+
+    Parameters:
+    - input_file (str): Path of the input file.
+    - extension (str): The algorithm's extension.
+    - decode (bool, default False): Whether the input is being decoded.
+
+    Returns:
+    - output_file (str): Path of the output file.
+    """
+
+    if decode:
+        if input_file.endswith(extension) and len(input_file) > len(extension):
+            return input_file[:-len(extension)]
+        return input_file + ".out"
+
+    # splitext() only looks at the file name, unlike splitting the whole path on dots
+    return os.path.splitext(input_file)[0] + extension
+
+
+def output_paths(files, extension, decode=False, output_dir=None):
+    """
+    Returns the output path of each file of a batch. With an output directory,
+    the files keep their paths relative to the directory they have in common.
+
+    Parameters:
+    - files (List[str]): The input files.
+    - extension (str): The algorithm's extension.
+    - decode (bool, default False): Whether the files are being decoded.
+    - output_dir (str, optional): Directory to write the outputs to. By default
+      each output is written next to its input.
+
+    Returns:
+    - outputs (List[str]): The output path of each file.
+    """
+
+    if output_dir == None or len(files) == 0:
+        outputs = [output_name(f, extension, decode) for f in files]
+    else:
+        base = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files])
+        outputs = [os.path.join(output_dir, output_name(os.path.relpath(os.path.abspath(f), base), extension, decode))
+                   for f in files]
+
+    # Files are processed in parallel, so an output must be neither another
+    # file's output nor any of the inputs
+    inputs = {os.path.realpath(f) for f in files}
+    seen = {}
+    for (input_file, output_file) in zip(files, outputs):
+        path = os.path.realpath(output_file)
+        if path in seen:
+            raise Exception(f"'{input_file}' and '{seen[path]}' would both be written to '{output_file}'")
+        if path in inputs or same_file(input_file, output_file):
+            raise Exception(f"The output of '{input_file}', '{output_file}', is an input file")
+        seen[path] = input_file
+    return outputs
+
+
+def skip_encoded(files, extension):
+    """
+    Drops the files which already have the algorithm's extension, such as the
+    outputs of an earlier run over the same directory.
+
+    Parameters:
+    - files (List[str]): The input files.
+    - extension (str): The algorithm's extension.
+
+    Returns:
+    - files (List[str]): The files left to encode.
+    """
+
+    return [f for f in files if not f.endswith(extension)]
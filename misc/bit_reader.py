@@ -1,6 +1,13 @@
+REFILL_BYTES = 8
+
+
 class BitReader():
     """
     Provides utilities to read bits from a bytestring in a streaming fashion.
+
+    The upcoming bits are kept in an integer bit buffer which is refilled
+    REFILL_BYTES bytes at a time, so reading several bits at once costs about
+    the same as reading a single one.
     """
 
     def __init__(self, buffer):
@@ -8,14 +15,93 @@ class BitReader():
         Creates a new BitReader instance.
 
         Parameters:
-        - buffer (bytes): The bytes input to be read.
+        - buffer (bytes | bytearray | memoryview | mmap): The bytes input to be read.
+          It is not copied.
 
         Returns:
         - reader (BitReader): A new BitReader instance.
         """
 
         self.buffer = buffer
-        self._read_pos = 0
+        self._data = memoryview(buffer).cast("B")
+        self._size = len(self._data) * 8
+        # Next byte to be loaded into the bit buffer
+        self._byte_pos = 0
+        # The last '_bit_count' bits of '_bits' are the next unread bits
+        self._bits = 0
+        self._bit_count = 0
+
+    def _refill(self, amount):
+        """
+        Loads bytes into the bit buffer until it holds at least 'amount' bits
+        or the end of the buffer is reached.
+        """
+
+        bits = self._bits & ((1 << self._bit_count) - 1)
+        while self._bit_count < amount and self._byte_pos < len(self._data):
+            chunk = self._data[self._byte_pos:self._byte_pos + REFILL_BYTES]
+            bits = (bits << (len(chunk) * 8)) | int.from_bytes(chunk, "big")
+            self._byte_pos += len(chunk)
+            self._bit_count += len(chunk) * 8
+        self._bits = bits
+
+    def peek_bits(self, amount):
+        """
+        Returns the next bits in the stream without consuming them. Past the end
+        of the buffer the stream reads as zeros.
+
+        Parameters:
+        - amount (int): The amount of bits to peek.
+
+        Returns:
+        - bits (int): The value of the next 'amount' bits.
+        """
+
+        if self._bit_count < amount:
+            self._refill(amount)
+            if self._bit_count < amount:
+                return (self._bits << (amount - self._bit_count)) & ((1 << amount) - 1)
+        return (self._bits >> (self._bit_count - amount)) & ((1 << amount) - 1)
+
+    def skip_bits(self, amount):
+        """
+        Consumes bits from the stream.
+
+        Parameters:
+        - amount (int): The amount of bits to skip.
+        """
+
+        if amount <= self._bit_count:
+            self._bit_count -= amount
+            return
+        if amount > self.bits_remaining():
+            raise Exception("Failure skipping bits: reached end of buffer")
+
+        # Skip whole bytes without loading them
+        amount -= self._bit_count
+        self._byte_pos += amount // 8
+        self._bits = 0
+        self._bit_count = 0
+        if amount % 8:
+            self._refill(amount % 8)
+            self._bit_count -= amount % 8
+
+    def read_bits(self, amount):
+        """
+        Reads bits from the stream.
+
+        Parameters:
+        - amount (int): The amount of bits to read.
+
+        Returns:
+        - bits (int): The value of the read bits.
+        """
+
+        if amount > self.bits_remaining():
+            raise Exception("Failure reading bits: reached end of buffer")
+        value = self.peek_bits(amount)
+        self._bit_count -= amount
+        return value
 
     def read_bit(self):
         """
@@ -25,14 +111,12 @@ class BitReader():
         - bit (Int): Can be either zero or one
         """
 
-        if self._read_pos >= len(self.buffer) * 8:
-            raise Exception("Failure reading bit: reached end of buffer")
-            
-        curr_byte = self.buffer[self._read_pos // 8]
-        # Get the value of the bit at readPos
-        bit_value = (curr_byte >> (7 - (self._read_pos % 8))) & 1
-        self._read_pos += 1
-        return bit_value
+        if self._bit_count == 0:
+            if self._byte_pos >= len(self._data):
+                raise Exception("Failure reading bit: reached end of buffer")
+            self._refill(1)
+        self._bit_count -= 1
+        return (self._bits >> self._bit_count) & 1
 
     def read_bytes(self, amount=1, as_int=False):
         """
@@ -46,35 +130,19 @@ class BitReader():
         - bytes (bytes | int): the read bytes.
         """
 
+        if self.bits_remaining() < amount * 8:
+            raise Exception("Failure reading byte: reached end of buffer")
+
+        # Byte-aligned reads with an empty bit buffer are sliced directly
+        if self._bit_count == 0 and not as_int:
+            res = bytes(self._data[self._byte_pos:self._byte_pos + amount])
+            self._byte_pos += amount
+            return res
+
+        value = self.read_bits(amount * 8)
         if as_int:
-            res = 0
-        else:
-            res = b""
-        initial_read_pos = self._read_pos
-        for _ in range(amount):
-            if self.bits_remaining() < 8:
-                self._read_pos = initial_read_pos
-                raise Exception("Failure reading byte: reached end of buffer")
-            start_byte_pos = self._read_pos // 8
-            end_byte_pos = (self._read_pos + 7) // 8 
-            # gets one or two bytes depending on self._read_pos
-            bytes_slice = self.buffer[start_byte_pos:end_byte_pos+1]
-            if len(bytes_slice) == 1:
-                ret_value = bytes_slice[0]
-            else:
-                # if the wanted byte crosses byte boundaries, extract it
-                bytes_value = (bytes_slice[0] << 8) + bytes_slice[1]
-                start_bit_pos = self._read_pos % 8
-                ret_value = (bytes_value >> (8 - start_bit_pos)) & 0xff
-
-            if as_int:
-                res = res << 8 + ret_value
-            else:
-                res += ret_value.to_bytes(1, "big")
-
-            self._read_pos += 8
-
-        return res
+            return value
+        return value.to_bytes(amount, "big")
 
     def bits_remaining(self):
         """
@@ -83,5 +151,4 @@ class BitReader():
         Returns:
         - bits (int): Amount of remaining bits.
         """
-        return len(self.buffer) * 8 - self._read_pos
-
+        return self._size - self._byte_pos * 8 + self._bit_count
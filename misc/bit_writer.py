@@ -1,6 +1,12 @@
+ACCUMULATOR_BITS = 64
+
+
 class BitWriter:
     """
     Class that provides utilities to write bits to a buffer.
+
+    Bits are collected in an accumulator and moved to the output a whole number
+    of bytes at a time once it holds at least ACCUMULATOR_BITS bits.
     """
 
     def __init__(self):
@@ -11,9 +17,11 @@ class BitWriter:
         - writer (BitWriter): New BitWriter instance
         """
 
-        self.out = b""
+        self.out = bytearray()
         self.buffer = 0
         self.buffer_size = 0
+        # Amount of times bits were moved from the accumulator to the output
+        self.flushes = 0
 
     def write_bits(self, value, size):
         """
@@ -28,17 +36,44 @@ class BitWriter:
         - size (int): the amount of bits to be written
         """
 
-        if value.bit_length() > size:
+        if value >> size:
             raise Exception("Size is less than bit representation length of value")
 
-        self.buffer = (self.buffer << size) + value
+        self.buffer = (self.buffer << size) | value
         self.buffer_size += size
 
-        while self.buffer_size >= 8:
-            byte_val = (self.buffer >> (self.buffer_size - 8))
-            self.out += bytes([byte_val])
-            self.buffer -= byte_val << (self.buffer_size - 8)
-            self.buffer_size -= 8
+        if self.buffer_size >= ACCUMULATOR_BITS:
+            self._write_whole_bytes()
+
+    def write_codes(self, codes, sizes):
+        """
+        Writes a sequence of values, each one with its own amount of bits. Equivalent
+        to calling write_bits() for each pair, but much faster. The values are not
+        checked against their sizes.
+
+        Parameters:
+        - codes (Iterable[int]): the numeric values of the bits to be written
+        - sizes (Iterable[int]): the amount of bits to be written for each value
+        """
+
+        out = self.out
+        buffer = self.buffer
+        buffer_size = self.buffer_size
+        flushes = 0
+
+        for (code, size) in zip(codes, sizes):
+            buffer = (buffer << size) | code
+            buffer_size += size
+            if buffer_size >= ACCUMULATOR_BITS:
+                extra = buffer_size & 7
+                out += (buffer >> extra).to_bytes(buffer_size >> 3, "big")
+                buffer &= (1 << extra) - 1
+                buffer_size = extra
+                flushes += 1
+
+        self.buffer = buffer
+        self.buffer_size = buffer_size
+        self.flushes += flushes
 
     def write_bytes(self, byte_str, zero_padding=0):
         """
@@ -49,26 +84,60 @@ class BitWriter:
             in 'byte_str', which will not be written to the buffer.
         """
 
-        for i in range(len(byte_str) - 1):
-            self.write_bits(byte_str[i], 8)
-        if len(byte_str) > 0:
-            self.write_bits(byte_str[-1] >> zero_padding, 8 - zero_padding)
+        if len(byte_str) == 0:
+            return
 
+        # Byte-aligned writes are copied as they are
+        if self.buffer_size == 0 and zero_padding == 0:
+            self.out += byte_str
+            return
+
+        value = int.from_bytes(byte_str, "big") >> zero_padding
+        self.buffer = (self.buffer << (len(byte_str) * 8 - zero_padding)) | value
+        self.buffer_size += len(byte_str) * 8 - zero_padding
+        self._write_whole_bytes()
+
+    def _write_whole_bytes(self):
+        """
+        Moves every complete byte in the accumulator to the output.
+        """
+        extra = self.buffer_size & 7
+        self.out += (self.buffer >> extra).to_bytes(self.buffer_size >> 3, "big")
+        self.buffer &= (1 << extra) - 1
+        self.buffer_size = extra
+        self.flushes += 1
 
     def flush_buffer(self):
         """
-        Writes the remaining bits to the buffer. Will right-pad with zeros to complete 
+        Writes the remaining bits to the buffer. Will right-pad with zeros to complete
         the last byte.
 
         Returns:
             - padding: The amount of padding (bits) used to complete the last byte
         """
+        self._write_whole_bytes()
         if self.buffer_size > 0:
             zero_padding = 8 - self.buffer_size
-            self.out += bytes([self.buffer << zero_padding])
+            self.out.append(self.buffer << zero_padding)
+            self.buffer = 0
+            self.buffer_size = 0
         else:
             return 0
         return zero_padding
-    
+
     def get_bytes(self):
-        return self.out
+        return bytes(self.out)
+
+    def take_bytes(self):
+        """
+        Returns every complete byte written so far and removes them from the
+        output. Less than 8 bits stay in the accumulator, which allows sending
+        the output as it's produced.
+
+        Returns:
+            - bytes (bytes): The complete bytes.
+        """
+        self._write_whole_bytes()
+        out = bytes(self.out)
+        self.out = bytearray()
+        return out
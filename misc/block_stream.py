@@ -0,0 +1,351 @@
+##### BLOCK STREAM FILE FORMAT #####
+# Magic "CPBS" (4 bytes)
+# Frames, one per block, until the end of the stream:
+#   - Uncompressed block size (4 bytes, big endian)
+#   - Encoded block size (4 bytes, big endian)
+#   - Encoded block (N bytes), as returned by the algorithm's encoder
+#
+# Every block is encoded independently, so encoding and decoding only ever
+# need one block in memory.
+#
+# Seekable streams start with "CPBX" instead, and after the last frame have:
+# End frame: 8 zero bytes
+# Index, one entry per frame:
+#   - Uncompressed offset of the block (8 bytes, big endian)
+#   - Offset of the frame from the start of the stream (8 bytes, big endian)
+#   - Length of the frame, header included (4 bytes, big endian)
+# Trailer:
+#   - Amount of index entries (8 bytes, big endian)
+#   - Total uncompressed size (8 bytes, big endian)
+#   - Magic "CPBI" (4 bytes)
+
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import os
+from misc import stats
+
+MAGIC = b"CPBS"
+SEEKABLE_MAGIC = b"CPBX"
+INDEX_MAGIC = b"CPBI"
+FRAME_HEADER_SIZE = 8
+INDEX_ENTRY_SIZE = 20
+TRAILER_SIZE = 20
+DEFAULT_BLOCK_SIZE = 1 << 20
+MAX_BLOCK_SIZE = 0xffffffff
+
+
+def read_exactly(f_in, size):
+    """
+    Reads up to 'size' bytes from a file, retrying on short reads (as returned
+    by pipes). Returns less than 'size' bytes only at the end of the file.
+
+    Parameters:
+    - f_in (BinaryIO): The file to read from.
+    - size (int): The amount of bytes to read.
+
+    Returns:
+    - data (bytes): The read bytes.
+    """
+
+    data = f_in.read(size)
+    if len(data) == size or len(data) == 0:
+        return data
+
+    parts = [data]
+    remaining = size - len(data)
+    while remaining > 0:
+        part = f_in.read(remaining)
+        if len(part) == 0:
+            break
+        parts.append(part)
+        remaining -= len(part)
+    return b"".join(parts)
+
+
+def read_blocks(f_in, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Splits a file into blocks.
+
+    Parameters:
+    - f_in (BinaryIO): The file to read from.
+    - block_size (int, default 1 MiB): The size of each block. Only the last block
+      can be smaller.
+
+    Returns:
+    - blocks (Iterator[bytes]): The file's blocks.
+    """
+
+    if block_size <= 0 or block_size > MAX_BLOCK_SIZE:
+        raise Exception(f"Block size must be between 1 and {MAX_BLOCK_SIZE}")
+
+    while True:
+        with stats.stage("io.read"):
+            block = read_exactly(f_in, block_size)
+        if len(block) == 0:
+            return
+        stats.count("io.bytes_read", len(block))
+        yield block
+
+
+def write_frame(f_out, block_size, payload):
+    """
+    Writes one frame to the stream.
+
+    Parameters:
+    - f_out (BinaryIO): The file to write to.
+    - block_size (int): The uncompressed size of the block.
+    - payload (bytes): The encoded block.
+    """
+
+    with stats.stage("io.write"):
+        f_out.write(block_size.to_bytes(4, "big") + len(payload).to_bytes(4, "big"))
+        f_out.write(payload)
+    stats.count("io.bytes_written", FRAME_HEADER_SIZE + len(payload))
+
+
+def read_frames(f_in):
+    """
+    Reads the frames of a block stream, up to the end frame of seekable streams.
+    The magic must have already been consumed (see is_block_stream()).
+
+    Parameters:
+    - f_in (BinaryIO): The file to read from.
+
+    Returns:
+    - frames (Iterator[Tuple[int, bytes]]): The uncompressed size and encoded
+      payload of each frame.
+    """
+
+    while True:
+        with stats.stage("io.read"):
+            header = read_exactly(f_in, FRAME_HEADER_SIZE)
+            if len(header) == 0:
+                return
+            if len(header) < FRAME_HEADER_SIZE:
+                raise Exception("Failure reading frame: truncated frame header")
+
+            block_size = int.from_bytes(header[:4], "big")
+            payload_size = int.from_bytes(header[4:], "big")
+            if block_size == 0:
+                # End frame, followed by the index
+                return
+            payload = read_exactly(f_in, payload_size)
+            if len(payload) < payload_size:
+                raise Exception("Failure reading frame: truncated frame data")
+        stats.count("io.bytes_read", FRAME_HEADER_SIZE + payload_size)
+        yield (block_size, payload)
+
+
+def is_block_stream(prefix):
+    """
+    Returns whether some data starts like a block stream.
+
+    Parameters:
+    - prefix (bytes): The first bytes of the data.
+
+    Returns:
+    - is_block_stream (bool)
+    """
+    return prefix[:len(MAGIC)] in (MAGIC, SEEKABLE_MAGIC)
+
+
+def write_index(f_out, index, total_size):
+    """
+    Writes the end frame, the index and the trailer of a seekable stream.
+
+    Parameters:
+    - f_out (BinaryIO): The file to write to.
+    - index (List[Tuple[int, int, int]]): The uncompressed offset, stream offset
+      and frame length of each frame.
+    - total_size (int): The total uncompressed size.
+    """
+
+    entries = bytearray(FRAME_HEADER_SIZE)
+    for (block_offset, frame_offset, frame_length) in index:
+        entries += block_offset.to_bytes(8, "big")
+        entries += frame_offset.to_bytes(8, "big")
+        entries += frame_length.to_bytes(4, "big")
+    entries += len(index).to_bytes(8, "big") + total_size.to_bytes(8, "big") + INDEX_MAGIC
+    with stats.stage("io.write"):
+        f_out.write(entries)
+    stats.count("io.bytes_written", len(entries))
+
+
+def read_index(f_in):
+    """
+    Reads the index of a seekable stream from the end of a file.
+
+    Parameters:
+    - f_in (BinaryIO): The seekable stream. Must support seek().
+
+    Returns:
+    - index (Tuple[List[Tuple[int, int, int]], int]): The index entries (see
+      write_index()) and the total uncompressed size.
+    """
+
+    f_in.seek(0)
+    if read_exactly(f_in, len(SEEKABLE_MAGIC)) != SEEKABLE_MAGIC:
+        raise Exception("Input is not a seekable block stream")
+
+    f_in.seek(-TRAILER_SIZE, os.SEEK_END)
+    trailer = read_exactly(f_in, TRAILER_SIZE)
+    if len(trailer) < TRAILER_SIZE or trailer[16:] != INDEX_MAGIC:
+        raise Exception("Failure reading index: missing trailer")
+    count = int.from_bytes(trailer[:8], "big")
+    total_size = int.from_bytes(trailer[8:16], "big")
+
+    f_in.seek(-(TRAILER_SIZE + count * INDEX_ENTRY_SIZE), os.SEEK_END)
+    entries = read_exactly(f_in, count * INDEX_ENTRY_SIZE)
+    index = []
+    for i in range(0, len(entries), INDEX_ENTRY_SIZE):
+        index.append((int.from_bytes(entries[i:i + 8], "big"),
+                      int.from_bytes(entries[i + 8:i + 16], "big"),
+                      int.from_bytes(entries[i + 16:i + 20], "big")))
+    return (index, total_size)
+
+
+def decode_range(f_in, decoder, start, end=None):
+    """
+    Decodes a byte range of a seekable stream, reading and decoding only the
+    frames which overlap it.
+
+    Parameters:
+    - f_in (BinaryIO): The seekable stream. Must support seek().
+    - decoder: The decoder of the algorithm the stream was encoded with.
+    - start (int): Offset of the first byte of the range, in the uncompressed data.
+    - end (int, optional): Offset after the last byte of the range. Defaults to
+      the end of the data.
+
+    Returns:
+    - output (bytes): The decoded range.
+    """
+
+    if start < 0 or (end != None and end < start):
+        raise Exception(f"Invalid byte range {start}:{'' if end == None else end}")
+    (index, total_size) = read_index(f_in)
+    if end == None or end > total_size:
+        end = total_size
+    out = bytearray()
+    if start >= end:
+        return bytes(out)
+
+    block_offsets = [entry[0] for entry in index]
+    for i in range(bisect_right(block_offsets, start) - 1, len(index)):
+        (block_offset, frame_offset, frame_length) = index[i]
+        if block_offset >= end:
+            break
+        with stats.stage("io.read"):
+            f_in.seek(frame_offset)
+            frame = read_exactly(f_in, frame_length)
+        stats.count("io.bytes_read", len(frame))
+        block_size = int.from_bytes(frame[:4], "big")
+        block = _decode_frame(decoder, False, (block_size, frame[FRAME_HEADER_SIZE:]))[0]
+        out += block[max(0, start - block_offset):end - block_offset]
+    return bytes(out)
+
+
+def map_blocks(function, items, jobs=1):
+    """
+    Applies a function to every item, yielding the results in order. With more
+    than one job the items are spread over a process pool, keeping at most two
+    items per worker in flight so memory stays bounded.
+
+    Parameters:
+    - function (Callable): The function to apply. Must be picklable when jobs > 1.
+    - items (Iterator): The items to process.
+    - jobs (int, default 1): The amount of worker processes.
+
+    Returns:
+    - results (Iterator): The results, in the same order as the items.
+    """
+
+    if jobs <= 1:
+        for item in items:
+            yield function(item)
+        return
+
+    with ProcessPoolExecutor(jobs) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(function, item))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Block stats are captured separately and merged by the caller, since workers
+# run in other processes.
+
+def _encode_block(encoder, capture_stats, block):
+    with stats.capture(capture_stats) as block_stats:
+        payload = encoder.encode(block)
+    return (len(block), payload, block_stats)
+
+
+def _decode_frame(decoder, capture_stats, frame):
+    (block_size, payload) = frame
+    with stats.capture(capture_stats) as block_stats:
+        block = decoder.decode(payload)
+    if len(block) != block_size:
+        raise Exception("Decoded block size does not match the frame header")
+    return (block, block_stats)
+
+
+def encode_stream(f_in, f_out, encoder, block_size=DEFAULT_BLOCK_SIZE, jobs=1, seekable=False):
+    """
+    Encodes a file block by block, writing each frame as soon as it's ready.
+
+    Parameters:
+    - f_in (BinaryIO): The file to encode.
+    - f_out (BinaryIO): The file to write the block stream to.
+    - encoder: The encoder of the selected algorithm (see algorithms.py)
+    - block_size (int, default 1 MiB): The uncompressed size of each block.
+    - jobs (int, default 1): The amount of processes encoding blocks in parallel.
+    - seekable (bool, default False): Whether to write an index of the frames at the
+      end, which allows decoding byte ranges with decode_range().
+    """
+
+    f_out.write(SEEKABLE_MAGIC if seekable else MAGIC)
+    index = []
+    block_offset = 0
+    frame_offset = len(MAGIC)
+    blocks = read_blocks(f_in, block_size)
+    if jobs > 1:
+        # Blocks can be memoryviews of a mapped file, which can't be sent to workers
+        blocks = map(bytes, blocks)
+    encode_block = partial(_encode_block, encoder, stats.enabled())
+    for (size, payload, block_stats) in map_blocks(encode_block, blocks, jobs):
+        stats.merge(block_stats)
+        write_frame(f_out, size, payload)
+        index.append((block_offset, frame_offset, FRAME_HEADER_SIZE + len(payload)))
+        block_offset += size
+        frame_offset += FRAME_HEADER_SIZE + len(payload)
+
+    if seekable:
+        write_index(f_out, index, block_offset)
+
+
+def decode_stream(f_in, f_out, decoder, jobs=1):
+    """
+    Decodes a block stream frame by frame. The magic must have already been
+    consumed (see is_block_stream()).
+
+    Parameters:
+    - f_in (BinaryIO): The block stream to decode.
+    - f_out (BinaryIO): The file to write the decoded data to.
+    - decoder: The decoder of the selected algorithm (see algorithms.py)
+    - jobs (int, default 1): The amount of processes decoding frames in parallel.
+    """
+
+    frames = read_frames(f_in)
+    if jobs > 1:
+        frames = ((block_size, bytes(payload)) for (block_size, payload) in frames)
+    decode_frame = partial(_decode_frame, decoder, stats.enabled())
+    for (block, block_stats) in map_blocks(decode_frame, frames, jobs):
+        stats.merge(block_stats)
+        with stats.stage("io.write"):
+            f_out.write(block)
+        stats.count("io.bytes_written", len(block))
@@ -0,0 +1,114 @@
+from misc.bit_reader import BitReader
+from misc.bit_writer import BitWriter
+
+##### CANONICAL HUFFMAN CODE LENGTHS FORMAT #####
+# Code length of each byte value 0..255 (4 bits each, 128 bytes)
+# A length of zero means the byte value does not appear in the input.
+
+MAX_CODE_LENGTH = 15
+CODE_LENGTH_BITS = 4
+
+
+def limited_code_lengths(frequencies, max_length=MAX_CODE_LENGTH):
+    """
+    Computes optimal Huffman code lengths which are not longer than 'max_length'
+    using the package-merge algorithm.
+
+    Parameters:
+        - frequencies (Dict): A dictionary in the form {char: freq}
+        - max_length (int, default 15): Maximum code length allowed.
+
+    Returns:
+        - lengths (Dict): A dictionary in the form {char: code_length}
+    """
+
+    if len(frequencies) == 0:
+        return {}
+    if len(frequencies) == 1:
+        # A single character still needs one bit per occurrence
+        return {char: 1 for char in frequencies}
+    if len(frequencies) > 2 ** max_length:
+        raise Exception("Too many characters for the maximum code length")
+
+    # Each item is (weight, characters contained). Sorting by (weight, char) makes the
+    # result independent of the dictionary's order.
+    leaves = sorted((freq, (char,)) for (char, freq) in frequencies.items())
+    items = leaves
+    for _ in range(max_length - 1):
+        packages = [(items[i][0] + items[i + 1][0], items[i][1] + items[i + 1][1])
+                    for i in range(0, len(items) - 1, 2)]
+        items = sorted(leaves + packages, key=lambda item: item[0])
+
+    # Each time a character appears in the selected items its code grows by one bit
+    lengths = {char: 0 for char in frequencies}
+    for (_, chars) in items[:2 * len(leaves) - 2]:
+        for char in chars:
+            lengths[char] += 1
+    return lengths
+
+
+def canonical_code(lengths, inverse=False):
+    """
+    Assigns canonical Huffman codes from code lengths. Characters are ordered by
+    code length and then by value, and consecutive characters get consecutive codes.
+
+    Parameters:
+        - lengths (Dict): A dictionary in the form {char: code_length}
+        - inverse (bool, default False): Whether to return the code in the
+          format {char: (charcode, bit_size)} or {(charcode, bit_size): char}
+
+    Returns:
+        - code (Dict): A dict containing the code value and bit_size for each
+          character, like HuffmanTree.construct_code()
+    """
+
+    code = {}
+    value = 0
+    last_length = 0
+    for (length, char) in sorted((l, c) for (c, l) in lengths.items() if l > 0):
+        value <<= length - last_length
+        last_length = length
+        if not inverse:
+            code[char] = (value, length)
+        else:
+            code[(value, length)] = char
+        value += 1
+    return code
+
+
+def encode_code_lengths(lengths):
+    """
+    Encodes code lengths. See the format description at the top of this module.
+
+    Parameters:
+        - lengths (Dict): A dictionary in the form {char: code_length}
+
+    Returns:
+        output (Tuple[bytes, int]): The encoded lengths and the zero
+        padding at the end of the output bytestring.
+    """
+
+    writer = BitWriter()
+    for char in range(256):
+        writer.write_bits(lengths.get(char, 0), CODE_LENGTH_BITS)
+    zero_padding = writer.flush_buffer()
+    return (writer.get_bytes(), zero_padding)
+
+
+def decode_code_lengths(reader: BitReader):
+    """
+    Decodes code lengths written by encode_code_lengths().
+
+    Parameters:
+        - reader (BitReader): A reader positioned at the start of the code lengths
+
+    Returns:
+        - lengths (Dict): A dictionary in the form {char: code_length}
+    """
+
+    lengths = {}
+    for char in range(256):
+        length = reader.read_bits(CODE_LENGTH_BITS)
+        if length > 0:
+            lengths[char] = length
+    return lengths
@@ -0,0 +1,160 @@
+import hashlib
+import os
+from functools import lru_cache
+
+from misc.bit_reader import BitReader
+from misc.canonical_huffman import limited_code_lengths, canonical_code, encode_code_lengths, decode_code_lengths
+from misc.histogram import Histogram
+from misc.huffman_table import HuffmanDecodeTable
+
+##### TRAINED CODE TABLE FILE FORMAT #####
+# Stored as "<table id>.table" in the table directory (8 hex digits)
+# Code lengths of every byte value (see misc.canonical_huffman)
+#
+# The table ID is derived from the code lengths, so the same training data
+# always produces the same ID. The "default" file in the table directory holds
+# the ID of the last trained table.
+
+DEFAULT_TABLE_DIR = os.environ.get("CPG_TABLE_DIR",
+                                   os.path.join(os.path.expanduser("~"), ".cache", "compression-playground", "tables"))
+TABLE_CACHE_SIZE = 64
+
+
+def train_lengths(samples):
+    """
+    Computes code lengths which fit the byte distribution of some samples. Every
+    byte value gets a code, so files with bytes missing from the samples can
+    still be encoded.
+
+    Parameters:
+    - samples (Iterable[bytes]): The sample corpus.
+
+    Returns:
+    - lengths (Tuple[int]): The code length of each byte value.
+    """
+
+    histogram = Histogram()
+    for sample in samples:
+        histogram.update(sample)
+    frequencies = {char: count + 1 for (char, count) in enumerate(histogram.counts)}
+    lengths = limited_code_lengths(frequencies)
+    return tuple(lengths[char] for char in range(256))
+
+
+def table_id(lengths):
+    """
+    Returns the ID of a table.
+
+    Parameters:
+    - lengths (Tuple[int]): The code length of each byte value.
+
+    Returns:
+    - id (int): A 32 bit ID.
+    """
+    return int.from_bytes(hashlib.sha256(bytes(lengths)).digest()[:4], "big")
+
+
+def save_table(lengths, table_dir=DEFAULT_TABLE_DIR, make_default=True):
+    """
+    Saves a table to the table directory.
+
+    Parameters:
+    - lengths (Tuple[int]): The code length of each byte value.
+    - table_dir (str): The table directory. Created if missing.
+    - make_default (bool, default True): Whether encoders should use this table
+      when no ID is given.
+
+    Returns:
+    - id (int): The table's ID.
+    """
+
+    id = table_id(lengths)
+    os.makedirs(table_dir, exist_ok=True)
+    (encoded, _) = encode_code_lengths(dict(enumerate(lengths)))
+    with open(os.path.join(table_dir, f"{id:08x}.table"), "wb") as f_out:
+        f_out.write(encoded)
+    if make_default:
+        with open(os.path.join(table_dir, "default"), "w") as f_out:
+            f_out.write(f"{id:08x}\n")
+    return id
+
+
+def default_table_id(table_dir=DEFAULT_TABLE_DIR):
+    """
+    Returns the ID of the default table (the last one trained).
+
+    Parameters:
+    - table_dir (str): The table directory.
+
+    Returns:
+    - id (int): The default table's ID.
+    """
+
+    try:
+        with open(os.path.join(table_dir, "default")) as f_in:
+            return int(f_in.read().strip(), 16)
+    except FileNotFoundError:
+        raise Exception(f"No default code table in {table_dir}, train one first")
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def load_lengths(table_dir, id):
+    """
+    Loads the code lengths of a saved table. Results are cached.
+
+    Parameters:
+    - table_dir (str): The table directory.
+    - id (int): The table's ID.
+
+    Returns:
+    - lengths (Tuple[int]): The code length of each byte value.
+    """
+
+    path = os.path.join(table_dir, f"{id:08x}.table")
+    try:
+        with open(path, "rb") as f_in:
+            lengths = decode_code_lengths(BitReader(f_in.read()))
+    except FileNotFoundError:
+        raise Exception(f"Unknown code table {id:08x}: {path} does not exist")
+    lengths = tuple(lengths.get(char, 0) for char in range(256))
+    if table_id(lengths) != id:
+        raise Exception(f"Code table {path} is corrupted")
+    return lengths
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def encode_table(lengths):
+    """
+    Returns the canonical code for some code lengths as two lists indexed by byte
+    value, ready for BitWriter.write_codes(). Results are cached and must not be
+    modified.
+
+    Parameters:
+    - lengths (Tuple[int]): The code length of each byte value.
+
+    Returns:
+    - table (Tuple[List[int], List[int]]): The code and code size of each byte value.
+    """
+
+    charcodes = [0] * 256
+    sizes = [0] * 256
+    for (char, (charcode, size)) in canonical_code(dict(enumerate(lengths))).items():
+        charcodes[char] = charcode
+        sizes[char] = size
+    return (charcodes, sizes)
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def decode_table(lengths, lookup_bits):
+    """
+    Returns the decode table for the canonical code with some code lengths.
+    Results are cached.
+
+    Parameters:
+    - lengths (Tuple[int]): The code length of each byte value.
+    - lookup_bits (int): See HuffmanDecodeTable.
+
+    Returns:
+    - table (HuffmanDecodeTable)
+    """
+    return HuffmanDecodeTable(canonical_code(dict(enumerate(lengths))), lookup_bits)
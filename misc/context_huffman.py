@@ -0,0 +1,214 @@
+import math
+import sys
+from array import array
+from collections import Counter
+from misc.bit_reader import BitReader
+from misc.bit_writer import BitWriter
+from misc.canonical_huffman import limited_code_lengths
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+##### ORDER-1 CONTEXT HUFFMAN FILE FORMAT #####
+# Input size: varint (see misc.varint)
+# CRC-32 of the input: 4 bytes, big endian
+# Contexts with their own code table: 256 bits, one per previous byte value
+# Code lengths of each of those contexts in order, then of the shared table used
+# by every other context:
+#   - Amount of byte values with a code: 9 bits
+#   - For each of them, in increasing order:
+#       - Difference with the previous byte value (with -1 for the first one), in
+#         Elias gamma code
+#       - Code length: 4 bits
+# Zero padding up to the next byte
+# Data: the canonical Huffman code of each byte in the table of its context, the
+# byte before it (0 for the first byte)
+# Zero padding up to the next byte
+#
+# After a given byte only a few others tend to follow, especially in structured
+# data such as CSV or JSON, so a code per context spends less bits per byte than
+# a single order-0 code. A context only gets its own table when that saves more
+# than the table costs, which keeps the header small.
+
+# Keeps the decode table of each context at 4096 entries or less
+MAX_CODE_LENGTH = 12
+# Contexts seen less often than this always use the shared table
+MIN_CONTEXT_COUNT = 32
+CONTEXTS = 256
+# Decode table of contexts without a code: every lookup gives a zero bit long 0
+EMPTY_TABLE = (0, array("H", [0]))
+
+
+def pair_indices(input):
+    """
+    Returns (byte << 8) | previous_byte for every byte of an input, the index of
+    the byte in the flat per-context tables. The previous byte of the first one
+    is 0.
+
+    Parameters:
+    - input (bytes): The data.
+
+    Returns:
+    - indices (memoryview): One unsigned 16 bit index per byte.
+    """
+
+    pairs = bytearray(2 * len(input))
+    # Interleaved so each pair of bytes reads as the index in native byte order
+    (previous, current) = (0, 1) if sys.byteorder == "little" else (1, 0)
+    pairs[current::2] = input
+    pairs[previous + 2::2] = input[:-1]
+    return memoryview(pairs).cast("H")
+
+
+def context_frequencies(indices):
+    """
+    Counts the bytes that follow each context.
+
+    Parameters:
+    - indices (memoryview): The indices returned by pair_indices().
+
+    Returns:
+    - frequencies (Dict): A dictionary in the form {context: {char: freq}}
+    """
+
+    if np is not None:
+        counts = np.bincount(np.frombuffer(indices, dtype=np.uint16), minlength=1 << 16)
+        pairs = {int(index): int(counts[index]) for index in np.flatnonzero(counts)}
+    else:
+        pairs = Counter(indices)
+
+    frequencies = {}
+    for (index, count) in pairs.items():
+        frequencies.setdefault(index & 0xff, {})[index >> 8] = count
+    return frequencies
+
+
+def lengths_size(lengths):
+    """
+    Returns the size of a table's code lengths, as written by write_lengths().
+
+    Parameters:
+    - lengths (Dict): A dictionary in the form {char: code_length}
+
+    Returns:
+    - bits (int): The size in bits.
+    """
+
+    bits = 9
+    last = -1
+    for char in sorted(lengths):
+        bits += 2 * (char - last).bit_length() - 1 + 4
+        last = char
+    return bits
+
+
+def choose_tables(frequencies):
+    """
+    Decides which contexts get their own code table. A context does when coding
+    its bytes with its own table, header included, takes less bits than with the
+    order-0 code of the whole input. Every other context is merged into the
+    shared table.
+
+    Parameters:
+    - frequencies (Dict): A dictionary in the form {context: {char: freq}}
+
+    Returns:
+    - tables (Tuple[Dict, Dict]): The code lengths of each context with its own
+      table, in the form {context: {char: code_length}}, and the code lengths of
+      the shared table.
+    """
+
+    order0 = Counter()
+    for context_frequencies in frequencies.values():
+        order0.update(context_frequencies)
+    order0_lengths = limited_code_lengths(order0, MAX_CODE_LENGTH)
+
+    tables = {}
+    shared = Counter()
+    for (context, context_frequencies) in frequencies.items():
+        total = sum(context_frequencies.values())
+        if total >= MIN_CONTEXT_COUNT:
+            shared_size = sum(freq * order0_lengths[char] for (char, freq) in context_frequencies.items())
+            # The entropy is a lower bound of the coded size, and every code length
+            # takes at least 5 bits. Contexts which can't win skip building a code.
+            lower_bound = 9 + 5 * len(context_frequencies) + sum(
+                freq * math.log2(total / freq) for freq in context_frequencies.values())
+            if lower_bound < shared_size:
+                lengths = limited_code_lengths(context_frequencies, MAX_CODE_LENGTH)
+                own_size = lengths_size(lengths) + sum(freq * lengths[char] for (char, freq) in context_frequencies.items())
+                if own_size < shared_size:
+                    tables[context] = lengths
+                    continue
+        shared.update(context_frequencies)
+
+    return (tables, limited_code_lengths(shared, MAX_CODE_LENGTH))
+
+
+def write_lengths(writer: BitWriter, lengths):
+    """
+    Writes the code lengths of a table. See the format description at the top of
+    this module.
+
+    Parameters:
+    - writer (BitWriter): The writer to write to.
+    - lengths (Dict): A dictionary in the form {char: code_length}
+    """
+
+    writer.write_bits(len(lengths), 9)
+    last = -1
+    for char in sorted(lengths):
+        gap = char - last
+        # Elias gamma: as many zeros as bits after the leading one, then the gap
+        writer.write_bits(gap, 2 * gap.bit_length() - 1)
+        writer.write_bits(lengths[char], 4)
+        last = char
+
+
+def read_lengths(reader: BitReader):
+    """
+    Reads the code lengths of a table written by write_lengths().
+
+    Parameters:
+    - reader (BitReader): A reader positioned at the start of the table.
+
+    Returns:
+    - lengths (Dict): A dictionary in the form {char: code_length}
+    """
+
+    lengths = {}
+    char = -1
+    for _ in range(reader.read_bits(9)):
+        extra_bits = 0
+        while reader.read_bits(1) == 0:
+            extra_bits += 1
+        char += (1 << extra_bits) | reader.read_bits(extra_bits)
+        length = reader.read_bits(4)
+        if char >= CONTEXTS or not 1 <= length <= MAX_CODE_LENGTH:
+            raise Exception("Corrupted input: invalid code lengths")
+        lengths[char] = length
+    return lengths
+
+
+def decode_table(code):
+    """
+    Builds the lookup table of a context, indexed by as many bits as its longest
+    code. Each entry holds (char << 4) | code_length, so a single lookup resolves
+    a byte. Entries outside of the code are 0.
+
+    Parameters:
+    - code (Dict): A dictionary in the form {char: (charcode, bit_size)}
+
+    Returns:
+    - table (Tuple[int, array]): The amount of bits to index the table with and
+      its entries.
+    """
+
+    width = max(size for (_, size) in code.values())
+    entries = array("H", bytes(2 << width))
+    for (char, (value, size)) in code.items():
+        start = value << (width - size)
+        end = (value + 1) << (width - size)
+        entries[start:end] = array("H", [(char << 4) | size]) * (end - start)
+    return (width, entries)
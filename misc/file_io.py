@@ -0,0 +1,143 @@
+import mmap
+import os
+import sys
+from contextlib import contextmanager
+
+# Files at least this big are memory-mapped instead of read
+MMAP_THRESHOLD = 1 << 20
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+
+class MemoryReader:
+    """
+    File-like reader over a buffer (for example a memory-mapped file). Reads
+    return memoryview slices of the buffer, so no data is copied.
+    """
+
+    def __init__(self, buffer):
+        """
+        Creates a new MemoryReader.
+
+        Parameters:
+        - buffer (bytes | mmap | memoryview): The data to read.
+
+        Returns:
+        - reader (MemoryReader): A new reader positioned at the start of the buffer.
+        """
+        self.view = memoryview(buffer).cast("B")
+        self.pos = 0
+
+    def read(self, size=-1):
+        """
+        Reads up to 'size' bytes, or everything that's left if 'size' is negative.
+
+        Returns:
+        - data (memoryview): A view of the read bytes.
+        """
+        if size < 0:
+            size = len(self.view) - self.pos
+        data = self.view[self.pos:self.pos + size]
+        self.pos += len(data)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.pos
+        elif whence == os.SEEK_END:
+            offset += len(self.view)
+        self.pos = max(0, min(offset, len(self.view)))
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+    def seekable(self):
+        return True
+
+
+@contextmanager
+def open_input(input_file, use_mmap=True):
+    """
+    Opens an input file for reading. Big regular files are memory-mapped and
+    read through a MemoryReader; '-' means stdin.
+
+    Parameters:
+    - input_file (str): Path of the file, or '-'.
+    - use_mmap (bool, default True): Whether to memory-map big files.
+
+    Returns:
+    - f_in (BinaryIO | MemoryReader): The opened file.
+    """
+
+    if input_file == "-":
+        yield sys.stdin.buffer
+        return
+
+    with open(input_file, "rb") as f_in:
+        if not use_mmap or os.fstat(f_in.fileno()).st_size < MMAP_THRESHOLD:
+            yield f_in
+            return
+
+        try:
+            mapped = mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Not mappable (e.g. a special file), read it normally
+            yield f_in
+            return
+
+        reader = MemoryReader(mapped)
+        try:
+            yield reader
+        finally:
+            reader.view.release()
+            try:
+                mapped.close()
+            except BufferError:
+                # Views of the file are still referenced somewhere, the mapping
+                # will be closed when they're garbage collected
+                pass
+
+
+def same_file(input_file, output_file):
+    """
+    Returns whether two paths name the same file, through symbolic or hard links
+    too. Opening the output truncates it, so it must never be the input.
+
+    Parameters:
+    - input_file (str): Path of the input file, or '-'.
+    - output_file (str): Path of the output file, or '-'.
+
+    Returns:
+    - same_file (bool)
+    """
+
+    if input_file == "-" or output_file == "-":
+        return False
+    if os.path.realpath(input_file) == os.path.realpath(output_file):
+        return True
+    try:
+        return os.path.samefile(input_file, output_file)
+    except OSError:
+        # One of them doesn't exist yet
+        return False
+
+
+@contextmanager
+def open_output(output_file):
+    """
+    Opens an output file for buffered writing; '-' means stdout.
+
+    Parameters:
+    - output_file (str): Path of the file, or '-'.
+
+    Returns:
+    - f_out (BinaryIO): The opened file.
+    """
+
+    if output_file == "-":
+        yield sys.stdout.buffer
+        sys.stdout.buffer.flush()
+        return
+
+    with open(output_file, "wb", buffering=OUTPUT_BUFFER_SIZE) as f_out:
+        yield f_out
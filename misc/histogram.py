@@ -0,0 +1,88 @@
+import math
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Histogram:
+    """
+    Byte frequency histogram with one counter per byte value. It can be updated
+    block by block, or merged with the histograms of other blocks, so the data
+    only needs to be counted once.
+    """
+
+    def __init__(self, data=b""):
+        """
+        Creates a new Histogram.
+
+        Parameters:
+        - data (bytes, default empty): Initial data to count.
+
+        Returns:
+        - histogram (Histogram): A new histogram.
+        """
+        self.counts = [0] * 256
+        self.update(data)
+
+    def update(self, data):
+        """
+        Adds the bytes of a block to the histogram.
+
+        Parameters:
+        - data (bytes | bytearray | memoryview): The block to count.
+        """
+
+        if len(data) == 0:
+            return
+        counts = self.counts
+        if np is not None:
+            block_counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256).tolist()
+            for char in range(256):
+                counts[char] += block_counts[char]
+        else:
+            for (char, count) in Counter(data).items():
+                counts[char] += count
+
+    def merge(self, other):
+        """
+        Adds the counts of another histogram to this one.
+
+        Parameters:
+        - other (Histogram): The histogram to merge.
+        """
+        for char in range(256):
+            self.counts[char] += other.counts[char]
+
+    def total(self):
+        """
+        Returns the amount of bytes counted.
+
+        Returns:
+        - total (int)
+        """
+        return sum(self.counts)
+
+    def frequencies(self):
+        """
+        Returns the frequency of each byte value that appears at least once.
+
+        Returns:
+        - frequencies (Dict): A dictionary in the form {char: freq}
+        """
+        return {char: count for (char, count) in enumerate(self.counts) if count > 0}
+
+    def entropy(self):
+        """
+        Returns the order-0 entropy of the counted bytes: the least amount of bits
+        per byte any coder which looks at bytes one by one can reach.
+
+        Returns:
+        - entropy (float): Bits per byte, between 0 and 8.
+        """
+        total = self.total()
+        if total == 0:
+            return 0.0
+        return sum(count * math.log2(total / count) for count in self.counts if count > 0) / total
@@ -0,0 +1,135 @@
+DEFAULT_LOOKUP_BITS = 10
+# Secondary tables are indexed by at most this many bits. Longer codes chain
+# further tables, so deep trees (which aren't length-limited) stay small.
+MAX_SUBTABLE_BITS = 8
+
+
+class HuffmanDecodeTable:
+    """
+    Lookup tables for decoding a Huffman code several bits at a time.
+
+    The primary table is indexed by the next 'lookup_bits' bits of the stream.
+    Each entry holds every symbol whose code fits completely in those bits, so
+    a single lookup can resolve more than one symbol. Codes longer than
+    'lookup_bits' go through secondary tables (see decode_long()), indexed by
+    up to MAX_SUBTABLE_BITS of the bits that follow the primary prefix, and
+    chained into further levels for even longer codes.
+
+    Primary entry layout (one list per field, indexed by the peeked bits):
+        - multi_syms: bytes with every symbol resolved by the lookup
+        - multi_size: total amount of bits used by those symbols. If 0, the
+          prefix belongs to a longer code, see subtables.
+        - first_sym / first_size: only the first symbol of the entry, used near
+          the end of the data where not every resolved symbol is really there.
+        - subtables: (sub_bits, symbols, sizes, children) tuples for long codes,
+          or None. 'sizes' holds the bits used at that level, 0 if the entry
+          continues in the table in 'children' (None when there's none).
+    """
+
+    def __init__(self, code, lookup_bits=DEFAULT_LOOKUP_BITS):
+        """
+        Builds the lookup tables for a Huffman code.
+
+        Parameters:
+            - code (Dict): A dictionary in the form {char: (charcode, bit_size)},
+              as returned by HuffmanTree.construct_code()
+            - lookup_bits (int, default 10): Amount of bits used to index the
+              primary table.
+
+        Returns:
+            - table (HuffmanDecodeTable): A new decode table.
+        """
+
+        entries = [(char, value, size) for (char, (value, size)) in code.items()]
+
+        self.max_code_size = max(size for (_, _, size) in entries)
+        self.min_code_size = min(size for (_, _, size) in entries)
+        self.lookup_bits = min(lookup_bits, self.max_code_size)
+
+        bits = self.lookup_bits
+        table_size = 1 << bits
+
+        self.first_sym = [0] * table_size
+        self.first_size = [0] * table_size
+        self.subtables = [None] * table_size
+
+        # Long codes grouped by their first 'bits' bits
+        long_codes = {}
+        for (char, value, size) in entries:
+            if size <= bits:
+                start = value << (bits - size)
+                end = (value + 1) << (bits - size)
+                for i in range(start, end):
+                    self.first_sym[i] = char
+                    self.first_size[i] = size
+            else:
+                prefix = value >> (size - bits)
+                long_codes.setdefault(prefix, []).append((char, value, size))
+
+        # (codes, bits already resolved, table holding the new one, its index)
+        pending = [(group, bits, self.subtables, prefix) for (prefix, group) in long_codes.items()]
+        while len(pending) > 0:
+            (group, used, parent, prefix) = pending.pop()
+            sub_bits = min(max(size for (_, _, size) in group) - used, MAX_SUBTABLE_BITS)
+            symbols = [0] * (1 << sub_bits)
+            sizes = [0] * (1 << sub_bits)
+            nested = {}
+            for (char, value, size) in group:
+                rest = size - used
+                if rest > sub_bits:
+                    nested.setdefault((value >> (rest - sub_bits)) & ((1 << sub_bits) - 1), []).append((char, value, size))
+                    continue
+                suffix = value & ((1 << rest) - 1)
+                start = suffix << (sub_bits - rest)
+                end = (suffix + 1) << (sub_bits - rest)
+                for i in range(start, end):
+                    symbols[i] = char
+                    sizes[i] = rest
+            children = [None] * (1 << sub_bits) if nested else None
+            for (index, nested_group) in nested.items():
+                pending.append((nested_group, used + sub_bits, children, index))
+            parent[prefix] = (sub_bits, symbols, sizes, children)
+
+        # Resolve as many symbols as fit in each primary index
+        mask = table_size - 1
+        self.multi_syms = [b""] * table_size
+        self.multi_size = [0] * table_size
+        for i in range(table_size):
+            used = self.first_size[i]
+            if used == 0:
+                continue
+            syms = [self.first_sym[i]]
+            while True:
+                next_index = (i << used) & mask
+                size = self.first_size[next_index]
+                if size == 0 or used + size > bits:
+                    break
+                syms.append(self.first_sym[next_index])
+                used += size
+            self.multi_syms[i] = bytes(syms)
+            self.multi_size[i] = used
+
+    def decode_long(self, peeked, index):
+        """
+        Resolves a code longer than 'lookup_bits', walking the secondary tables.
+
+        Parameters:
+            - peeked (int): The next 'max_code_size' bits of the stream.
+            - index (int): The primary index of the code, its first 'lookup_bits' bits.
+
+        Returns:
+            - symbol (Tuple[int, int]): The decoded symbol and the size of its code.
+        """
+
+        subtable = self.subtables[index]
+        used = self.lookup_bits
+        shift = self.max_code_size - used
+        while subtable != None:
+            (sub_bits, symbols, sizes, children) = subtable
+            shift -= sub_bits
+            sub_index = (peeked >> shift) & ((1 << sub_bits) - 1)
+            if sizes[sub_index]:
+                return (symbols[sub_index], used + sizes[sub_index])
+            used += sub_bits
+            subtable = children[sub_index] if children != None else None
+        raise Exception("Unknown bit sequence")
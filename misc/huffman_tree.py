@@ -1,3 +1,5 @@
+from array import array
+from collections import deque
 from misc.bit_reader import BitReader
 from misc.bit_writer import BitWriter
 
@@ -6,70 +8,8 @@ from misc.bit_writer import BitWriter
 # Tree (N bytes)
 # Data (N bytes)
 
-
-class Node:
-    """
-    Class that represents a node on the Huffman search tree
-    """
-    def __init__(self, char, weight, childs):
-        """
-        Creates a new Node.
-
-        Parameters:
-            - char (str | None): The char represented by the node. Only present in leaf nodes
-            - weight (int): The frequency weight of the node. If -1, the node was constructed
-                from decoding an input.
-            - childs (Tuple[Node, Node]): The Node's childs
-        """
-        self.charbyte = char
-        self.weight = weight
-        self.childs = childs
-
-    def isLeaf(self):
-        """
-        Returns wether the Node is a leaf node.
-
-        Returns
-        - isLeaf (bool)
-        """
-        return self.childs[0] == None and self.childs[1] == None
-
-    def encode(self, writer: BitWriter):
-        """
-        Encodes itself and its childs according to the huffman format using recursion.
-
-        Parameters:
-        - writer (BitWriter): writer to write the encoded Node to.
-        """
-        if self.isLeaf():
-            writer.write_bits(1, 1)
-            writer.write_bits(self.charbyte, 8)
-        else:
-            writer.write_bits(0, 1)
-            self.childs[0].encode(writer)
-            self.childs[1].encode(writer)
-
-    @staticmethod
-    def decode(reader):
-        """
-        Decodes a node and its children from a bytestring using recursion.
-
-        Parameters:
-            - reader (BitReader): Reader containing the encoded node.
-
-        Returns:
-            - node (Node): A new node, with all of its children, if any.
-        """
-
-        isLeaf = reader.read_bit()
-        if isLeaf:
-            charbyte = reader.read_bytes()
-            return Node(charbyte, -1, (None, None))
-        else:
-            l_child = Node.decode(reader)
-            r_child = Node.decode(reader)
-            return Node(None, -1, (l_child, r_child))
-
+# A full binary tree with a leaf per byte value
+MAX_NODES = 2 * 256 - 1
 
 
 class HuffmanTree:
@@ -81,7 +21,7 @@ class HuffmanTree:
     If the node bit is 0 however, the node will be followed by its two
     child nodes. For example:
 
-        .    'a'          'b'       'c'   
+        .    'a'          'b'       'c'
         0 101100001 0  101100010 101100011
         r
         |----rc-----lc--------------------
@@ -90,19 +30,78 @@ class HuffmanTree:
     rc = right child
     lc = left child
 
+    Nodes are numbered in the order they are added, and stored in parallel arrays
+    indexed by that number:
+        - left / right: the node's children, -1 if missing
+        - symbol: the byte of leaf nodes, -1 for inner nodes
+        - weight: the frequency weight of the node, -1 for trees built from a code
+          or an encoded input
+
+    Every traversal walks the arrays with an explicit stack or queue, so deep trees
+    never hit the recursion limit.
     """
 
-    def __init__(self, root: Node):
+    def __init__(self):
+        """
+        Creates a new, empty HuffmanTree instance. Nodes are added with add_leaf()
+        and add_node(), and the root must be set once the tree is complete.
+
+        Returns:
+            - tree (HuffmanTree): A new Huffman search tree.
+        """
+        self.left = array("h")
+        self.right = array("h")
+        self.symbol = array("h")
+        self.weight = array("q")
+        self.root = -1
+
+    def add_leaf(self, char, weight=-1):
         """
-        Creates a new HuffmanTree instance.
+        Adds a leaf node.
 
         Parameters:
-            - root (Node): The root node.
+            - char (int): The byte represented by the node.
+            - weight (int, default -1): The frequency weight of the node.
 
         Returns:
-            - tree (HuffmanTree): A new Huffman search tree.
+            - node (int): The number of the new node.
+        """
+        return self._add(char, weight, -1, -1)
+
+    def add_node(self, left=-1, right=-1, weight=-1):
         """
-        self.root = root
+        Adds an inner node.
+
+        Parameters:
+            - left (int, default -1): The number of the left child, if already known.
+            - right (int, default -1): The number of the right child, if already known.
+            - weight (int, default -1): The frequency weight of the node.
+
+        Returns:
+            - node (int): The number of the new node.
+        """
+        return self._add(-1, weight, left, right)
+
+    def _add(self, char, weight, left, right):
+        if len(self.symbol) >= MAX_NODES:
+            raise Exception("Huffman tree has too many nodes")
+        self.left.append(left)
+        self.right.append(right)
+        self.symbol.append(char)
+        self.weight.append(weight)
+        return len(self.symbol) - 1
+
+    def is_leaf(self, node):
+        """
+        Returns wether a node is a leaf node.
+
+        Parameters:
+            - node (int): The number of the node.
+
+        Returns
+            - is_leaf (bool)
+        """
+        return self.symbol[node] >= 0
 
     def print_tree(self):
         """
@@ -110,27 +109,26 @@ class HuffmanTree:
         """
 
         last_level = 0
-        queue = [(self.root, 0)]
+        queue = deque([(self.root, 0)])
         while len(queue) > 0:
-            (n, level) = queue.pop(0)
+            (node, level) = queue.popleft()
             if (last_level != level):
                 print("")
             last_level = level
-            char = n.charbyte
-            if char == None:
+            char = self.symbol[node]
+            if char < 0:
                 char = "Inter"
-            if char == "\n":
-                char = "\\n"
             print(char, end=", ")
-            if n.childs[0] != None:
-                queue.append((n.childs[0], level + 1))
-            if n.childs[1] != None:
-                queue.append((n.childs[1], level + 1))
+            if self.left[node] >= 0:
+                queue.append((self.left[node], level + 1))
+            if self.right[node] >= 0:
+                queue.append((self.right[node], level + 1))
         print("")
 
     def construct_code(self, inverse=False):
         """
-        Constructs the huffman code for each character in the tree.
+        Constructs the huffman code for each character in the tree. Each node's
+        code is its parent's code with one more bit.
 
         Parameters:
             - inverse (bool, default False): Whether to return the code in the
@@ -142,42 +140,85 @@ class HuffmanTree:
         """
 
         code = {}
-        path = [] 
-        self._add_code(self.root, code, path, inverse)
+        left, right, symbol = self.left, self.right, self.symbol
+        # A tree with a single leaf still needs one bit per character
+        stack = [(self.root, 0, 1 if self.is_leaf(self.root) else 0)]
+        while len(stack) > 0:
+            (node, value, size) = stack.pop()
+            char = symbol[node]
+            if char >= 0:
+                if not inverse:
+                    code[char] = (value, size)
+                else:
+                    code[(value, size)] = char
+                continue
+            value <<= 1
+            size += 1
+            if right[node] >= 0:
+                stack.append((right[node], value | 1, size))
+            if left[node] >= 0:
+                stack.append((left[node], value, size))
         return code
 
-    def _add_code(self, node, code, path, inverse):
-        """
-        Recursive method for adding each character's codes
-        """
-        if node.isLeaf():
-            value = 0
-            for i in range(len(path)):
-                value += path[len(path) - i - 1] * (2 ** i)
-            if not inverse:
-                code[node.charbyte] = (value, len(path))
-            else:
-                code[(value, len(path))] = node.charbyte
-            return
-        
-        self._add_code(node.childs[0], code, path + [0], inverse)
-        self._add_code(node.childs[1], code, path + [1], inverse)
-
     def encode(self):
         """
-        Encodes the Huffman tree. See HuffmanTree for details on the format.
+        Encodes the Huffman tree. See HuffmanTree for details on the format. All
+        the nodes are collected in pre-order and written with a single call to
+        the writer.
 
         Returns:
-            output (Tuple[bytes, int]): The encoded tree and the zero 
+            output (Tuple[bytes, int]): The encoded tree and the zero
             padding at the end of the output bytestring.
         """
+
+        codes = []
+        sizes = []
+        stack = [self.root]
+        while len(stack) > 0:
+            node = stack.pop()
+            char = self.symbol[node]
+            if char >= 0:
+                codes.append(0x100 | char)
+                sizes.append(9)
+            else:
+                codes.append(0)
+                sizes.append(1)
+                stack.append(self.right[node])
+                stack.append(self.left[node])
+
         writer = BitWriter()
-        self.root.encode(writer)
+        writer.write_codes(codes, sizes)
         zero_padding = writer.flush_buffer()
         return (writer.get_bytes(), zero_padding)
 
     @staticmethod
-    def decode(reader):
+    def from_code(code):
+        """
+        Builds a search tree from a Huffman code, for example a canonical code
+        rebuilt from its code lengths.
+
+        Parameters:
+            - code (Dict): A dict in the form {char: (charcode, bit_size)}
+
+        Returns:
+            - tree (HuffmanTree): The search tree for the code.
+        """
+
+        tree = HuffmanTree()
+        tree.root = tree.add_node()
+        children = (tree.left, tree.right)
+        for (char, (value, size)) in code.items():
+            node = tree.root
+            for i in range(size - 1, 0, -1):
+                child = children[(value >> i) & 1]
+                if child[node] < 0:
+                    child[node] = tree.add_node()
+                node = child[node]
+            children[value & 1][node] = tree.add_leaf(char)
+        return tree
+
+    @staticmethod
+    def decode(reader: BitReader):
         """
         Decodes a binary tree from an encoded input. For details on the format,
         see HuffmanTree.
@@ -188,6 +229,25 @@ class HuffmanTree:
         Returns:
             - tree (HuffmanTree): The decoded huffman tree.
         """
-        return HuffmanTree(Node.decode(reader))
 
+        tree = HuffmanTree()
+        # Inner nodes still waiting for a child. Nodes come in pre-order, so each
+        # node is a child of the last one in the list.
+        pending = []
+        while True:
+            if reader.read_bits(1):
+                node = tree.add_leaf(reader.read_bits(8))
+            else:
+                node = tree.add_node()
+
+            if len(pending) == 0:
+                tree.root = node
+            elif tree.left[pending[-1]] < 0:
+                tree.left[pending[-1]] = node
+            else:
+                tree.right[pending.pop()] = node
 
+            if not tree.is_leaf(node):
+                pending.append(node)
+            elif len(pending) == 0:
+                return tree
@@ -0,0 +1,71 @@
+##### LZSS FILE FORMAT #####
+# The input is parsed into sequences: a run of literal bytes followed by a match
+# (a copy of 'length' bytes starting 'distance' bytes back in the output). The
+# last sequence has no match.
+#
+# Five sections, each one preceded by its size (4 bytes, big endian):
+#   - Literals: every literal byte, Huffman encoded (canonical)
+#   - Literal run codes: one per sequence, Huffman encoded
+#   - Match length codes: one per match, Huffman encoded
+#   - Distance codes: one per match, Huffman encoded
+#   - Extra bits: for each sequence, the extra bits of its literal run, match
+#     length and distance, in that order. Zero padding up to the next byte.
+#
+# Run lengths, match lengths (minus MIN_MATCH) and distances (minus one) are
+# split into a code and extra bits (see split_value()). Empty sections are not
+# Huffman encoded, their size is just 0.
+
+MIN_MATCH = 3
+MAX_MATCH = 1 << 16
+# Matches of MIN_MATCH bytes further away than this are not used
+TOO_FAR = 1 << 12
+SECTIONS = 5
+
+# Match finder settings for each level: (window bits, hash chain depth). Higher
+# levels look further back and try more candidates, trading speed for ratio.
+LEVELS = {
+    1: (12, 1),
+    2: (14, 2),
+    3: (15, 4),
+    4: (15, 8),
+    5: (16, 16),
+    6: (16, 32),
+    7: (17, 64),
+    8: (18, 128),
+    9: (20, 256),
+}
+DEFAULT_LEVEL = 4
+
+
+def split_value(value):
+    """
+    Splits a non negative value into a code and extra bits. The code is the bit
+    length of the value, and the extra bits are the value without its leading
+    one bit, so small values take few bits.
+
+    Parameters:
+        - value (int): The value to split.
+
+    Returns:
+        - split (Tuple[int, int, int]): The code, the extra bits and their amount.
+    """
+    code = value.bit_length()
+    if code <= 1:
+        return (code, 0, 0)
+    return (code, value ^ (1 << (code - 1)), code - 1)
+
+
+def join_value(code, reader):
+    """
+    Reads the extra bits of a code and returns the value split by split_value().
+
+    Parameters:
+        - code (int): The value's code.
+        - reader (BitReader): A reader positioned at the value's extra bits.
+
+    Returns:
+        - value (int): The joined value.
+    """
+    if code <= 1:
+        return code
+    return (1 << (code - 1)) | reader.read_bits(code - 1)
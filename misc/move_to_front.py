@@ -0,0 +1,125 @@
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Move-to-front transform. Each byte is replaced by its position in a list of
+# every byte value, and then moved to the front of the list, so recently seen
+# bytes become small numbers and repeated bytes become zeros.
+#
+# Repeated bytes don't change the list, so only the first byte of each run is
+# looked up: the rest of the run is zeros on encoding, and a copy of that byte
+# on decoding. Each lookup depends on the list left by the previous one, so they
+# always run one at a time. NumPy, when it's available, only finds the runs on
+# encoding and fills them on decoding.
+
+_RUNS = re.compile(rb"(.)\1*", re.DOTALL)
+_NON_ZERO = re.compile(rb"[^\x00]")
+
+
+def run_starts(data):
+    """
+    Returns the position of the first byte of every run of equal bytes.
+
+    Parameters:
+        - data (bytes): The input.
+
+    Returns:
+        - starts (Iterable[int]): The start of each run, in order.
+    """
+    if np is not None:
+        values = np.frombuffer(data, dtype=np.uint8)
+        if len(values) == 0:
+            return []
+        return np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1)).tolist()
+    return [match.start() for match in _RUNS.finditer(data)]
+
+
+def mtf_encode(data):
+    """
+    Applies the move-to-front transform. The runs are found with NumPy when it's
+    available, but every run is looked up in a Python loop.
+
+    Parameters:
+        - data (bytes): The input.
+
+    Returns:
+        - output (bytearray): The position of each byte in the list.
+    """
+
+    out = bytearray(len(data))
+    table = bytearray(range(256))
+    for start in run_starts(data):
+        char = data[start]
+        index = table.index(char)
+        if index:
+            out[start] = index
+            del table[index]
+            table.insert(0, char)
+    return out
+
+
+def mtf_decode(data):
+    """
+    Undoes the move-to-front transform.
+
+    Parameters:
+        - data (bytes): Output of mtf_encode()
+
+    Returns:
+        - output (bytes): The original input.
+    """
+
+    if np is not None:
+        return mtf_decode_vectorized(data)
+    return mtf_decode_python(data)
+
+
+def mtf_decode_vectorized(data):
+    """
+    Undoes the move-to-front transform, filling the runs with NumPy. Produces the
+    same output as mtf_decode_python().
+    """
+    values = np.frombuffer(data, dtype=np.uint8)
+    if len(values) == 0:
+        return b""
+
+    # Only non zero values change the list, look them up one by one
+    changes = np.flatnonzero(values)
+    chars = bytearray(len(changes))
+    table = bytearray(range(256))
+    for (i, index) in enumerate(values[changes].tolist()):
+        char = table[index]
+        chars[i] = char
+        del table[index]
+        table.insert(0, char)
+
+    # Every other byte repeats the last change (or the initial front of the list)
+    last_change = np.zeros(len(values), dtype=np.int64)
+    last_change[changes] = np.arange(1, len(changes) + 1)
+    np.maximum.accumulate(last_change, out=last_change)
+    symbols = np.frombuffer(b"\x00" + bytes(chars), dtype=np.uint8)
+    return symbols[last_change].tobytes()
+
+
+def mtf_decode_python(data):
+    """
+    Undoes the move-to-front transform, filling the runs with slice assignments.
+    """
+    out = bytearray(len(data))
+    table = bytearray(range(256))
+    # Position and byte of the run being copied
+    pos = 0
+    char = table[0]
+    for match in _NON_ZERO.finditer(data):
+        start = match.start()
+        out[pos:start] = bytes([char]) * (start - pos)
+        index = data[start]
+        char = table[index]
+        del table[index]
+        table.insert(0, char)
+        pos = start
+    out[pos:] = bytes([char]) * (len(data) - pos)
+    return bytes(out)
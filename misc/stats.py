@@ -0,0 +1,216 @@
+import time
+from contextlib import contextmanager, nullcontext
+
+# Instrumentation for the encoders, decoders and main.py. Stats are disabled by
+# default, in which case stage() returns a shared no-op context and count()
+# returns right away, so instrumented code pays close to nothing.
+#
+# Usage:
+#     stats.enable()
+#     stats.add_hook(lambda snapshot: send_to_metrics(snapshot))
+#     main.encode(...)  # calls stats.publish() when done
+
+_current = None
+_hooks = []
+_NO_OP = nullcontext()
+
+
+class Stats:
+    """
+    Per-stage wall time and named counters.
+    """
+
+    def __init__(self):
+        """
+        Creates an empty Stats instance.
+
+        Returns:
+        - stats (Stats): New Stats instance.
+        """
+        # {stage: [seconds, calls]}
+        self.stages = {}
+        # {counter: value}
+        self.counters = {}
+
+    def add_time(self, stage, seconds):
+        entry = self.stages.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def count(self, counter, amount=1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def merge(self, other):
+        """
+        Adds the stages and counters of another Stats instance to this one.
+
+        Parameters:
+        - other (Stats): The stats to merge.
+        """
+        for (stage, (seconds, calls)) in other.stages.items():
+            entry = self.stages.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += calls
+        for (counter, value) in other.counters.items():
+            self.count(counter, value)
+
+    def as_dict(self):
+        """
+        Returns the stats as plain data, ready to be serialized.
+
+        Returns:
+        - stats (Dict): {"stages": {stage: {"seconds", "calls"}}, "counters": {counter: value}}
+        """
+        return {
+            "stages": {stage: {"seconds": seconds, "calls": calls}
+                       for (stage, (seconds, calls)) in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+    def report(self):
+        """
+        Formats the stats as a human readable table.
+
+        Returns:
+        - report (str)
+        """
+        lines = [f"{'stage':<36} {'seconds':>10} {'calls':>8}"]
+        for (stage, (seconds, calls)) in sorted(self.stages.items()):
+            lines.append(f"{stage:<36} {seconds:>10.4f} {calls:>8}")
+        lines.append("")
+        lines.append(f"{'counter':<36} {'value':>19}")
+        for (counter, value) in sorted(self.counters.items()):
+            lines.append(f"{counter:<36} {value:>19}")
+        return "\n".join(lines)
+
+
+class _StageTimer:
+    __slots__ = ("stats", "stage", "start")
+
+    def __init__(self, stats, stage):
+        self.stats = stats
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.add_time(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def enable():
+    """
+    Starts collecting stats, discarding any previously collected ones.
+
+    Returns:
+    - stats (Stats): The instance stats are collected into.
+    """
+    global _current
+    _current = Stats()
+    return _current
+
+
+def disable():
+    """
+    Stops collecting stats.
+    """
+    global _current
+    _current = None
+
+
+def enabled():
+    return _current is not None
+
+
+def current():
+    """
+    Returns the instance stats are being collected into, or None if disabled.
+    """
+    return _current
+
+
+def stage(name):
+    """
+    Returns a context manager which adds the wall time of its body to a stage.
+
+    Parameters:
+    - name (str): The stage's name, e.g. "huffman.encode.tree"
+    """
+    if _current is None:
+        return _NO_OP
+    return _StageTimer(_current, name)
+
+
+def count(counter, amount=1):
+    """
+    Adds an amount to a counter.
+
+    Parameters:
+    - counter (str): The counter's name, e.g. "huffman.encode.symbols"
+    - amount (int, default 1): The amount to add.
+    """
+    if _current is not None:
+        _current.count(counter, amount)
+
+
+@contextmanager
+def capture(active=True):
+    """
+    Collects the stats of a block of code into a separate Stats instance, which
+    can be sent back from a worker process and merged with merge().
+
+    Parameters:
+    - active (bool, default True): Whether to collect stats at all. Worker processes
+      don't necessarily inherit the parent's state, so it must be passed explicitly.
+
+    Returns:
+    - stats (Stats | None): The captured stats, or None if not enabled.
+    """
+    global _current
+    if not active:
+        yield None
+        return
+    previous = _current
+    _current = Stats()
+    try:
+        yield _current
+    finally:
+        _current = previous
+
+
+def merge(other):
+    """
+    Merges captured stats (see capture()) into the current ones, if enabled.
+
+    Parameters:
+    - other (Stats | None): The stats to merge.
+    """
+    if _current is not None and other is not None:
+        _current.merge(other)
+
+
+def add_hook(hook):
+    """
+    Registers a function to be called with the collected stats on publish().
+
+    Parameters:
+    - hook (Callable[[Dict], None]): Receives the stats as returned by Stats.as_dict()
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+def publish():
+    """
+    Calls every registered hook with the current stats, if enabled.
+    """
+    if _current is None:
+        return
+    snapshot = _current.as_dict()
+    for hook in _hooks:
+        hook(snapshot)
@@ -0,0 +1,131 @@
+from array import array
+
+# Suffix array construction with SA-IS (Nong, Zhang and Chan, "Two Efficient
+# Algorithms for Linear Time Suffix Array Construction"), in linear time.
+# Positions are kept in array("i") instances (4 bytes each) instead of lists,
+# and the suffix types in a bytearray.
+
+
+def suffix_array(data):
+    """
+    Returns the suffix array of a bytestring: the start position of each suffix,
+    in sorted order. A suffix which is a prefix of another one sorts first.
+
+    Parameters:
+        - data (bytes): The input.
+
+    Returns:
+        - sa (array): The suffix array, as an array("i")
+    """
+    return sa_is(data, 255)
+
+
+def sa_is(s, upper):
+    """
+    Builds the suffix array of a sequence of integers with SA-IS.
+
+    Parameters:
+        - s (Sequence[int]): The input. Every value must be between 0 and 'upper'
+        - upper (int): The biggest value that can appear in 's'
+
+    Returns:
+        - sa (array): The suffix array, as an array("i")
+    """
+
+    n = len(s)
+    if n == 0:
+        return array("i")
+    if n == 1:
+        return array("i", [0])
+    if n == 2:
+        return array("i", [0, 1] if s[0] < s[1] else [1, 0])
+
+    # Suffix types: 1 for S (smaller than the next suffix), 0 for L
+    ls = bytearray(n)
+    for i in range(n - 2, -1, -1):
+        ls[i] = ls[i + 1] if s[i] == s[i + 1] else s[i] < s[i + 1]
+
+    # Start of the S and L buckets of each value
+    sum_l = [0] * (upper + 2)
+    sum_s = [0] * (upper + 2)
+    for i in range(n):
+        if ls[i]:
+            sum_l[s[i] + 1] += 1
+        else:
+            sum_s[s[i]] += 1
+    for i in range(upper + 1):
+        sum_s[i] += sum_l[i]
+        sum_l[i + 1] += sum_s[i]
+
+    sa = array("i", [-1]) * n
+
+    def induce(lms):
+        """
+        Sorts every suffix from the given order of the LMS suffixes.
+        """
+        for i in range(n):
+            sa[i] = -1
+        buf = sum_s[:]
+        for d in lms:
+            if d != n:
+                sa[buf[s[d]]] = d
+                buf[s[d]] += 1
+        buf = sum_l[:]
+        sa[buf[s[n - 1]]] = n - 1
+        buf[s[n - 1]] += 1
+        for i in range(n):
+            v = sa[i] - 1
+            if v >= 0 and not ls[v]:
+                sa[buf[s[v]]] = v
+                buf[s[v]] += 1
+        buf = sum_l[:]
+        for i in range(n - 1, -1, -1):
+            v = sa[i] - 1
+            if v >= 0 and ls[v]:
+                buf[s[v] + 1] -= 1
+                sa[buf[s[v] + 1]] = v
+
+    # LMS positions (an S suffix right after an L one) and their rank by position
+    lms_map = array("i", [-1]) * (n + 1)
+    lms = array("i")
+    for i in range(1, n):
+        if not ls[i - 1] and ls[i]:
+            lms_map[i] = len(lms)
+            lms.append(i)
+    m = len(lms)
+
+    induce(lms)
+
+    if m:
+        # Name the LMS substrings by their order, then sort the LMS suffixes by
+        # sorting the string of names recursively
+        sorted_lms = array("i", [v for v in sa if lms_map[v] != -1])
+        rec_s = array("i", [0]) * m
+        rec_upper = 0
+        rec_s[lms_map[sorted_lms[0]]] = 0
+        for i in range(1, m):
+            l = sorted_lms[i - 1]
+            r = sorted_lms[i]
+            end_l = lms[lms_map[l] + 1] if lms_map[l] + 1 < m else n
+            end_r = lms[lms_map[r] + 1] if lms_map[r] + 1 < m else n
+            same = True
+            if end_l - l != end_r - r:
+                same = False
+            else:
+                while l < end_l:
+                    if s[l] != s[r]:
+                        break
+                    l += 1
+                    r += 1
+                if l == n or s[l] != s[r]:
+                    same = False
+            if not same:
+                rec_upper += 1
+            rec_s[lms_map[sorted_lms[i]]] = rec_upper
+
+        rec_sa = sa_is(rec_s, rec_upper)
+        for i in range(m):
+            sorted_lms[i] = lms[rec_sa[i]]
+        induce(sorted_lms)
+
+    return sa
@@ -0,0 +1,147 @@
+##### TANS FILE FORMAT #####
+# Input size: 4 bytes, big endian
+# Table log: 1 byte
+# Byte values present in the input: 256 bits, one per byte value
+# Normalized frequency minus one of each present byte value: 'table log' bits each
+# Zero padding up to the next byte
+# Initial decoder state: 'table log' bits
+# Bits read by each decoding step, in order
+# Zero padding up to the next byte
+#
+# Table based asymmetric numeral systems (tANS), as in FSE. Frequencies are
+# normalized to add up to 2 ** table_log, the amount of states. Each byte value
+# gets as many states as its normalized frequency, spread over the table. A
+# decoding step looks up the current state, which gives a byte and how to read
+# the next state from the stream. Unlike Huffman codes, a byte can cost a
+# fractional amount of bits on average.
+
+DEFAULT_TABLE_LOG = 11
+MAX_TABLE_LOG = 15
+
+
+def normalize_frequencies(frequencies, table_log):
+    """
+    Scales frequencies so they add up to 2 ** table_log, keeping every present
+    byte value at 1 or more.
+
+    Parameters:
+        - frequencies (Dict): A dictionary in the form {char: freq}
+        - table_log (int): Log2 of the total. 2 ** table_log must not be less than
+          the amount of characters.
+
+    Returns:
+        - normalized (Dict): A dictionary in the form {char: normalized_freq}
+    """
+
+    size = 1 << table_log
+    total = sum(frequencies.values())
+    normalized = {char: max(1, (freq * size + total // 2) // total) for (char, freq) in frequencies.items()}
+
+    # Rounding leaves the sum a bit off. Fix it one unit at a time, starting with
+    # the most frequent characters, where a unit changes the cost the least.
+    by_frequency = sorted(frequencies, key=lambda char: (-frequencies[char], char))
+    difference = size - sum(normalized.values())
+    while difference != 0:
+        step = 1 if difference > 0 else -1
+        for char in by_frequency:
+            if difference == 0:
+                break
+            if normalized[char] + step >= 1:
+                normalized[char] += step
+                difference -= step
+    return normalized
+
+
+def spread_symbols(normalized, table_log):
+    """
+    Assigns each state to a character, spreading the states of each character
+    over the table.
+
+    Parameters:
+        - normalized (Dict): A dictionary in the form {char: normalized_freq}
+        - table_log (int): Log2 of the amount of states.
+
+    Returns:
+        - spread (List[int]): The character of each state.
+    """
+
+    size = 1 << table_log
+    mask = size - 1
+    # An odd step visits every position of the table exactly once
+    step = ((size >> 1) + (size >> 3) + 3) | 1
+    spread = [0] * size
+    pos = 0
+    for char in sorted(normalized):
+        for _ in range(normalized[char]):
+            spread[pos] = char
+            pos = (pos + step) & mask
+    return spread
+
+
+def encode_tables(normalized, table_log):
+    """
+    Builds the tables used for encoding. Encoder states are kept in
+    [2 ** table_log, 2 ** (table_log + 1)), the state plus the table size.
+
+    Parameters:
+        - normalized (Dict): A dictionary in the form {char: normalized_freq}
+        - table_log (int): Log2 of the amount of states.
+
+    Returns:
+        - tables (Tuple[List[int], List[int], List[int]]): The next state for each
+          (character, reduced state) pair, and per character the offset of its
+          entries minus its frequency and the value which gives the amount of bits
+          to output when added to the state (see TansEncoder.encode_data())
+    """
+
+    size = 1 << table_log
+    spread = spread_symbols(normalized, table_log)
+
+    start = {}
+    offset = 0
+    for char in sorted(normalized):
+        start[char] = offset
+        offset += normalized[char]
+
+    next_state = [0] * size
+    taken = dict.fromkeys(normalized, 0)
+    for (state, char) in enumerate(spread):
+        next_state[start[char] + taken[char]] = state + size
+        taken[char] += 1
+
+    delta_state = [0] * 256
+    delta_bits = [0] * 256
+    for (char, freq) in normalized.items():
+        delta_state[char] = start[char] - freq
+        # The state must be shifted down into [freq, 2 * freq). That takes
+        # 'max_bits' bits for states of at least freq << max_bits and one less below.
+        max_bits = table_log - (freq.bit_length() - 1)
+        delta_bits[char] = (max_bits << 16) - (freq << max_bits)
+    return (next_state, delta_state, delta_bits)
+
+
+def decode_table(normalized, table_log):
+    """
+    Builds the table used for decoding.
+
+    Parameters:
+        - normalized (Dict): A dictionary in the form {char: normalized_freq}
+        - table_log (int): Log2 of the amount of states.
+
+    Returns:
+        - table (List[Tuple[int, int, int]]): For each state, its character, the
+          amount of bits to read and the value they are added to, which gives the
+          next state.
+    """
+
+    size = 1 << table_log
+    spread = spread_symbols(normalized, table_log)
+    occurrence = dict(normalized)
+    table = []
+    for char in spread:
+        # The states of a character are numbered from freq to 2 * freq - 1
+        value = occurrence[char]
+        occurrence[char] += 1
+        bits = table_log - (value.bit_length() - 1)
+        table.append((char, bits, (value << bits) - size))
+    return table
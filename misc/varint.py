@@ -0,0 +1,40 @@
+# Variable length unsigned integers (LEB128): 7 bits per byte, least significant
+# group first, with the high bit set on every byte but the last.
+
+MAX_VARINT_SIZE = 10
+
+
+def write_varint(out, value):
+    """
+    Appends a variable length integer to a buffer.
+
+    Parameters:
+    - out (bytearray): The buffer to append to.
+    - value (int): The value to write. Must not be negative.
+    """
+    while value >= 0x80:
+        out.append(0x80 | (value & 0x7f))
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(input, pos):
+    """
+    Reads a variable length integer.
+
+    Parameters:
+    - input (bytes): The data to read from.
+    - pos (int): The offset of the integer's first byte.
+
+    Returns:
+    - varint (Tuple[int, int]): The value and the offset after its last byte.
+    """
+    value = 0
+    shift = 0
+    for i in range(pos, min(len(input), pos + MAX_VARINT_SIZE)):
+        byte = input[i]
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return (value, i + 1)
+        shift += 7
+    raise Exception("Corrupted input: truncated or oversized varint")
@@ -0,0 +1,167 @@
+#!/usr/bin/python3
+"""
+Serves encoding and decoding over a local TCP or Unix socket, one request per
+connection:
+
+    $ python server.py --port 8765 -j 4
+    $ python server.py --unix /tmp/compression.sock
+
+Request:
+    - Request line: "encode <algorithm>\\n" or "decode <algorithm>\\n" (ASCII)
+    - Data, up to the end of the client's side of the connection
+Response:
+    - "OK\\n" followed by the output, up to the end of the connection. Encoded
+      data is a block stream (see misc/block_stream.py)
+    - Or "ERROR <message>\\n" if the request can't be served
+
+Errors after "OK" close the connection without a response trailer. Clients must
+read the response while sending the data, since the server stops reading once a
+few blocks are waiting to be written.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from algorithms import get_algorithm
+from misc.async_stream import encode_stream_async, decode_stream_async
+from misc.block_stream import DEFAULT_BLOCK_SIZE
+
+MAX_REQUEST_LINE = 256
+
+
+class CompressionServer:
+    """
+    Handles the connections of the compression server.
+    """
+
+    def __init__(self, executor=None, block_size=DEFAULT_BLOCK_SIZE, max_connections=64):
+        """
+        Creates a new CompressionServer.
+
+        Parameters:
+        - executor (concurrent.futures.Executor, optional): Where blocks are
+          encoded and decoded. Defaults to the event loop's default executor.
+        - block_size (int, default 1 MiB): The uncompressed size of encoded blocks.
+        - max_connections (int, default 64): The amount of requests served at once.
+          Further connections wait, unread, until one is done.
+        """
+        self.executor = executor
+        self.block_size = block_size
+        self.max_connections = max_connections
+        self.connections = None
+        # {name: Algorithm}, so pipelines are only built once
+        self.algorithms = {}
+
+    async def handle(self, reader, writer):
+        """
+        Serves one request (see the module's docstring for the protocol)
+
+        Parameters:
+        - reader (asyncio.StreamReader): The client's side of the connection.
+        - writer (asyncio.StreamWriter): The server's side of the connection.
+        """
+
+        if self.connections == None:
+            # Created here so it belongs to the running event loop
+            self.connections = asyncio.Semaphore(self.max_connections)
+
+        async with self.connections:
+            try:
+                (decode, algorithm) = self.parse_request(await reader.readline())
+            except Exception as e:
+                writer.write(f"ERROR {e}\n".encode("ascii", "replace"))
+                await self.close(writer)
+                return
+
+            writer.write(b"OK\n")
+            try:
+                if decode:
+                    await decode_stream_async(reader, writer, algorithm.decoder, self.executor)
+                else:
+                    await encode_stream_async(reader, writer, algorithm.encoder, self.block_size, self.executor)
+            except Exception:
+                # The response is already partly sent, all that's left is to cut it short
+                writer.transport.abort()
+                return
+            await self.close(writer)
+
+    def parse_request(self, line):
+        """
+        Parses a request line.
+
+        Parameters:
+        - line (bytes): The request line, including its line break.
+
+        Returns:
+        - request (Tuple[bool, Algorithm]): Whether the data is decoded, and the
+          algorithm to use.
+        """
+
+        if len(line) > MAX_REQUEST_LINE or not line.endswith(b"\n"):
+            raise Exception("Missing request line")
+        (action, _, name) = line.decode("ascii", "replace").strip().partition(" ")
+        if action not in ("encode", "decode"):
+            raise Exception(f"Unknown action '{action}'")
+        if name not in self.algorithms:
+            self.algorithms[name] = get_algorithm(name)
+        return (action == "decode", self.algorithms[name])
+
+    async def close(self, writer):
+        try:
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve(server, host="127.0.0.1", port=None, unix_path=None):
+    """
+    Serves requests until cancelled.
+
+    Parameters:
+    - server (CompressionServer): The server handling the connections.
+    - host (str, default "127.0.0.1"): The address to listen on with TCP.
+    - port (int, optional): The TCP port to listen on.
+    - unix_path (str, optional): The Unix socket to listen on, instead of TCP.
+    """
+
+    if unix_path:
+        listener = await asyncio.start_unix_server(server.handle, unix_path)
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+    for sock in listener.sockets:
+        print(f"Listening on {sock.getsockname()}")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="A local compression server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="Listen on a Unix socket instead of TCP.")
+    parser.add_argument("-b", "--block-size", type=int, default=DEFAULT_BLOCK_SIZE,
+                        help="Size of the blocks the input is split into when encoding.")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="Amount of processes encoding or decoding blocks. "
+                        "Use 0 to use every CPU.")
+    parser.add_argument("--max-connections", type=int, default=64,
+                        help="Amount of requests served at once.")
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    # Forked workers would inherit the sockets of the connections open at the time,
+    # keeping them open after the server closes them
+    with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context("spawn")) as executor:
+        server = CompressionServer(executor, args.block_size, args.max_connections)
+        try:
+            asyncio.run(serve(server, args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
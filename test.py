@@ -12,3 +12,352 @@ decoded = decoder.decode(test_string_enc)
 print(decoded)
 print(decoded == test_string_dec)
 
+
+from encoders.huffman import *
+from decoders.huffman import *
+
+huffman_encoder = HuffmanEncoder()
+huffman_decoder = HuffmanDecoder()
+small_table_decoder = HuffmanDecoder(lookup_bits=2)
+
+test_inputs = [b"hello world", b"aaaaabbbbbbbbbcccd", b"zzzz", bytes(range(256)) * 3]
+for test_input in test_inputs:
+    encoded = huffman_encoder.encode(test_input)
+    reference = huffman_decoder.decode(encoded, reference=True)
+    print(reference == test_input,
+          huffman_decoder.decode(encoded) == reference,
+          small_table_decoder.decode(encoded) == reference)
+
+canonical_encoder = HuffmanEncoder(canonical=True)
+canonical_decoder = HuffmanDecoder(canonical=True)
+
+# Fibonacci frequencies produce the deepest possible Huffman tree
+fibonacci_input = b""
+a, b = 1, 1
+for char in range(25):
+    fibonacci_input += bytes([char]) * a
+    a, b = b, a + b
+
+for test_input in test_inputs + [b"", fibonacci_input]:
+    encoded = canonical_encoder.encode(test_input)
+    print(canonical_decoder.decode(encoded) == test_input,
+          canonical_decoder.decode(encoded, reference=True) == test_input)
+
+from io import BytesIO
+from misc.block_stream import *
+
+stream_input = b"hello world, " * 1000
+for (stream_encoder, stream_decoder) in [(huffman_encoder, huffman_decoder), (encoder, decoder)]:
+    stream_out = BytesIO()
+    encode_stream(BytesIO(stream_input), stream_out, stream_encoder, block_size=1000)
+    stream_in = BytesIO(stream_out.getvalue())
+    print(is_block_stream(stream_in.read(len(MAGIC))), end=" ")
+    decoded_out = BytesIO()
+    decode_stream(stream_in, decoded_out, stream_decoder)
+    print(decoded_out.getvalue() == stream_input)
+
+stream_out = BytesIO()
+encode_stream(BytesIO(stream_input), stream_out, huffman_encoder, block_size=1000, jobs=2)
+stream_in = BytesIO(stream_out.getvalue()[len(MAGIC):])
+decoded_out = BytesIO()
+decode_stream(stream_in, decoded_out, huffman_decoder, jobs=2)
+print(decoded_out.getvalue() == stream_input)
+
+from misc.bit_reader import *
+
+reader = BitReader(memoryview(b"\x12\x34\x56\x78\x9a"))
+print(reader.read_bits(4) == 0x1, reader.peek_bits(8) == 0x23, reader.read_bytes(2, as_int=True) == 0x2345,
+      reader.read_bytes(1) == b"\x67", reader.bits_remaining() == 12)
+reader.skip_bits(5)
+print(reader.read_bits(7) == 0x1a, reader.bits_remaining() == 0, reader.peek_bits(4) == 0)
+
+rle_input = b"a" * 600 + b"bc" + b"\x00" * 255
+v1_encoder = RleEncoder(version=1)
+print(v1_encoder.encode(rle_input) == v1_encoder.encode_python(rle_input),
+      decoder.decode(v1_encoder.encode(rle_input)) == decoder.decode_python(v1_encoder.encode_python(rle_input)) == rle_input)
+# Version 2: literals and runs of any length, plus the header
+literal_input = bytes(range(256)) * 40
+print(encoder.encode(b"aaabbbccc") == b"\x00\x02\x80a\x80b\x80c", encoder.encode(b"") == b"\x00\x02",
+      len(encoder.encode(literal_input)) <= len(literal_input) + 5,
+      all(decoder.decode(encoder.encode(test_input)) == test_input
+          for test_input in (rle_input, literal_input, b"ab", b"\x00", b"aa" + b"x" * 100000 + b"ab" * 200)))
+print(all(encoder.encode(test_input) == encoder.encode_v2(test_input)
+          for test_input in (rle_input, literal_input, b"", b"ab", b"aaa", b"x" * 130 + b"yz", b"ab" * 200 + b"c" * 70000)))
+# Corrupted run lengths are rejected before the run is allocated
+print(len(RleDecoder(1 << 20).decode(encoder.encode(b"x" * (1 << 20)))) == 1 << 20, end=" ")
+for (bomb, bomb_decoder) in ((b"\x00\x02\xff\xff\xff\xff\x0f\x61", RleDecoder(1 << 20)),
+                             (b"\x00\x02\xff\xff\xff\xff\xff\xff\xff\xff\x0f\x61", decoder)):
+    try:
+        bomb_decoder.decode(bomb)
+        print(False, end=" ")
+    except Exception:
+        print(True, end=" ")
+print()
+
+from misc.histogram import *
+
+histogram = Histogram(stream_input[:100])
+histogram.update(stream_input[100:500])
+histogram.merge(Histogram(stream_input[500:]))
+print(histogram.frequencies() == huffman_encoder.get_char_frequency(stream_input),
+      huffman_encoder.encode(stream_input, histogram.frequencies()) == huffman_encoder.encode(stream_input))
+
+from misc import stats
+
+published = []
+stats.enable()
+stats.add_hook(published.append)
+encode_stream(BytesIO(stream_input), BytesIO(), huffman_encoder, block_size=1000)
+stats.publish()
+stats.remove_hook(published.append)
+stats.disable()
+print(published[0]["counters"]["huffman.encode.bytes_in"] == len(stream_input),
+      published[0]["stages"]["huffman.encode.encode_data"]["calls"] == 13)
+
+from encoders.adaptive_huffman import *
+from decoders.adaptive_huffman import *
+
+adaptive_encoder = AdaptiveHuffmanEncoder()
+adaptive_decoder = AdaptiveHuffmanDecoder()
+for test_input in test_inputs + [b""]:
+    print(adaptive_decoder.decode(adaptive_encoder.encode(test_input)) == test_input, end=" ")
+print("")
+
+# Streams can be split anywhere, on both sides
+stream_encoder = AdaptiveHuffmanStreamEncoder()
+encoded = b"".join(stream_encoder.update(stream_input[i:i + 7]) for i in range(0, len(stream_input), 7))
+encoded += stream_encoder.finish()
+stream_decoder = AdaptiveHuffmanStreamDecoder()
+decoded = b"".join(stream_decoder.update(encoded[i:i + 3]) for i in range(0, len(encoded), 3))
+print(decoded == stream_input, stream_decoder.finished)
+
+import os
+from misc.file_io import *
+
+memory_reader = MemoryReader(b"\x00\x01\x02\x03\x04")
+print(bytes(memory_reader.read(2)) == b"\x00\x01", memory_reader.seek(-1, os.SEEK_END) == 4,
+      bytes(memory_reader.read()) == b"\x04", len(memory_reader.read(3)) == 0)
+
+seekable_out = BytesIO()
+encode_stream(BytesIO(stream_input), seekable_out, encoder, block_size=1000, seekable=True)
+seekable_in = BytesIO(seekable_out.getvalue())
+print(decode_range(seekable_in, decoder, 999, 3001) == stream_input[999:3001],
+      decode_range(seekable_in, decoder, 12000) == stream_input[12000:],
+      decode_range(seekable_in, decoder, 5, 5) == b"")
+for (start, end) in ((-5, 3000), (3000, 10)):
+    try:
+        decode_range(seekable_in, decoder, start, end)
+        print(False, end=" ")
+    except Exception:
+        print(True, end=" ")
+print()
+seekable_in.seek(len(SEEKABLE_MAGIC))
+decoded_out = BytesIO()
+decode_stream(seekable_in, decoded_out, decoder)
+print(decoded_out.getvalue() == stream_input)
+
+import tempfile
+
+with tempfile.TemporaryDirectory() as directory:
+    same_input = os.path.join(directory, "notes.huff")
+    with open(same_input, "wb") as f_out:
+        f_out.write(stream_input)
+    os.link(same_input, os.path.join(directory, "link.huff"))
+    print(same_file(same_input, os.path.join(directory, ".", "notes.huff")),
+          same_file(same_input, os.path.join(directory, "link.huff")),
+          not same_file(same_input, os.path.join(directory, "notes")),
+          not same_file("-", "-"))
+from encoders.trained_huffman import *
+from decoders.trained_huffman import *
+from misc.code_tables import *
+
+with tempfile.TemporaryDirectory() as table_dir:
+    table_id = save_table(train_lengths([stream_input, b"other sample"]), table_dir)
+    trained_encoder = TrainedHuffmanEncoder(table_dir=table_dir)
+    trained_decoder = TrainedHuffmanDecoder(table_dir=table_dir)
+    for test_input in test_inputs + [b""]:
+        encoded = trained_encoder.encode(test_input)
+        print(trained_decoder.decode(encoded) == trained_decoder.decode(encoded, reference=True) == test_input, end=" ")
+    print(default_table_id(table_dir) == table_id)
+
+from encoders.lzss import *
+from decoders.lzss import *
+
+lzss_decoder = LzssDecoder()
+# Overlapping matches, matches at the very end and inputs too short to have any
+lzss_inputs = test_inputs + [b"", b"ab", b"abcabcabcabcabcx", b"x" * 1000, stream_input]
+for level in (1, 4, 9):
+    lzss_encoder = LzssEncoder(level)
+    print(all(lzss_decoder.decode(lzss_encoder.encode(test_input)) == test_input for test_input in lzss_inputs), end=" ")
+print(len(LzssEncoder().encode(stream_input)) < len(huffman_encoder.encode(stream_input)))
+
+from algorithms import *
+
+# Every decoder must accept the memoryview handed over by the previous stage
+for first in ("rle", "huffman", "lzss", "adaptive-huffman"):
+    for second in ("huffman", "huffman-canonical", "rle", "lzss", "adaptive-huffman"):
+        pipeline = get_algorithm(f"{first}+{second}")
+        print(all(pipeline.decoder.decode(pipeline.encoder.encode(test_input)) == test_input
+                  for test_input in test_inputs + [stream_input]), end=" ")
+print(get_algorithm("rle+huffman").extension == ".rle.huff")
+# The stages are read from the header, not from the decoder's name
+print(get_algorithm("rle+huffman").decoder.decode(get_algorithm("lzss+rle").encoder.encode(stream_input)) == stream_input)
+
+from misc.suffix_array import *
+from encoders.bwt import *
+from decoders.bwt import *
+
+print(list(suffix_array(b"banana")) == [5, 3, 1, 0, 4, 2],
+      list(suffix_array(b"mississippi")) == sorted(range(11), key=lambda i: b"mississippi"[i:]))
+# "banana" with a sentinel: last column "annb$aa", the sentinel is in row 4
+print(BwtEncoder().transform(b"banana") == (b"annbaa", 4))
+bwt_decoder = BwtDecoder()
+print(all(bwt_decoder.decode(BwtEncoder().encode(test_input)) == test_input
+          for test_input in test_inputs + [b"", b"a", b"ab", b"ba", b"\x00\x00\x00", stream_input]))
+
+from encoders.tans import *
+from decoders.tans import *
+
+tans_decoder = TansDecoder()
+# Small tables force the table log up to fit every byte value
+for table_log in (1, 5, 11):
+    tans_encoder = TansEncoder(table_log)
+    print(all(tans_decoder.decode(tans_encoder.encode(test_input)) == test_input
+              for test_input in test_inputs + [b"", b"a", stream_input]), end=" ")
+sparse_input = (b"\x00" * 30 + b"\x01") * 100
+print(len(TansEncoder().encode(sparse_input)) < len(huffman_encoder.encode(sparse_input)) // 2)
+
+import random
+from encoders.auto import *
+from decoders.auto import *
+
+auto_encoder = AutoEncoder()
+auto_decoder = AutoDecoder()
+random_input = random.Random(0).randbytes(5000)
+runs_input = b"".join(bytes([i % 16]) * (i * 37 % 500 + 1) for i in range(100))
+auto_inputs = {runs_input: "rle+tans", stream_input: "tans", random_input: "store", b"": "store"}
+for (test_input, method) in auto_inputs.items():
+    encoded = auto_encoder.encode(test_input)
+    print(AUTO_METHODS[encoded[0]] == method, auto_decoder.decode(encoded) == test_input, end=" ")
+print(len(auto_encoder.encode(random_input)) == len(random_input) + 1)
+
+from misc.batch import *
+
+print(output_name("dir.d/file.txt", ".huff") == "dir.d/file.huff", output_name("file", ".huff") == "file.huff",
+      output_name("file.huff", ".huff", decode=True) == "file", output_name("file", ".huff", decode=True) == "file.out")
+with tempfile.TemporaryDirectory() as batch_dir:
+    for name in ("a.txt", "b.txt", "sub/c.bin"):
+        os.makedirs(os.path.dirname(os.path.join(batch_dir, name)), exist_ok=True)
+        open(os.path.join(batch_dir, name), "wb").close()
+    found = find_files([batch_dir, os.path.join(batch_dir, "*.txt")])
+    print(len(found) == 3,
+          output_paths(found, ".rle", output_dir="out") == ["out/a.rle", "out/b.rle", "out/sub/c.rle"])
+    # Outputs which collide with each other or with an input
+    for (colliding, decode_files) in ((["d/a.txt", "d/a.md"], False), (["d/a.rle"], False),
+                                      (["d/a.rle", "d/a"], True)):
+        try:
+            output_paths(colliding, ".rle", decode_files)
+            print(False, end=" ")
+        except Exception:
+            print(True, end=" ")
+    print(skip_encoded(["d/a.txt", "d/a.rle"], ".rle") == ["d/a.txt"])
+
+import asyncio
+from misc.async_stream import *
+from server import CompressionServer
+
+async def serve_requests(requests):
+    listener = await asyncio.start_server(CompressionServer(block_size=4096).handle, "127.0.0.1", 0)
+    responses = []
+    async with listener:
+        for (request_line, data) in requests:
+            (reader, writer) = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+            writer.write(request_line + data)
+            writer.write_eof()
+            responses.append(await reader.read())
+            writer.close()
+    return responses
+
+async_input = stream_input * 20
+(encoded, decoded, unknown) = asyncio.run(serve_requests([(b"encode rle+huffman\n", async_input),
+                                                          (b"decode rle+huffman\n", b"CPBS"),
+                                                          (b"encode nope\n", b"")]))
+with BytesIO(encoded[3:]) as f_in, BytesIO() as f_out:
+    print(encoded[:3] == b"OK\n" and is_block_stream(f_in.read(4)), end=" ")
+    decode_stream(f_in, f_out, get_algorithm("rle+huffman").decoder)
+    print(f_out.getvalue() == async_input, decoded == b"OK\n", unknown.startswith(b"ERROR"))
+
+from misc.huffman_tree import *
+from misc.bit_reader import *
+
+fibonacci_tree = huffman_encoder.construct_search_tree(Histogram(fibonacci_input).frequencies())
+(encoded_tree, _) = fibonacci_tree.encode()
+print(HuffmanTree.decode(BitReader(encoded_tree)).construct_code() == fibonacci_tree.construct_code(),
+      HuffmanTree.from_code(fibonacci_tree.construct_code()).construct_code() == fibonacci_tree.construct_code(),
+      max(size for (_, size) in fibonacci_tree.construct_code().values()) == 24)
+try:
+    # Only inner nodes: never completes
+    HuffmanTree.decode(BitReader(bytes(100)))
+    print(False)
+except Exception:
+    print(True)
+
+# Version 2 Huffman header: exact size and checksum, version 1 input still decodes
+for canonical in (False, True):
+    v2_encoder = HuffmanEncoder(canonical)
+    v1_encoder = HuffmanEncoder(canonical, version=1)
+    v2_decoder = HuffmanDecoder(canonical=canonical)
+    print(all(v2_decoder.decode(v2_encoder.encode(test_input)) == test_input and
+              v2_decoder.decode(v2_encoder.encode(test_input), reference=True) == test_input and
+              (test_input == b"" or v2_decoder.decode(v1_encoder.encode(test_input)) == test_input)
+              for test_input in test_inputs + [b"", b"z", fibonacci_input]), end=" ")
+    encoded = v2_encoder.encode(stream_input)
+    corrupted = bytearray(encoded)
+    corrupted[len(encoded) // 2] ^= 4
+    print(v2_decoder.read_header(encoded)[0] == len(stream_input), end=" ")
+    for bad_input in (encoded[:-10], bytes(corrupted)):
+        try:
+            v2_decoder.decode(bad_input)
+            print(False, end=" ")
+        except Exception:
+            print(True, end=" ")
+    print()
+
+from encoders.context_huffman import *
+from decoders.context_huffman import *
+from benchmarks.corpus import records, binary_image
+
+# Order-1 context Huffman: round trips, better than order-0 on structured data
+context_encoder = ContextHuffmanEncoder()
+context_decoder = ContextHuffmanDecoder()
+print(all(context_decoder.decode(context_encoder.encode(test_input)) == test_input
+          for test_input in test_inputs + [b"", b"a", b"ab", stream_input, fibonacci_input]), end=" ")
+records_input = records(1 << 16)
+encoded = context_encoder.encode(records_input)
+print(context_decoder.decode(encoded) == records_input,
+      len(encoded) < len(HuffmanEncoder(True).encode(records_input)), end=" ")
+corrupted = bytearray(encoded)
+corrupted[len(encoded) // 2] ^= 4
+for bad_input in (encoded[:-10], bytes(corrupted)):
+    try:
+        context_decoder.decode(bad_input)
+        print(False, end=" ")
+    except Exception:
+        print(True, end=" ")
+print()
+
+# The last codes can be shorter than the data left after the last refill
+rng = random.Random(7)
+skewed_inputs = [bytes(rng.choice(b"aaaaaaab") for _ in range(rng.randint(1, 400))) for _ in range(300)]
+print(all(context_decoder.decode(context_encoder.encode(test_input)) == test_input
+          for test_input in skewed_inputs + [binary_image(1 << 16)]))
+
+from misc.huffman_table import *
+
+# Codes longer than a secondary table chain further levels instead of growing it
+deep_table = HuffmanDecodeTable(fibonacci_tree.construct_code())
+deep_subtables = [subtable for subtable in deep_table.subtables if subtable != None]
+print(max(sub_bits for (sub_bits, _, _, _) in deep_subtables) <= MAX_SUBTABLE_BITS,
+      any(children != None for (_, _, _, children) in deep_subtables),
+      HuffmanDecoder().decode(HuffmanEncoder().encode(fibonacci_input)) == fibonacci_input,
+      HuffmanDecoder().decode(HuffmanEncoder(version=1).encode(fibonacci_input)) == fibonacci_input)